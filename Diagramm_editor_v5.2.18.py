@@ -2,22 +2,47 @@ import sys
 import os
 import json
 import math
+import functools
+import contextlib
+import tempfile
+import struct
+import zlib
+import time
+import queue
+import collections
+import hashlib
+import shutil
+import bisect
+import heapq
+import fnmatch
+from array import array
+try:
+    import numpy as np
+except ImportError:     # nur für das Auto-Layout nötig
+    np = None
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QGraphicsView, QGraphicsScene,
     QGraphicsRectItem, QGraphicsLineItem, QGraphicsTextItem,
     QFileDialog, QToolBar, QAction, QColorDialog, QInputDialog,
     QListWidget, QListWidgetItem, QDockWidget, QMessageBox, QMenu,
-    QTableWidget, QTableWidgetItem, QShortcut, QLabel, QComboBox, 
-    QLineEdit, QFormLayout, QWidget, QStyleFactory, QDateEdit,  QGraphicsItem
+    QTableView, QShortcut, QLabel, QComboBox, 
+    QLineEdit, QFormLayout, QWidget, QStyleFactory, QDateEdit,  QGraphicsItem,
+    QStyleOptionGraphicsItem, QVBoxLayout, QAbstractItemView, QProgressBar,
+    QPushButton, QSpinBox, QCheckBox
 )
 os.environ["QT_QPA_PLATFORM"] = "windows:darkmode=2"
 from qfluentwidgets.window.fluent_window import ( FluentWindow )
 from qfluentwidgets import ( Theme )
 from PyQt5.QtGui import (
     QBrush, QColor, QPen, QFont, QPainter, QImage, QTransform, QTextOption, 
-    QPolygonF, QPixmap, QIcon, QPainterPath, QKeySequence, QPalette, QPainterPathStroker
+    QPolygonF, QPixmap, QIcon, QPainterPath, QKeySequence, QPalette, QPainterPathStroker,
+    QPicture
+)
+from PyQt5.QtCore import (
+    Qt, QPointF, QRectF, QRect, QPoint, QLineF, QPointF, QDate, QSizeF,
+    QAbstractTableModel, QModelIndex, QSortFilterProxyModel, pyqtSignal,
+    QObject, QThread, QTimer, QLockFile
 )
-from PyQt5.QtCore import Qt, QPointF, QRectF, QRect, QPoint, QLineF, QPointF, QDate
 def is_color_dark(color: QColor, threshold: float = 128.0) -> bool:
     """Berechnet die Helligkeit und gibt True zurück, wenn sie unter threshold liegt."""
     # Wahrnehmungs-Helligkeit (Luminanz) nach ITU-R BT.601
@@ -27,6 +52,80 @@ def is_color_dark(color: QColor, threshold: float = 128.0) -> bool:
 
 TEMPLATES_FILE = "templates.json"
 
+class NodeShape:
+    """Node-Form in Einheitskoordinaten (0..1); polygon=None bedeutet Ellipse."""
+    def __init__(self, name, label, polygon=None, content_inset=0.0):
+        self.name          = name
+        self.label         = label          # Anzeigename in den Dialogen
+        self.polygon       = polygon        # [(fx, fy), …]
+        self.content_inset = content_inset  # seitlicher Text-Inset als Anteil der Breite
+
+    def build_path(self, w, h):
+        path = QPainterPath()
+        if self.polygon is None:
+            path.addEllipse(QRectF(0, 0, w, h))
+        else:
+            path.addPolygon(QPolygonF([QPointF(fx * w, fy * h) for fx, fy in self.polygon]))
+            path.closeSubpath()
+        return path
+
+# Zentrale Form-Registry – neue Formen nur hier eintragen
+NODE_SHAPES = {shape.name: shape for shape in [
+    NodeShape("rect",     "Rechteck", [(0, 0), (1, 0), (1, 1), (0, 1)]),
+    NodeShape("ellipse",  "Ellipse"),
+    NodeShape("diamond",  "Raute",    [(0.5, 0), (1, 0.5), (0.5, 1), (0, 0.5)], 0.25),
+    NodeShape("triangle", "Dreieck",  [(0.5, 0), (1, 1), (0, 1)], 0.1),
+    NodeShape("hexagon",  "Hexagon",  [(0.25, 0), (0.75, 0), (1, 0.5),
+                                       (0.75, 1), (0.25, 1), (0, 0.5)], 0.25),
+]}
+
+def get_node_shape(name) -> NodeShape:
+    """Form aus der Registry, unbekannte Namen fallen auf Rechteck zurück."""
+    return NODE_SHAPES.get(name, NODE_SHAPES["rect"])
+
+@functools.lru_cache(maxsize=1024)
+def shape_paths(name, w, h):
+    """
+    Liefert (Umriss, obere Hälfte, untere Hälfte) für Form und Größe.
+    Die Pfade werden von allen Nodes gleicher Größe geteilt – nicht verändern!
+    """
+    path = get_node_shape(name).build_path(w, h)
+    upper = QPainterPath(); upper.addRect(QRectF(0, 0, w, h / 2))
+    lower = QPainterPath(); lower.addRect(QRectF(0, h / 2, w, h / 2))
+    return path, path.intersected(upper), path.intersected(lower)
+
+def paint_two_color_shape(painter, name, rect, color1, color2, pen):
+    """Zeichnet eine zweifarbige Form (oben color1, unten color2) in rect."""
+    path, upper, lower = shape_paths(name, rect.width(), rect.height())
+    painter.save()
+    painter.translate(rect.topLeft())
+    painter.fillPath(upper, QBrush(color1))
+    painter.fillPath(lower, QBrush(color2))
+    painter.strokePath(path, pen)
+    painter.restore()
+
+# Detailstufen (Level of Detail) beim Zeichnen
+DETAIL_SIMPLE  = 0   # Nodes als Fläche, Edges als einfache Linie
+DETAIL_NO_TEXT = 1   # volle Formen, aber keine Texte/Labels
+DETAIL_FULL    = 2   # alles
+
+# Standard-Schwellen (Zoomfaktor), ab denen die Stufe gilt
+DEFAULT_LOD_LEVELS = {"text": 0.4, "simple": 0.2}
+
+def item_detail_level(item, painter):
+    """Detailstufe für item beim aktuellen Painter-Transform."""
+    scene = item.scene()
+    if scene is None or not hasattr(scene, 'detail_level'):
+        return DETAIL_FULL
+    return scene.detail_level(painter)
+
+class DetailTextItem(QGraphicsTextItem):
+    """Text-Item, das unterhalb der Text-Detailstufe nicht gezeichnet wird."""
+    def paint(self, painter, option, widget=None):
+        if item_detail_level(self, painter) < DETAIL_FULL:
+            return
+        super().paint(painter, option, widget)
+
 class NodeItem(QGraphicsRectItem):
     def __init__(self,
                 shape="rect",
@@ -63,13 +162,14 @@ class NodeItem(QGraphicsRectItem):
         self.setPen(self._pen)
         self.setFlags(
             QGraphicsRectItem.ItemIsSelectable |
-            QGraphicsRectItem.ItemIsMovable
+            QGraphicsRectItem.ItemIsMovable |
+            QGraphicsRectItem.ItemSendsGeometryChanges
         )
 
         # Texte
-        self.text_item1 = QGraphicsTextItem(self.text1, self)
-        self.text_item2 = QGraphicsTextItem(self.text2, self)
-        self.text_item3 = QGraphicsTextItem(self.text3, self)
+        self.text_item1 = DetailTextItem(self.text1, self)
+        self.text_item2 = DetailTextItem(self.text2, self)
+        self.text_item3 = DetailTextItem(self.text3, self)
         for txt in (self.text_item1, self.text_item2, getattr(self, 'text_item3', None)):
             if not txt:
                 continue
@@ -107,6 +207,9 @@ class NodeItem(QGraphicsRectItem):
         self.text_item2.setFont(f2)
         self.text_item3.setFont(f2)
 
+        # Textfarben einmalig setzen – danach nur bei Farbänderung
+        self._update_text_colors()
+
         
     def _update_layout(self):
         """Zentraler Aufruf nach jeder Text-/Größenänderung."""
@@ -145,6 +248,7 @@ class NodeItem(QGraphicsRectItem):
         # ── 3) Szene informieren & Rect setzen ─────────────────────
         self.prepareGeometryChange()
         self.setRect(QRectF(0, 0, new_w, new_h))
+        self._notify_edges()
 
         # ── 4) Texte neu positionieren ─────────────────────────────
         self.center_texts()
@@ -202,64 +306,16 @@ class NodeItem(QGraphicsRectItem):
         # ── ganz oben: hole das Rechteck des Nodes ────────────────
         r = self.rect()
 
-        # 1) Pfad für die Form erzeugen
-        path = QPainterPath()
-        if self.node_shape == "rect":
-            path.addRect(r)
-        elif self.node_shape == "ellipse":
-            path.addEllipse(r)
-        elif self.node_shape == "diamond":
-            pts = [
-                QPointF(r.x() + r.width()/2, r.y()),
-                QPointF(r.x() + r.width(),    r.y() + r.height()/2),
-                QPointF(r.x() + r.width()/2, r.y() + r.height()),
-                QPointF(r.x(),                r.y() + r.height()/2),
-            ]
-            path.addPolygon(QPolygonF(pts))
-        elif self.node_shape == "triangle":
-            pts = [
-                QPointF(r.x() + r.width()/2, r.y()),
-                QPointF(r.x() + r.width(),    r.y() + r.height()),
-                QPointF(r.x(),                r.y() + r.height()),
-            ]
-            path.addPolygon(QPolygonF(pts))
-        elif self.node_shape == "hexagon":
-            w, h, x, y = r.width(), r.height(), r.x(), r.y()
-            pts = [
-                QPointF(x + w*0.25, y),
-                QPointF(x + w*0.75, y),
-                QPointF(x + w,      y + h/2),
-                QPointF(x + w*0.75, y + h),
-                QPointF(x + w*0.25, y + h),
-                QPointF(x,          y + h/2),
-            ]
-            path.addPolygon(QPolygonF(pts))
-
-        # 2) obere Hälfte füllen
-        painter.save()
-        painter.setBrush(QBrush(self.color1))
-        painter.setPen(self.pen())
-        painter.setClipRect(QRectF(r.x(), r.y(), r.width(), r.height()/2))
-        painter.drawPath(path)
-        painter.restore()
-
-        # 3) untere Hälfte füllen
-        painter.save()
-        painter.setBrush(QBrush(self.color2))
-        painter.setPen(self.pen())
-        painter.setClipRect(QRectF(r.x(),
-                                  r.y() + r.height()/2,
-                                  r.width(),
-                                  r.height()/2))
-        painter.drawPath(path)
-        painter.restore()
+        # 0) Weit herausgezoomt: nur flache Fläche
+        if item_detail_level(self, painter) == DETAIL_SIMPLE:
+            painter.fillRect(r, self.color1)
+            return
 
-        # 4) Outline zeichnen
-        painter.setPen(self.pen())
-        painter.drawPath(path)
+        # 1)–4) Gecachte Pfade aus der Form-Registry: zwei Füllungen + Umriss
+        paint_two_color_shape(painter, self.node_shape, r,
+                              self.color1, self.color2, self.pen())
 
-        # 5) Texte layouten
-        self._update_text_colors()
+        # 5) Textfarben werden in set_colors() gesetzt, nicht pro Frame
 
     def contextMenuEvent(self, event):
         menu = QMenu()
@@ -286,25 +342,14 @@ class NodeItem(QGraphicsRectItem):
                 )
                 if not col2.isValid():
                     col2 = col1
-                self.color1, self.color2 = col1, col2
-
-                # Hier den korrekten Aufruf:
-                self._update_text_colors()
-                self.update()
-                if hasattr(scene, 'parent'):
-                    scene.parent.update_table()
+                self.set_colors(col1, col2)
+                scene.notify_item_changed(self)
             
         elif action == change_shape and scene:
             # 1) Liste der Anzeigenamen
-            names = ["Rechteck", "Ellipse", "Raute", "Dreieck", "Hexagon"]
+            names = [shape.label for shape in NODE_SHAPES.values()]
             # 2) Aktuellen Index ermitteln
-            current = {
-                "rect":     "Rechteck",
-                "ellipse":  "Ellipse",
-                "diamond":  "Raute",
-                "triangle": "Dreieck",
-                "hexagon":  "Hexagon"
-            }[self.node_shape]
+            current = get_node_shape(self.node_shape).label
             idx = names.index(current)
 
             # 3) Dialog öffnen
@@ -320,28 +365,16 @@ class NodeItem(QGraphicsRectItem):
                 return
 
             # 4) Mapping auf internen Wert
-            mapping = {
-                "Rechteck": "rect",
-                "Ellipse":  "ellipse",
-                "Raute":    "diamond",
-                "Dreieck":  "triangle",
-                "Hexagon":  "hexagon"
-            }
+            mapping = {shape.label: shape.name for shape in NODE_SHAPES.values()}
             self.node_shape = mapping[choice]
-            
-            self.prepareGeometryChange()
-            self.adjustSize()
-            self._position_texts()
 
             # 5) Größe/Muster neu anpassen und neu zeichnen
-            self._adjust_size()
-            # (falls du _position_texts nutzt)
-            self._position_texts()
+            self.prepareGeometryChange()
+            scene.request_layout(self)
             self.update()  # QGraphicsItem neu malen
 
             # 6) Tabelle aktualisieren
-            if hasattr(scene, 'parent'):
-                scene.parent.update_table()
+            scene.notify_item_changed(self)
         elif action == connect_node and scene:
             scene.connecting = True
             scene.connect_source = self
@@ -384,30 +417,31 @@ class NodeItem(QGraphicsRectItem):
             self.text_item1.setPlainText(text1)
             self.text_item2.setPlainText(text2)
             self.text_item3.setPlainText(text3)
-            
-            self.prepareGeometryChange()
-            self.adjustSize()
-            self._position_texts()
 
-            self._update_layout()
-            if scene.parent:
-                scene.parent.update_table()
+            self.prepareGeometryChange()
+            scene.request_layout(self)
+            scene.notify_item_changed(self)
               
         elif action == delete_node and scene:
-            for edge in list(scene.items()):
-                if isinstance(edge, EdgeItem) and (edge.source == self or edge.dest == self):
-                    scene.removeItem(edge)
-                    if edge in scene.edges:
-                        scene.edges.remove(edge)
-            scene.removeItem(self)
-            if self in scene.nodes:
-                scene.nodes.remove(self)
-            if hasattr(scene, 'parent'):
-                scene.parent.update_table()
+            # Kanten über den Adjazenz-Index entfernen – O(Grad),
+            # die Tabelle folgt zeilenweise
+            scene.remove_node(self)
         else:
             super().contextMenuEvent(event)
         
         
+    def set_colors(self, color1, color2):
+        """Setzt beide Füllfarben und invalidiert Textfarben & Item-Cache."""
+        self.color1, self.color2 = QColor(color1), QColor(color2)
+        self._update_text_colors()
+        self.update()
+
+    def apply_cache_mode(self, mode):
+        """Cache-Modus für den Node und seine drei Text-Items setzen."""
+        self.setCacheMode(mode)
+        for txt in (self.text_item1, self.text_item2, self.text_item3):
+            txt.setCacheMode(mode)
+
     def _update_text_colors(self):
         """Zeile 1 kontrastiert mit color1, Zeile 2+3 mit color2."""
         fg1 = Qt.white if is_color_dark(self.color1) else Qt.black
@@ -419,13 +453,34 @@ class NodeItem(QGraphicsRectItem):
     def itemChange(self, change, value):
         # Vor jeder Positionsänderung snappen wir auf das Raster
         if change == QGraphicsItem.ItemPositionChange and self.scene():
-            gridSize = 40  # muss exakt mit Deinem Gitter-Abstand übereinstimmen
+            # Rastergröße der ersten View, sonst Standard 40
+            views = self.scene().views()
+            gridSize = getattr(views[0], 'grid_size', 40) if views else 40
             # value ist schon ein QPointF
             newPos = value
             x = round(newPos.x() / gridSize) * gridSize
             y = round(newPos.y() / gridSize) * gridSize
             return QPointF(x, y)
+        if change == QGraphicsItem.ItemPositionHasChanged:
+            # Nur jetzt müssen die angeschlossenen Kanten neu berechnet werden
+            self._notify_edges()
+            scene = self.scene()
+            if hasattr(scene, 'notify_item_moved'):
+                scene.notify_item_moved(self)
+        if change == QGraphicsItem.ItemSelectedHasChanged:
+            # Gecachtes Bild verwerfen, falls Auswahl anders dargestellt wird
+            self.update()
         return super().itemChange(change, value)
+
+    def _notify_edges(self):
+        """Invalidiert die gecachte Geometrie aller Kanten an diesem Node."""
+        scene = self.scene()
+        if scene is None or not hasattr(scene, 'edges_of'):
+            return
+        # Erst das Hindernis nachführen, dann die eigenen Edges neu führen
+        scene.router.node_changed(self)
+        for edge in scene.edges_of(self):
+            edge.invalidate_geometry()
     
     def mouseReleaseEvent(self, event):
         super().mouseReleaseEvent(event)
@@ -448,20 +503,8 @@ class NodeItem(QGraphicsRectItem):
         w, h = r.width(), r.height()
         x, y = r.x(), r.y()
 
-        inset = 0.0
-        if self.node_shape == "diamond":
-            # Raute: Breite in der Mitte ist w/2
-            inset = w * 0.25
-        elif self.node_shape == "triangle":
-            # Gleichschenkliges Dreieck: Basisbreite w,
-            # obere Spitze nicht relevant, wir nutzen z.B. w*0.1 inset
-            inset = w * 0.1
-        elif self.node_shape == "hexagon":
-            # Hexagon: die schmaleren Seitenbereiche je w*0.25
-            inset = w * 0.25
-        else:
-            # Rechteck & Ellipse: kein Inset
-            inset = 0
+        # Inset je Form steht in der Registry (Raute/Hexagon 25 %, Dreieck 10 %)
+        inset = w * get_node_shape(self.node_shape).content_inset
 
         # Text darf dann in x+inset .. x+w-inset stehen,
         # und in y .. y+h (oder unten je nach Zeile)
@@ -530,9 +573,12 @@ class EdgeItem(QGraphicsLineItem):
         self.color2       = QColor(color2)
         self.dash_pattern = dash_pattern
         self.pen_width    = 2.0
+        self.label_text   = label_text
+        self.arrow        = "-"
+        self.route        = None    # Knickpunkte (Szene) beim rechtwinkligen Routing
 
         # Label-TextItem (Zeichnung übernehmen wir selbst)
-        self.text_item = QGraphicsTextItem(label_text, self)
+        self.text_item = DetailTextItem(label_text, self)
         self.text_item.setDefaultTextColor(Qt.black)
 
         # **Keinen** initialen Pen setzen – wir malen komplett selbst
@@ -541,42 +587,110 @@ class EdgeItem(QGraphicsLineItem):
         # Reihenfolge: Linie immer *unter* den Nodes, Text darüber
         self.setZValue(0)
         self.text_item.setZValue(1)
-    def paint(self, painter, option, widget=None):
-        # 1) Position der Endpunkte updaten
+
+        # Gecachte Trefferfläche (shape) – wird in update_position() verworfen
+        self._shape_path = None
+        # Gecachte Strich-Pfade (Farbe 1 / Farbe 2), Schlüssel: Linie + Muster
+        self._dash_key   = None
+        self._dash_paths = (QPainterPath(), QPainterPath())
+
+        # Endpunkte & Label einmalig berechnen; danach nur noch,
+        # wenn ein angeschlossener Node verschoben/vergrößert wird
         self.update_position()
 
-        # 2) Basis-Linie und Länge
+    def invalidate_geometry(self):
+        """Wird vom Node gerufen, wenn sich Position oder Größe ändert."""
+        router = getattr(self.scene(), 'router', None)
+        if router is not None and router.enabled:
+            router.route(self)
+        self.update_position()
+
+    def points(self):
+        """Linienzug der Edge: Route oder die gerade Linie."""
+        if self.route:
+            return self.route
         line = self.line()
-        length = line.length()
-        if length <= 0:
+        return [line.p1(), line.p2()]
+
+    def boundingRect(self):
+        # Trefferfläche inkl. Linienbreite, damit auch waagrechte/senkrechte
+        # Linien vollständig neu gezeichnet werden
+        return self.shape().boundingRect()
+
+    def paint(self, painter, option, widget=None):
+        # 1) Geometrie ist gecacht – hier wird nur noch gezeichnet
+
+        # 2) Basis-Linie und Länge
+        if self.line().length() <= 0 and not self.route:
             return
 
-        # 3) Dash-Pattern entpacken
-        dash, gap = self.dash_pattern
+        # Weit herausgezoomt: eine durchgezogene Linie statt Strich-Segmente
+        if item_detail_level(self, painter) == DETAIL_SIMPLE:
+            painter.setPen(QPen(self.color1, self.pen_width, Qt.SolidLine))
+            painter.drawPolyline(QPolygonF(self.points()))
+            return
 
-        # 4) Abwechselnd farbige Segmente zeichnen
-        pos = 0.0
-        toggle = False
-        while pos < length:
-            start_pt = line.pointAt(pos / length)
-            end_pos = min(pos + dash, length)
-            end_pt = line.pointAt(end_pos / length)
-
-            pen = QPen(
-                self.color1 if not toggle else self.color2,
-                self.pen_width
-            )
-            pen.setStyle(Qt.SolidLine)
-            painter.setPen(pen)
-            painter.drawLine(QLineF(start_pt, end_pt))
+        # 3) Segmente je Farbe aus dem Cache holen
+        path1, path2 = self.dash_paths()
 
-            pos += dash + gap
-            toggle = not toggle
+        # 4) Zwei Draw-Calls statt einem pro Segment
+        painter.setBrush(Qt.NoBrush)
+        painter.setPen(QPen(self.color1, self.pen_width, Qt.SolidLine))
+        painter.drawPath(path1)
+        if not path2.isEmpty():
+            painter.setPen(QPen(self.color2, self.pen_width, Qt.SolidLine))
+            painter.drawPath(path2)
 
-        # 5) Label-Text (bereits als QGraphicsTextItem child angelegt)
-        #    Position wurde in update_position() festgelegt,
-        #    hier reicht es, ihn zu zeichnen:
-        self.text_item.paint(painter, option, widget)
+        # 5) Label-Text ist ein Child-Item und zeichnet sich selbst,
+        #    Position wurde in update_position() festgelegt
+
+    def dash_paths(self):
+        """
+        Liefert (Pfad Farbe 1, Pfad Farbe 2) mit allen Strich-Segmenten
+        entlang des Linienzugs (Striche laufen um Knicke herum).
+        Wird nur neu aufgebaut, wenn sich Linie oder dash_pattern ändern.
+        """
+        points = self.points()
+        key = (tuple((p.x(), p.y()) for p in points), tuple(self.dash_pattern))
+        if key == self._dash_key:
+            return self._dash_paths
+
+        path1, path2 = QPainterPath(), QPainterPath()
+        segments = [QLineF(a, b) for a, b in zip(points, points[1:])]
+        length = sum(seg.length() for seg in segments)
+        dash, gap = self.dash_pattern
+        if length > 0:
+            if dash <= 0 or dash + gap <= 0:
+                # Kein sinnvolles Muster → durchgezogen in Farbe 1
+                path1.addPolygon(QPolygonF(points))
+            else:
+                # Abwechselnd farbige Segmente; Strich-Anfang pos läuft
+                # über alle Teilstrecken weiter
+                pos = 0.0
+                toggle = False
+                start = 0.0         # Anfang der aktuellen Teilstrecke
+                idx = 0
+                while pos < length:
+                    end_pos = min(pos + dash, length)
+                    path = path2 if toggle else path1
+                    while start + segments[idx].length() < pos:
+                        start += segments[idx].length()
+                        idx += 1
+                    seg = segments[idx]
+                    path.moveTo(seg.pointAt((pos - start) / (seg.length() or 1)))
+                    s_start, k = start, idx
+                    while s_start + segments[k].length() < end_pos:
+                        s_start += segments[k].length()
+                        k += 1
+                        path.lineTo(segments[k].p1())
+                    seg = segments[k]
+                    path.lineTo(seg.pointAt((end_pos - s_start) / (seg.length() or 1)))
+                    pos += dash + gap
+                    toggle = not toggle
+
+        self._dash_key   = key
+        self._dash_paths = (path1, path2)
+        return self._dash_paths
 
     def update_position(self):
         rect1 = self.source.sceneBoundingRect()
@@ -599,83 +713,36 @@ class EdgeItem(QGraphicsLineItem):
                     return pt
             return rect.center()
 
-        p1 = find_border_point(rect1, base_line)
-        # Für das Ziel die Linie umdrehen
-        rev_line = QLineF(center2, center1)
-        p2 = find_border_point(rect2, rev_line)
+        if self.route:
+            # Rechtwinklig geführt: Route endet schon am Node-Rand
+            p1, p2 = self.route[0], self.route[-1]
+        else:
+            p1 = find_border_point(rect1, base_line)
+            # Für das Ziel die Linie umdrehen
+            rev_line = QLineF(center2, center1)
+            p2 = find_border_point(rect2, rev_line)
 
+        # Trefferfläche hängt am ganzen Linienzug, nicht nur an line()
+        self.prepareGeometryChange()
         self.setLine(p1.x(), p1.y(), p2.x(), p2.y())
+        self._shape_path = None
 
-        # Label mittig positionieren
-        mid = QLineF(p1, p2).pointAt(0.5)
+        # Label mittig positionieren (halbe Länge des Linienzugs)
+        mid = self._midpoint()
         rect_text = self.text_item.boundingRect()
         self.text_item.setPos(
             mid.x() - rect_text.width()/2,
             mid.y() - 10 - rect_text.height()/2
         )
 
-        def paint(self, painter, option, widget):
-            print("Painting edge:", self.source.text1, "→", self.dest.text1)
-            self.update_position()
-            line = self.line()
-            # 1) Pfad für die gewünschte Form erzeugen
-            path = QPainterPath()
-            if self.shape == "rect":
-                path.addRect(r)
-            elif self.shape == "ellipse":
-                path.addEllipse(r)
-            elif self.shape == "diamond":
-                pts = [
-                    QPointF(r.x() + r.width()/2, r.y()),
-                    QPointF(r.x() + r.width(),    r.y() + r.height()/2),
-                    QPointF(r.x() + r.width()/2, r.y() + r.height()),
-                    QPointF(r.x(),                r.y() + r.height()/2),
-                ]
-                path.addPolygon(QPolygonF(pts))
-            elif self.shape == "triangle":
-                pts = [
-                    QPointF(r.x() + r.width()/2, r.y()),
-                    QPointF(r.x() + r.width(),    r.y() + r.height()),
-                    QPointF(r.x(),                r.y() + r.height()),
-                ]
-                path.addPolygon(QPolygonF(pts))
-            elif self.shape == "hexagon":
-                w, h, x, y = r.width(), r.height(), r.x(), r.y()
-                pts = [
-                    QPointF(x + w*0.25, y),
-                    QPointF(x + w*0.75, y),
-                    QPointF(x + w,      y + h/2),
-                    QPointF(x + w*0.75, y + h),
-                    QPointF(x + w*0.25, y + h),
-                    QPointF(x,          y + h/2),
-                ]
-                path.addPolygon(QPolygonF(pts))
-
-            # 2) obere Hälfte füllen
-            painter.save()
-            painter.setBrush(QBrush(self.color1))
-            painter.setPen(self.pen())
-            painter.setClipRect(QRectF(r.x(), r.y(), r.width(), r.height()/2))
-            painter.drawPath(path)
-            painter.restore()
-
-            # 3) untere Hälfte füllen
-            painter.save()
-            painter.setBrush(QBrush(self.color2))
-            painter.setPen(self.pen())
-            painter.setClipRect(QRectF(r.x(),
-                                      r.y() + r.height()/2,
-                                      r.width(),
-                                      r.height()/2))
-            painter.drawPath(path)
-            painter.restore()
-
-            # 4) Outline zeichnen
-            painter.setPen(self.pen())
-            painter.drawPath(path)
-
-            # 5) Texte korrekt positionieren
-            self._position_texts()
+    def _midpoint(self):
+        segments = [QLineF(a, b) for a, b in zip(self.points(), self.points()[1:])]
+        half = sum(seg.length() for seg in segments) / 2
+        for seg in segments:
+            if seg.length() >= half and seg.length() > 0:
+                return seg.pointAt(half / seg.length())
+            half -= seg.length()
+        return self.line().pointAt(0.5)
 
     def contextMenuEvent(self, event):
         menu = QMenu()
@@ -686,52 +753,434 @@ class EdgeItem(QGraphicsLineItem):
         scene = self.scene()
         if action == change_color and scene:
             # Farbdialog öffnen, Startfarbe ist aktuelle Linienfarbe
-            col = QColorDialog.getColor(self.pen.color())
+            col = QColorDialog.getColor(self.color1)
             if col.isValid():
-                self.pen.setColor(col)
-                self.setPen(self.pen)
-                # Tabelle updaten, falls vorhanden
-                if hasattr(scene, 'parent'):
-                    scene.parent.update_table()
+                self.color1 = QColor(col)
+                self.update()
+                # Tabelle updaten (nur diese Zeile)
+                scene.notify_item_changed(self)
         elif action == edit_label and scene:
             text, ok = QInputDialog.getText(None, "Verbindungstext", "Text für Verbindung:", text=self.label_text)
             if ok:
                 self.label_text = text
                 self.text_item.setPlainText(text)
                 self.update_position()
-                if hasattr(scene, 'parent'):
-                    scene.parent.update_table()
+                scene.notify_item_changed(self)
         elif action == delete_edge and scene:
-            scene.removeItem(self)
-            if self in scene.edges:
-                scene.edges.remove(self)
-            if hasattr(scene, 'parent'):
-                scene.parent.update_table()
+            scene.remove_edge(self)
     
     def shape(self):
         """Erweitert die „treffbare“ Fläche auf ±5px um die Linie."""
-        # 1) Erzeuge den Basis-Pfad der Linie
+        if self._shape_path is not None:
+            return self._shape_path
+        # 1) Erzeuge den Basis-Pfad des Linienzugs
         path = QPainterPath()
-        line = self.line()
-        path.moveTo(line.p1())
-        path.lineTo(line.p2())
+        path.addPolygon(QPolygonF(self.points()))
 
         # 2) Erzeuge einen Stroker mit breiterem Bereich
         stroker = QPainterPathStroker()
         stroker.setWidth(self.pen_width + 10)  # +10px = ±5px um die Linie
-        # 3) Gib die „Hit“-Form zurück
-        return stroker.createStroke(path)
+        # 3) „Hit“-Form cachen, bis sich Linie oder Breite ändern
+        self._shape_path = stroker.createStroke(path)
+        return self._shape_path
+
+    def _set_pen_width(self, width):
+        # Breite fließt in shape()/boundingRect() ein → Cache verwerfen
+        self.prepareGeometryChange()
+        self.pen_width = width
+        self._shape_path = None
+        self.update()
         
     def hoverEnterEvent(self, event):
-        self.pen_width += 1
-        self.update()
+        self._set_pen_width(self.pen_width + 1)
         super().hoverEnterEvent(event)
 
     def hoverLeaveEvent(self, event):
-        self.pen_width -= 1
-        self.update()
+        self._set_pen_width(self.pen_width - 1)
         super().hoverLeaveEvent(event)
 
+# Item-Cache-Modi für NodeItem (Einstellung pro Dokument)
+NODE_CACHE_MODES = {
+    "none":   QGraphicsItem.NoCache,
+    "device": QGraphicsItem.DeviceCoordinateCache,
+    "item":   QGraphicsItem.ItemCoordinateCache,
+}
+
+# ── Orthogonales Routing ───────────────────────────────────────
+EDGE_ROUTING_MODES = {
+    "straight":   "Linien: Gerade",
+    "orthogonal": "Linien: Rechtwinklig",
+}
+ROUTE_BEND_COST  = 2        # ein Knick kostet so viel wie zwei Rasterschritte
+ROUTE_MARGIN     = 6        # Suchfenster: Rasterpunkte um Start/Ziel herum
+ROUTE_EXPAND_PER_STEP = 20 # A*-Budget je Rasterschritt Abstand Start–Ziel …
+ROUTE_MAX_EXPAND = 5000     # … höchstens so viele; danach gerade Linie statt Route
+ROUTE_SLICE_MS   = 25       # Rechenzeit je Durchlauf der Ereignisschleife
+ROUTE_HASH_CELL  = 400      # Zellgröße der räumlichen Hashes (px)
+
+class SpatialHash:
+    """Items mit Rechtecken in Zellen fester Größe – schnelle Bereichsabfragen."""
+    def __init__(self, cell=ROUTE_HASH_CELL):
+        self.cell   = cell
+        self._cells = {}        # (cx, cy) → set(Items)
+        self._keys  = {}        # Item → Zellen
+
+    def _span(self, rect):
+        c = self.cell
+        x0, x1 = math.floor(rect.left() / c), math.floor(rect.right() / c)
+        y0, y1 = math.floor(rect.top() / c), math.floor(rect.bottom() / c)
+        return [(cx, cy) for cx in range(x0, x1 + 1) for cy in range(y0, y1 + 1)]
+
+    def insert(self, item, rects):
+        """item (neu) unter allen Zellen der rects eintragen."""
+        self.remove(item)
+        keys = {key for rect in rects for key in self._span(rect)}
+        for key in keys:
+            self._cells.setdefault(key, set()).add(item)
+        self._keys[item] = keys
+
+    def remove(self, item):
+        for key in self._keys.pop(item, ()):
+            bucket = self._cells[key]
+            bucket.discard(item)
+            if not bucket:
+                del self._cells[key]
+
+    def query(self, rect):
+        """Alle Items aus den Zellen, die rect berührt (grob, ohne Feinprüfung)."""
+        found = set()
+        for key in self._span(rect):
+            found.update(self._cells.get(key, ()))
+        return found
+
+    def clear(self):
+        self._cells.clear()
+        self._keys.clear()
+
+_GRID_DIRS = ((1, 0), (0, 1), (-1, 0), (0, -1))
+
+def astar_grid(start, goal, blocked, bounds,
+               bend_cost=ROUTE_BEND_COST, max_expand=ROUTE_MAX_EXPAND):
+    """
+    Kürzester rechtwinkliger Weg über Rasterpunkte (i, j) von start nach
+    goal innerhalb bounds = (i0, j0, i1, j1), ohne die Punkte in blocked.
+    Zustand ist Punkt + Richtung, damit Knicke bestraft werden können.
+    Liefert die Punktliste, [] wenn max_expand erschöpft ist, oder None,
+    wenn es im Fenster keinen Weg gibt.
+    """
+    i0, j0, i1, j1 = bounds
+    gi, gj = goal
+    start_state = (start[0], start[1], -1)
+    best = {start_state: 0}
+    prev = {}
+    # Bei gleicher Schätzung zuerst den weiter gekommenen Zustand (-Kosten):
+    # sonst läuft die Suche über alle gleich guten Umwege in die Breite
+    heap = [(abs(start[0] - gi) + abs(start[1] - gj), 0, start_state)]
+    expanded = 0
+    while heap:
+        _, cost, state = heapq.heappop(heap)
+        cost = -cost
+        i, j, d = state
+        if (i, j) == goal:
+            cells = []
+            while state is not None:
+                cells.append(state[:2])
+                state = prev.get(state)
+            return cells[::-1]
+        if cost > best[state]:
+            continue
+        expanded += 1
+        if expanded > max_expand:
+            return []
+        for nd, (di, dj) in enumerate(_GRID_DIRS):
+            if d >= 0 and nd == (d + 2) % 4:
+                continue        # nicht umkehren
+            ni, nj = i + di, j + dj
+            if not (i0 <= ni <= i1 and j0 <= nj <= j1) or (ni, nj) in blocked:
+                continue
+            step = cost + 1 + (bend_cost if 0 <= d != nd else 0)
+            key = (ni, nj, nd)
+            if step < best.get(key, math.inf):
+                best[key] = step
+                prev[key] = state
+                heapq.heappush(heap, (step + abs(ni - gi) + abs(nj - gj), -step, key))
+    return None
+
+def _clip_route_start(points, rect):
+    """Schneidet den Anfang der Route am Rand von rect ab (Teil im Node fällt weg)."""
+    for k in range(1, len(points)):
+        if rect.contains(points[k]):
+            continue
+        line = QLineF(points[k - 1], points[k])
+        for side in (QLineF(rect.topLeft(), rect.topRight()),
+                     QLineF(rect.topRight(), rect.bottomRight()),
+                     QLineF(rect.bottomRight(), rect.bottomLeft()),
+                     QLineF(rect.bottomLeft(), rect.topLeft())):
+            pt = QPointF()
+            if line.intersect(side, pt) == QLineF.BoundedIntersection:
+                return [pt] + points[k:]
+        return points[k - 1:]
+    return None
+
+def _simplify_route(points):
+    """Doppelte und gerade durchlaufene Zwischenpunkte entfernen."""
+    result = []
+    for pt in points:
+        if result and pt == result[-1]:
+            continue
+        if len(result) >= 2:
+            a, b = result[-2], result[-1]
+            if (a.x() == b.x() == pt.x()) or (a.y() == b.y() == pt.y()):
+                result[-1] = pt
+                continue
+        result.append(pt)
+    return result
+
+class EdgeRouter(QObject):
+    """
+    Rechtwinklige Linienführung um Nodes herum: A* über die Rasterpunkte,
+    auf die NodeItem.itemChange einrastet. Routen werden je Edge mit den
+    Endpunkt-Rechtecken als Schlüssel gecacht; die Korridore stehen in
+    einem räumlichen Hash. Beim Verschieben eines Nodes werden seine
+    Edges sofort neu geführt, andere nur, wenn ihre Route den alten oder
+    neuen Platz des Nodes berührt – gesammelt im nächsten Durchlauf der
+    Ereignisschleife bzw. am Ende des Batches.
+    """
+    def __init__(self, scene):
+        super().__init__(scene)
+        self.scene      = scene
+        self.enabled    = False
+        self._obstacles = SpatialHash()
+        self._corridors = SpatialHash()
+        self._rects     = {}        # Node → Rechteck im Hindernis-Hash
+        self._routes    = {}        # Edge → (Schlüssel, Punkte oder None)
+        self._pending   = {}        # Edges für flush() (geordnet)
+        self._stale     = {}        # Nodes, deren Rechteck nachzutragen ist
+        self._timer     = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(lambda: self.flush(ROUTE_SLICE_MS))
+
+    def grid(self):
+        views = self.scene.views()
+        return getattr(views[0], 'grid_size', 40) if views else 40
+
+    def set_enabled(self, enabled):
+        if enabled == self.enabled:
+            return
+        self.enabled = enabled
+        if enabled:
+            self.scene.add_change_listener(self._on_change)
+            self._stale = dict.fromkeys(self.scene.nodes)
+            self.reroute_all()
+            return
+        self.scene.remove_change_listener(self._on_change)
+        self._timer.stop()
+        self._reset()
+        for edge in self.scene.edges:
+            edge.route = None
+            edge.update_position()
+
+    def _reset(self):
+        self._obstacles.clear()
+        self._corridors.clear()
+        self._rects.clear()
+        self._routes.clear()
+        self._pending.clear()
+        self._stale.clear()
+
+    def reroute_all(self):
+        """
+        Alle Routen verwerfen und neu führen (z. B. nach Rasteränderung) –
+        in Zeitscheiben, die Oberfläche bleibt bedienbar.
+        """
+        if not self.enabled:
+            return
+        self._routes.clear()
+        self._pending = dict.fromkeys(self.scene.edges)
+        self._schedule()
+
+    # ── Änderungen der Szene ───────────────────────────────
+    def _on_change(self, kind, item=None):
+        if kind == "node_added":
+            self._stale[item] = None
+            self._schedule()
+        elif kind == "node_removed":
+            rect = self._rects.pop(item, None)
+            self._obstacles.remove(item)
+            self._stale.pop(item, None)
+            if rect is not None:
+                self._touch(rect)       # frei gewordener Platz
+        elif kind == "edge_added":
+            self._pending[item] = None
+            self._schedule()
+        elif kind == "edge_removed":
+            self._routes.pop(item, None)
+            self._pending.pop(item, None)
+            self._corridors.remove(item)
+        elif kind == "diagram_cleared":
+            self._timer.stop()
+            self._reset()
+
+    def node_changed(self, node):
+        """Von NodeItem._notify_edges: Position oder Größe hat sich geändert."""
+        if not self.enabled:
+            return
+        if self.scene.in_batch():
+            self._stale[node] = None
+        else:
+            self._set_obstacle(node)
+
+    def _set_obstacle(self, node):
+        old, new = self._rects.get(node), node.sceneBoundingRect()
+        if old == new:
+            return
+        self._rects[node] = new
+        self._obstacles.insert(node, (new,))
+        for rect in (old, new):
+            if rect is not None:
+                self._touch(rect, node)
+
+    def _touch(self, rect, node=None):
+        """Edges, deren Route durch rect führt, zum Neu-Führen vormerken."""
+        m = self.grid() / 2
+        area = rect.adjusted(-m, -m, m, m)
+        for edge in self._corridors.query(area):
+            if node is not None and node in (edge.source, edge.dest):
+                continue        # wird über invalidate_geometry sofort geführt
+            points = self._routes.get(edge, (None, None))[1]
+            if points and any(QRectF(a, b).normalized().adjusted(-1, -1, 1, 1).intersects(area)
+                              for a, b in zip(points, points[1:])):
+                self._routes.pop(edge, None)
+                self._pending[edge] = None
+        if self._pending:
+            self._schedule()
+
+    def _schedule(self):
+        if not self.scene.in_batch() and not self._timer.isActive():
+            self._timer.start(0)
+
+    # ── Routen ─────────────────────────────────────────────
+    def route(self, edge):
+        """Endpunkte von edge haben sich geändert: jetzt (im Batch: später) führen."""
+        if self.scene.in_batch():
+            self._pending[edge] = None
+        else:
+            self._route(edge)
+
+    def flush(self, budget_ms=None):
+        """
+        Vorgemerkte Hindernisse und Routen nachtragen. Mit budget_ms nur
+        so lange; der Rest folgt im nächsten Durchlauf der Ereignisschleife.
+        """
+        self._timer.stop()
+        if not self.enabled or self.scene.in_batch():
+            return
+        stale, self._stale = self._stale, {}
+        for node in stale:
+            if node.scene() is self.scene:
+                self._set_obstacle(node)
+        deadline = None if budget_ms is None else time.perf_counter() + budget_ms / 1000.0
+        while self._pending:
+            if deadline is not None and time.perf_counter() > deadline:
+                self._timer.start(0)
+                return
+            edge = next(iter(self._pending))
+            del self._pending[edge]
+            if edge.scene() is self.scene:
+                self._route(edge)
+                edge.update_position()
+
+    def _route(self, edge):
+        grid = self.grid()
+        r1, r2 = edge.source.sceneBoundingRect(), edge.dest.sceneBoundingRect()
+        key = (r1.getRect(), r2.getRect(), grid)
+        cached = self._routes.get(edge)
+        if cached is not None and cached[0] == key:
+            edge.route = cached[1]
+            return
+        points = self._find_route(edge, r1, r2, grid)
+        self._routes[edge] = (key, points)
+        edge.route = points
+        if points:
+            self._corridors.insert(edge, [QRectF(a, b).normalized()
+                                          for a, b in zip(points, points[1:])])
+        else:
+            self._corridors.remove(edge)
+
+    def _find_route(self, edge, r1, r2, grid):
+        if r1.intersects(r2):
+            return None
+        c1, c2 = r1.center(), r2.center()
+        start = (round(c1.x() / grid), round(c1.y() / grid))
+        goal  = (round(c2.x() / grid), round(c2.y() / grid))
+        if start == goal:
+            return None
+        # Budget nach Abstand: lange oder unlösbare Edges fallen früh auf
+        # die gerade Linie zurück, statt die Oberfläche aufzuhalten
+        distance = abs(start[0] - goal[0]) + abs(start[1] - goal[1])
+        budget = min(ROUTE_MAX_EXPAND, ROUTE_EXPAND_PER_STEP * (distance + 4 * ROUTE_MARGIN))
+        blocked = BlockedGrid(self, grid, (edge.source, edge.dest), (start, goal))
+        cells = None
+        for margin in (ROUTE_MARGIN, 4 * ROUTE_MARGIN):
+            bounds = (min(start[0], goal[0]) - margin, min(start[1], goal[1]) - margin,
+                      max(start[0], goal[0]) + margin, max(start[1], goal[1]) + margin)
+            cells = astar_grid(start, goal, blocked, bounds, max_expand=budget)
+            if cells is not None:
+                break       # Weg gefunden oder Budget erschöpft – breiter hilft nicht
+        if not cells:
+            return None
+        points = [c1] + [QPointF(i * grid, j * grid) for i, j in cells] + [c2]
+        points = _clip_route_start(points, r1)
+        if points:
+            points = _clip_route_start(points[::-1], r2)
+        if not points or len(points) < 2:
+            return None
+        return _simplify_route(points[::-1])
+
+    def _blocked(self, bounds, grid, skip, blocked):
+        """Rasterpunkte in bounds, die in einem Node (+ halbes Raster) liegen, zu blocked."""
+        i0, j0, i1, j1 = bounds
+        area = QRectF(i0 * grid, j0 * grid, (i1 - i0) * grid, (j1 - j0) * grid)
+        m = grid / 2
+        for node in self._obstacles.query(area):
+            if node in skip:
+                continue
+            r = self._rects[node]
+            ia = max(i0, math.floor((r.left() - m) / grid) + 1)
+            ib = min(i1, math.ceil((r.right() + m) / grid) - 1)
+            ja = max(j0, math.floor((r.top() - m) / grid) + 1)
+            jb = min(j1, math.ceil((r.bottom() + m) / grid) - 1)
+            for i in range(ia, ib + 1):
+                for j in range(ja, jb + 1):
+                    blocked.add((i, j))
+
+class BlockedGrid:
+    """
+    Gesperrte Rasterpunkte für eine Suche, blockweise erst gelesen, wenn
+    A* dorthin kommt – die Kosten folgen den besuchten Punkten, nicht der
+    Größe des Suchfensters.
+    """
+    BLOCK = 8   # Rasterpunkte je Blockkante
+
+    def __init__(self, router, grid, skip, free=()):
+        self._router = router
+        self._grid   = grid
+        self._skip   = skip
+        self._free   = set(free)    # Start/Ziel liegen im eigenen Node
+        self._cells  = set()
+        self._blocks = set()
+
+    def __contains__(self, cell):
+        if cell in self._free:
+            return False
+        block = (cell[0] // self.BLOCK, cell[1] // self.BLOCK)
+        if block not in self._blocks:
+            self._blocks.add(block)
+            i0, j0 = block[0] * self.BLOCK, block[1] * self.BLOCK
+            bounds = (i0, j0, i0 + self.BLOCK - 1, j0 + self.BLOCK - 1)
+            self._router._blocked(bounds, self._grid, self._skip, self._cells)
+        return cell in self._cells
+
 class DiagramScene(QGraphicsScene):
     def __init__(self):
         super().__init__()
@@ -741,16 +1190,244 @@ class DiagramScene(QGraphicsScene):
         self.connect_source = None
         self.parent = None
 
+# Bis zu so vielen Änderungen spielt batch() die Einzel-Signale nach und
+# lässt den BSP-Index an; darüber Index aus und ein bulk_changed
+BATCH_REPLAY_MAX = 256
+
 class DiagramScene(QGraphicsScene):
+    # Änderungs-Signale für Tabelle & Co. (ein Item pro Signal)
+    node_added       = pyqtSignal(object)
+    node_removed     = pyqtSignal(object)
+    edge_added       = pyqtSignal(object)
+    edge_removed     = pyqtSignal(object)
+    item_changed     = pyqtSignal(object)
+    diagram_cleared  = pyqtSignal()
+    bulk_changed     = pyqtSignal()          # nach batch(): alles neu lesen
+
     def __init__(self):
         super().__init__()
         # ─── ganz wichtig ──────────────────────────────
-        self.nodes       = []      # hier die Node-Liste
-        self.edges       = []      # hier die Edge-Liste
+        # dicts als geordnete Mengen: Reihenfolge bleibt (Tabelle, IDs),
+        # Einfügen/Entfernen/Enthalten kosten O(1)
+        self._nodes      = {}      # NodeItem → None
+        self._edges      = {}      # EdgeItem → None
+        self._adjacency  = {}      # NodeItem → set(EdgeItem)
+        self.node_cache  = "none"  # Dokument-Einstellung, siehe NODE_CACHE_MODES
+        self.lod_enabled = True    # Detailstufen beim Herauszoomen
+        self.lod_levels  = dict(DEFAULT_LOD_LEVELS)
+        # batch(): Verschachtelungstiefe, aufgeschobene Arbeit
+        self._batch_depth    = 0
+        self._batch_signals  = []      # (Signalname, Args) zum Nachspielen
+        self._batch_bulk     = False   # Schwelle überschritten → bulk_changed
+        self._batch_index    = None    # Index-Methode vor dem Abschalten
+        self._pending_layout = {}      # NodeItem → None (geordnet)
+        self._listeners      = []      # siehe add_change_listener()
+        self.router          = EdgeRouter(self)   # rechtwinklige Linien (aus)
         self.connecting  = False
         self.connect_source = None
         self.parent      = None
 
+    # ── Node-/Edge-Index ───────────────────────────────────
+    @property
+    def nodes(self):
+        """Alle Nodes in Einfügereihenfolge (Kopie)."""
+        return list(self._nodes)
+
+    @property
+    def edges(self):
+        """Alle Edges in Einfügereihenfolge (Kopie)."""
+        return list(self._edges)
+
+    def has_node(self, node):
+        return node in self._nodes
+
+    def has_edge(self, edge):
+        return edge in self._edges
+
+    def edges_of(self, node):
+        """Alle an node angeschlossenen Kanten – O(Grad)."""
+        return list(self._adjacency.get(node, ()))
+
+    def neighbours(self, node):
+        """Alle direkt verbundenen Nodes."""
+        result = []
+        for edge in self._adjacency.get(node, ()):
+            other = edge.dest if edge.source is node else edge.source
+            if other not in result:
+                result.append(other)
+        return result
+
+    # ── Batch-Bearbeitung ──────────────────────────────────
+    @contextlib.contextmanager
+    def batch(self):
+        """
+        Sammelt Änderungen: Node-Layout aufgeschoben, Signale am Ende.
+        Kleine Batches spielen die Einzel-Signale nach; ab
+        BATCH_REPLAY_MAX Änderungen wird der BSP-Index abgeschaltet und
+        statt der Einzel-Signale kommt ein bulk_changed.
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._commit_batch()
+
+    def in_batch(self):
+        return self._batch_depth > 0
+
+    def _commit_batch(self):
+        pending, self._pending_layout = self._pending_layout, {}
+        for node in pending:
+            if node in self._nodes:
+                node._update_layout()
+        if self._batch_index is not None:
+            # Index einmal für alle Items neu aufbauen
+            self.setItemIndexMethod(self._batch_index)
+            self._batch_index = None
+        # Aufgeschobene Routen erst, wenn alle Nodes ihre Größe haben
+        self.router.flush(ROUTE_SLICE_MS)
+        signals, self._batch_signals = self._batch_signals, []
+        if self._batch_bulk:
+            self._batch_bulk = False
+            self.bulk_changed.emit()
+            return
+        for kind, args in signals:
+            getattr(self, kind).emit(*args)
+
+    def add_change_listener(self, listener):
+        """
+        listener(kind, *args) erfährt jede Änderung einzeln – anders als die
+        Signale auch innerhalb von batch(). kind ist der Signalname
+        (node_added, …, diagram_cleared) oder "item_moved".
+        """
+        self._listeners.append(listener)
+
+    def remove_change_listener(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _emit(self, kind, *args):
+        for listener in self._listeners:
+            listener(kind, *args)
+        if kind == "item_moved":
+            return      # kein Signal – Verschieben betrifft Tabelle & Co. nicht
+        if not self._batch_depth:
+            getattr(self, kind).emit(*args)
+        elif not self._batch_bulk:
+            # Im Batch merken; wird es zu viel, am Ende ein bulk_changed
+            self._batch_signals.append((kind, args))
+            if len(self._batch_signals) > BATCH_REPLAY_MAX:
+                self._batch_bulk = True
+                self._batch_signals = []
+                self._batch_index = self.itemIndexMethod()
+                self.setItemIndexMethod(QGraphicsScene.NoIndex)
+
+    def request_layout(self, node):
+        """Node-Layout neu berechnen – im Batch erst beim Abschluss."""
+        if self._batch_depth:
+            self._pending_layout[node] = None
+        else:
+            node._update_layout()
+
+    # ── Detailstufen ───────────────────────────────────────
+    def detail_level(self, painter):
+        if not self.lod_enabled:
+            return DETAIL_FULL
+        lod = QStyleOptionGraphicsItem.levelOfDetailFromTransform(painter.worldTransform())
+        if lod < self.lod_levels["simple"]:
+            return DETAIL_SIMPLE
+        if lod < self.lod_levels["text"]:
+            return DETAIL_NO_TEXT
+        return DETAIL_FULL
+
+    def set_lod(self, enabled=None, levels=None):
+        """Detailstufen ändern und alle (ggf. gecachten) Items neu zeichnen."""
+        if enabled is not None:
+            self.lod_enabled = enabled
+        if levels:
+            self.lod_levels.update(levels)
+        for item in self.items():
+            item.update()
+
+    @contextlib.contextmanager
+    def full_detail(self):
+        """Für Exporte: vorübergehend ohne Detailstufen zeichnen."""
+        previous = self.lod_enabled
+        self.lod_enabled = False
+        try:
+            yield self
+        finally:
+            self.lod_enabled = previous
+
+    def set_node_cache(self, mode):
+        """Cache-Modus ("none"/"device"/"item") für alle Nodes setzen."""
+        self.node_cache = mode if mode in NODE_CACHE_MODES else "none"
+        cache_mode = NODE_CACHE_MODES[self.node_cache]
+        for node in self._nodes:
+            node.apply_cache_mode(cache_mode)
+
+    def add_node(self, node):
+        if node in self._nodes:
+            return
+        node.apply_cache_mode(NODE_CACHE_MODES[self.node_cache])
+        self.addItem(node)
+        self._nodes[node] = None
+        self._adjacency.setdefault(node, set())
+        self._emit("node_added", node)
+
+    def add_edge(self, edge):
+        if edge in self._edges:
+            return
+        self.addItem(edge)
+        self._edges[edge] = None
+        self._adjacency.setdefault(edge.source, set()).add(edge)
+        self._adjacency.setdefault(edge.dest, set()).add(edge)
+        self._emit("edge_added", edge)
+
+    def remove_edge(self, edge):
+        if edge not in self._edges:
+            return
+        del self._edges[edge]
+        for node in (edge.source, edge.dest):
+            incident = self._adjacency.get(node)
+            if incident is not None:
+                incident.discard(edge)
+        self.removeItem(edge)
+        self._emit("edge_removed", edge)
+
+    def remove_node(self, node):
+        """Entfernt node samt angeschlossener Kanten; gibt diese zurück."""
+        if node not in self._nodes:
+            return []
+        removed = list(self._adjacency.get(node, ()))
+        for edge in removed:
+            self.remove_edge(edge)
+        del self._nodes[node]
+        self._adjacency.pop(node, None)
+        self.removeItem(node)
+        self._emit("node_removed", node)
+        return removed
+
+    def clear_diagram(self):
+        """Entfernt alle Nodes und Edges und leert den Index."""
+        for itm in list(self.items()):
+            if itm.parentItem() is None:
+                self.removeItem(itm)
+        self._nodes.clear()
+        self._edges.clear()
+        self._adjacency.clear()
+        self._emit("diagram_cleared")
+
+    def notify_item_changed(self, item):
+        """Nach Text-/Farb-/Formänderung an einem Node oder Edge aufrufen."""
+        self._emit("item_changed", item)
+
+    def notify_item_moved(self, item):
+        """Position eines Nodes geändert (nur für Change-Listener)."""
+        self._emit("item_moved", item)
+
     def mousePressEvent(self, event):
         item = self.itemAt(event.scenePos(), QTransform())
 
@@ -781,10 +1458,7 @@ class DiagramScene(QGraphicsScene):
                                 color2=col2,
                                 dash_pattern=dash_pattern,
                                 label_text=label)
-                self.addItem(edge)
-                self.edges.append(edge)
-                edge.update_position()
-                mw.update_table()
+                self.add_edge(edge)
 
                 # Quelle zurücksetzen, Modus bleibt on
                 mw.connect_source = None
@@ -831,15 +1505,12 @@ class DiagramScene(QGraphicsScene):
                 dash_pattern=dash_pattern,
                 label_text=label
             )
-            self.addItem(edge)
-            print("Edge created:", edge, "– total edges in scene:", len(self.edges))
-            self.edges.append(edge)
+            self.add_edge(edge)
+            print("Edge created:", edge, "– total edges in scene:", len(self._edges))
 
-            # Verbindung fertig, Tabelle updaten
+            # Verbindung fertig, Tabelle folgt über edge_added
             self.connecting     = False
             self.connect_source = None
-            if self.parent:
-                self.parent.update_table()
 
         else:
             super().mousePressEvent(event)
@@ -944,6 +1615,15 @@ EDGE_TEMPLATES = [
     # … weitere Templates …
 ]
 
+# Raster-Hintergrund
+GRID_COLOR        = QColor(200, 200, 200)
+GRID_MIN_PX       = 6     # enger → gröbere Hauptlinien
+GRID_MAX_TILE_PX  = 512   # größer → Linien direkt zeichnen statt Kachel
+
+# Markierungen der Plan-Prüfung
+ISSUE_CROSSING_COLOR = QColor(220, 30, 30)
+ISSUE_OVERLAP_COLOR  = QColor(240, 140, 0)
+
 class DiagramView(QGraphicsView):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -956,6 +1636,14 @@ class DiagramView(QGraphicsView):
         self.setResizeAnchor(QGraphicsView.AnchorUnderMouse)
         self.grid_size = 40  # Start-Wert
 
+        # Gecachte Raster-Kachel, Schlüssel: (Rastergröße, Kachel-Pixel)
+        self._grid_tile_key   = None
+        self._grid_tile_brush = None
+
+        # Ergebnis der Plan-Prüfung: Kreuzungspunkte und Überlappungen
+        self.issue_points = []
+        self.issue_rects  = []
+
 
     def wheelEvent(self, event):
         if event.modifiers() & Qt.ControlModifier:
@@ -979,8 +1667,68 @@ class DiagramView(QGraphicsView):
         else:
             super().keyPressEvent(event)
     def drawBackground(self, painter, rect):
+        if not self.show_grid:
+            return
+
+        # Rasterabstand in Bildschirm-Pixeln beim aktuellen Zoom
+        scale = QStyleOptionGraphicsItem.levelOfDetailFromTransform(painter.worldTransform())
+        if scale <= 0:
+            return
         g = self.grid_size
-        pen = QPen(QColor(200, 200, 200))
+        # Weit herausgezoomt: nur jede 5. (25., …) Linie als Hauptlinie
+        while g * scale < GRID_MIN_PX:
+            g *= 5
+        cell_px = int(round(g * scale))
+
+        if cell_px > GRID_MAX_TILE_PX:
+            # Stark hineingezoomt: wenige Linien, direkt zeichnen
+            self._draw_grid_lines(painter, rect, g)
+            return
+
+        # Kachel nur bei neuer Rastergröße / neuer Zoomstufe erzeugen
+        key = (g, cell_px)
+        if key != self._grid_tile_key:
+            tile = QPixmap(cell_px, cell_px)
+            tile.fill(Qt.transparent)
+            tp = QPainter(tile)
+            tp.setPen(QPen(GRID_COLOR, 0))
+            tp.drawLine(0, 0, cell_px - 1, 0)
+            tp.drawLine(0, 0, 0, cell_px - 1)
+            tp.end()
+            brush = QBrush(tile)
+            # Kachel deckt exakt g Szenen-Einheiten ab → kein Versatz
+            brush.setTransform(QTransform.fromScale(g / cell_px, g / cell_px))
+            self._grid_tile_key   = key
+            self._grid_tile_brush = brush
+        painter.fillRect(rect, self._grid_tile_brush)
+
+    def set_issue_marks(self, points, rects):
+        self.issue_points = points
+        self.issue_rects  = rects
+        self.viewport().update()
+
+    def drawForeground(self, painter, rect):
+        # Nur in der Ansicht – Export und Druck bleiben ohne Markierungen
+        if not self.issue_points and not self.issue_rects:
+            return
+        scale = QStyleOptionGraphicsItem.levelOfDetailFromTransform(painter.worldTransform())
+        if scale <= 0:
+            return
+        painter.setBrush(Qt.NoBrush)
+        pen = QPen(ISSUE_OVERLAP_COLOR, 2)
+        pen.setCosmetic(True)
+        painter.setPen(pen)
+        painter.drawRects([r for r in self.issue_rects if r.intersects(rect)])
+        pen.setColor(ISSUE_CROSSING_COLOR)
+        painter.setPen(pen)
+        radius = 6 / scale      # konstante Größe auf dem Bildschirm
+        area = rect.adjusted(-radius, -radius, radius, radius)
+        for p in self.issue_points:
+            if area.contains(p):
+                painter.drawEllipse(p, radius, radius)
+
+    def _draw_grid_lines(self, painter, rect, g):
+        pen = QPen(GRID_COLOR)
         pen.setWidth(1)
         painter.setPen(pen)
 
@@ -989,24 +1737,2496 @@ class DiagramView(QGraphicsView):
         right  = int(rect.right()  // g + 1) * g
         bottom = int(rect.bottom() // g + 1) * g
 
+        lines = []
         # Vertikale Linien
         x = left
         while x <= right:
-            painter.drawLine(QPointF(x, rect.top()), QPointF(x, rect.bottom()))
+            lines.append(QLineF(x, rect.top(), x, rect.bottom()))
             x += g
 
         # Horizontale Linien
         y = top
         while y <= bottom:
-            painter.drawLine(QPointF(rect.left(), y), QPointF(rect.right(), y))
+            lines.append(QLineF(rect.left(), y, rect.right(), y))
             y += g
+        painter.drawLines(lines)
 import sys
 from PyQt5.QtWidgets import QApplication
 from qfluentwidgets import setTheme, Theme
 from qfluentwidgets.common.icon import FluentIcon
 from qfluentwidgets.window.fluent_window import FluentWindow
 
+class RowIndex:
+    """
+    Item → Zeile für eine Liste, aus der mitten heraus gelöscht wird.
+    Jedes Item behält seinen Platz (Slot) in Einfügereihenfolge; ein
+    Fenwick-Baum zählt die noch belegten Slots davor. Zeile nachschlagen,
+    anhängen und entfernen kosten O(log N) statt list.index() in O(N).
+    """
+    def __init__(self, items=()):
+        self._slot = {}         # Item → Slot (ab 1)
+        self._tree = [0]        # Fenwick-Baum über die Slots, 1-basiert
+        for item in items:
+            self._slot[item] = len(self._tree)
+            self._tree.append(1)
+        # Baum in O(N) aufbauen: jeder Knoten gibt seine Summe nach oben
+        for i in range(1, len(self._tree)):
+            parent = i + (i & -i)
+            if parent < len(self._tree):
+                self._tree[parent] += self._tree[i]
+
+    def __contains__(self, item):
+        return item in self._slot
+
+    def _prefix(self, i):
+        total = 0
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def append(self, item):
+        i = len(self._tree)
+        self._slot[item] = i
+        # neuer Knoten deckt (i - lowbit(i), i] ab
+        self._tree.append(1 + self._prefix(i - 1) - self._prefix(i - (i & -i)))
+
+    def remove(self, item):
+        i = self._slot.pop(item)
+        while i < len(self._tree):
+            self._tree[i] -= 1
+            i += i & -i
+
+    def row(self, item):
+        """Zeile von item oder None."""
+        i = self._slot.get(item)
+        return None if i is None else self._prefix(i) - 1
+
+class DiagramTableModel(QAbstractTableModel):
+    """
+    Tabellen-Modell über die Szene: erst alle Nodes, dann alle Edges.
+    Folgt den Signalen der Szene zeilenweise, Zellen werden erst in
+    data() berechnet.
+    """
+    HEADERS = ["Protokoll", "Adresse", "Form/Verbindung", "Standort/Position"]
+    EDGE_STYLE_NAMES = {
+        Qt.SolidLine: "Twisted Pair",
+        Qt.DashLine: "Funk",
+        Qt.DotLine: "Ethernet",
+        Qt.DashDotLine: "Bus",
+        Qt.DashDotDotLine: "Strich-Punkt-Punkt"
+    }
+
+    def __init__(self, scene, parent=None):
+        super().__init__(parent)
+        self.scene  = scene
+        self._nodes = scene.nodes
+        self._edges = scene.edges
+        self._node_rows = RowIndex(self._nodes)
+        self._edge_rows = RowIndex(self._edges)
+        scene.node_added.connect(self._on_node_added)
+        scene.node_removed.connect(self._on_node_removed)
+        scene.edge_added.connect(self._on_edge_added)
+        scene.edge_removed.connect(self._on_edge_removed)
+        scene.item_changed.connect(self._on_item_changed)
+        scene.diagram_cleared.connect(self.refresh)
+        scene.bulk_changed.connect(self.refresh)
+
+    # ── Zugriff ────────────────────────────────────────────
+    def item_at(self, row):
+        if row < len(self._nodes):
+            return self._nodes[row]
+        return self._edges[row - len(self._nodes)]
+
+    def row_of(self, item):
+        """Zeile von item oder None, wenn es nicht in der Tabelle steht."""
+        if isinstance(item, NodeItem):
+            return self._node_rows.row(item)
+        row = self._edge_rows.row(item)
+        return None if row is None else len(self._nodes) + row
+
+    def refresh(self):
+        """Komplett neu aufbauen (nur für Massenänderungen)."""
+        self.beginResetModel()
+        self._nodes = self.scene.nodes
+        self._edges = self.scene.edges
+        self._node_rows = RowIndex(self._nodes)
+        self._edge_rows = RowIndex(self._edges)
+        self.endResetModel()
+
+    # ── Szene-Signale ──────────────────────────────────────
+    def _on_node_added(self, node):
+        if node in self._node_rows:
+            return      # schon per refresh() übernommen
+        row = len(self._nodes)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._nodes.append(node)
+        self._node_rows.append(node)
+        self.endInsertRows()
+
+    def _on_edge_added(self, edge):
+        if edge in self._edge_rows:
+            return
+        row = len(self._nodes) + len(self._edges)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._edges.append(edge)
+        self._edge_rows.append(edge)
+        self.endInsertRows()
+
+    def _on_node_removed(self, node):
+        row = self._node_rows.row(node)
+        if row is None:
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._nodes[row]
+        self._node_rows.remove(node)
+        self.endRemoveRows()
+
+    def _on_edge_removed(self, edge):
+        idx = self._edge_rows.row(edge)
+        if idx is None:
+            return
+        row = len(self._nodes) + idx
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._edges[idx]
+        self._edge_rows.remove(edge)
+        self.endRemoveRows()
+
+    def _on_item_changed(self, item):
+        changed = [item]
+        if isinstance(item, NodeItem):
+            # Verbindungs-Zeilen zeigen den Titel der Nodes
+            changed += self.scene.edges_of(item)
+        last = self.columnCount() - 1
+        for itm in changed:
+            row = self.row_of(itm)
+            if row is not None:
+                self.dataChanged.emit(self.index(row, 0), self.index(row, last))
+
+    # ── QAbstractTableModel ────────────────────────────────
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._nodes) + len(self._edges)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        item = self.item_at(index.row())
+        col  = index.column()
+        if isinstance(item, NodeItem):
+            return self._node_data(item, col, role)
+        return self._edge_data(item, col, role)
+
+    def _node_data(self, node, col, role):
+        if role == Qt.DisplayRole:
+            if col == 0:
+                return node.text1
+            if col == 1:
+                return node.text2
+            if col == 2:
+                return node.node_shape
+            # Standort und Position
+            return getattr(node, 'standort', "")
+        if col in (0, 1) and role in (Qt.BackgroundRole, Qt.ForegroundRole):
+            bg = node.color1 if col == 0 else node.color2
+            if role == Qt.BackgroundRole:
+                return QBrush(bg)
+            # Schriftfarbe je nach Helligkeit
+            return QBrush(Qt.white if is_color_dark(bg) else Qt.black)
+        return None
+
+    def _edge_data(self, edge, col, role):
+        if role == Qt.DisplayRole:
+            if col == 0:
+                return "Verbindung"
+            if col == 1:
+                # Protokoll/Adresse mit wählbarem Arrow
+                arrow = getattr(edge, 'arrow', '-')
+                return f"{edge.source.text1}{arrow}{edge.dest.text1}"
+            if col == 2:
+                return self.EDGE_STYLE_NAMES.get(edge.pen().style(), "Twisted Pair")
+            # Für Verbindungen bleibt die Standort-Spalte leer
+            return ""
+        if role == Qt.TextAlignmentRole and col == 1:
+            return Qt.AlignCenter
+        return None
+
+# ── Suche ──────────────────────────────────────────────────────
+def search_terms(item):
+    """Suchbegriffe eines Items: Wörter aus Texten/Standort bzw. Edge-Text."""
+    if isinstance(item, NodeItem):
+        texts = (item.text1, item.text2, item.text3, getattr(item, 'standort', ""))
+    else:
+        texts = (item.label_text,)
+    return frozenset(word for text in texts for word in text.lower().split())
+
+class SearchIndex:
+    """
+    Invertierter Index Begriff → Items über Nodes und Edges, gepflegt über
+    die Change-Listener der Szene (auch beim Laden und im Batch). Anfragen
+    sind Präfix-Suchen über die sortierte Begriffsliste; * und ? wirken
+    als Platzhalter (1.1.* = alle Adressen der Linie 1.1). Mehrere Wörter
+    müssen alle passen.
+    """
+    def __init__(self, scene):
+        self.scene  = scene
+        self._terms = {}        # Begriff → set(Items)
+        self._items = {}        # Item → frozenset(Begriffe)
+        self._sorted = []       # sortierte Begriffe, bei Bedarf neu aufgebaut
+        self._sorted_dirty = False
+        for item in scene.nodes + scene.edges:
+            self._add(item)
+        scene.add_change_listener(self._on_change)
+
+    def _on_change(self, kind, item=None):
+        if kind in ("node_added", "edge_added"):
+            self._add(item)
+        elif kind == "item_changed":
+            if search_terms(item) != self._items.get(item):
+                self._remove(item)
+                self._add(item)
+        elif kind in ("node_removed", "edge_removed"):
+            self._remove(item)
+        elif kind == "diagram_cleared":
+            self._terms.clear()
+            self._items.clear()
+            self._sorted = []
+            self._sorted_dirty = False
+
+    def _add(self, item):
+        terms = search_terms(item)
+        self._items[item] = terms
+        for term in terms:
+            bucket = self._terms.get(term)
+            if bucket is None:
+                self._terms[term] = bucket = set()
+                self._sorted_dirty = True
+            bucket.add(item)
+
+    def _remove(self, item):
+        for term in self._items.pop(item, ()):
+            bucket = self._terms.get(term)
+            if bucket is not None:
+                bucket.discard(item)
+                if not bucket:
+                    # Verwaiste Begriffe bleiben in _sorted, bis neu sortiert wird
+                    del self._terms[term]
+
+    def _term_range(self, prefix):
+        """Alle Begriffe, die mit prefix beginnen (bisect über _sorted)."""
+        if self._sorted_dirty:
+            self._sorted = sorted(self._terms)
+            self._sorted_dirty = False
+        lo = bisect.bisect_left(self._sorted, prefix)
+        hi = bisect.bisect_left(self._sorted, prefix + "\U0010ffff")
+        return self._sorted[lo:hi]
+
+    def _match_word(self, word):
+        wildcard = min((i for i in (word.find("*"), word.find("?")) if i >= 0), default=-1)
+        if wildcard < 0:
+            terms = self._term_range(word)
+        else:
+            # Fester Anfang grenzt ein, der Rest wird per Muster geprüft
+            pattern = word if word.endswith("*") else word + "*"
+            terms = [term for term in self._term_range(word[:wildcard])
+                     if fnmatch.fnmatchcase(term, pattern)]
+        result = set()
+        for term in terms:
+            result.update(self._terms.get(term, ()))
+        return result
+
+    def search(self, query):
+        """Items, auf die alle Wörter von query passen – in Szenen-Reihenfolge."""
+        words = query.lower().split()
+        if not words:
+            return []
+        found = None
+        for word in words:
+            matches = self._match_word(word)
+            found = matches if found is None else found & matches
+            if not found:
+                return []
+        nodes = [node for node in self.scene.nodes if node in found]
+        edges = [edge for edge in self.scene.edges if edge in found]
+        return nodes + edges
+
+# ── Plan-Prüfung: Kreuzungen & Überlappungen ───────────────────
+# Gleichmäßiges Raster statt Vergleich aller Paare: jedes Segment bzw.
+# jede Node landet in den Zellen, die es berührt; verglichen wird nur
+# innerhalb einer Zelle. Ein Treffer zählt nur in der Zelle, in der sein
+# Schnittpunkt liegt – so wird kein Paar doppelt gemeldet.
+ANALYSIS_MIN_CELL = 64
+ANALYSIS_LIST_MAX = 2000     # mehr Einträge machen die Liste nur träge
+
+def _segment_cells(x1, y1, x2, y2, cell):
+    """Alle Zellen, die die Strecke berührt (spaltenweise)."""
+    if x1 > x2:
+        x1, y1, x2, y2 = x2, y2, x1, y1
+    cx0, cx1 = math.floor(x1 / cell), math.floor(x2 / cell)
+    if cx0 == cx1:
+        cy0, cy1 = sorted((math.floor(y1 / cell), math.floor(y2 / cell)))
+        return [(cx0, cy) for cy in range(cy0, cy1 + 1)]
+    slope = (y2 - y1) / (x2 - x1)
+    cells = []
+    for cx in range(cx0, cx1 + 1):
+        ya = y1 + (max(x1, cx * cell) - x1) * slope
+        yb = y1 + (min(x2, (cx + 1) * cell) - x1) * slope
+        cy0, cy1 = sorted((math.floor(ya / cell), math.floor(yb / cell)))
+        cells.extend((cx, cy) for cy in range(cy0, cy1 + 1))
+    return cells
+
+def _segment_hit(a, b):
+    """
+    Schnittpunkt zweier Strecken (x1, y1, x2, y2, …) oder None. Liegen sie
+    auf einer Geraden und überdecken sich, gilt die Mitte der Überdeckung.
+    """
+    x1, y1, x2, y2 = a[:4]
+    x3, y3, x4, y4 = b[:4]
+    dx1, dy1, dx2, dy2 = x2 - x1, y2 - y1, x4 - x3, y4 - y3
+    denom = dx1 * dy2 - dy1 * dx2
+    if denom == 0:
+        if (x3 - x1) * dy1 - (y3 - y1) * dx1 != 0:
+            return None     # parallel, nicht auf einer Geraden
+        # gemeinsame Gerade: Intervalle auf der längeren Achse vergleichen
+        axis = 0 if abs(dx1) >= abs(dy1) else 1
+        lo = max(min(a[axis], a[axis + 2]), min(b[axis], b[axis + 2]))
+        hi = min(max(a[axis], a[axis + 2]), max(b[axis], b[axis + 2]))
+        if hi <= lo:
+            return None
+        mid = (lo + hi) / 2
+        if axis == 0:
+            return mid, (y1 + (mid - x1) * dy1 / dx1) if dx1 else y1
+        return ((x1 + (mid - y1) * dx1 / dy1) if dy1 else x1), mid
+    t = ((x3 - x1) * dy2 - (y3 - y1) * dx2) / denom
+    u = ((x3 - x1) * dy1 - (y3 - y1) * dx1) / denom
+    if 0 <= t <= 1 and 0 <= u <= 1:
+        return x1 + t * dx1, y1 + t * dy1
+    return None
+
+def find_edge_crossings(edges, cell=None):
+    """
+    Alle Stellen, an denen sich zwei Edges kreuzen oder ein Stück
+    gemeinsam laufen: [(edge_a, edge_b, QPointF)]. Edges, die sich nur an
+    ihrem gemeinsamen Node treffen, zählen nicht.
+    """
+    segments = []
+    for idx, edge in enumerate(edges):
+        points = edge.points()
+        for p, q in zip(points, points[1:]):
+            x1, y1, x2, y2 = p.x(), p.y(), q.x(), q.y()
+            # Hüllrechteck gleich mitführen: (…, min_x, max_x, min_y, max_y)
+            segments.append((x1, y1, x2, y2, idx, min(x1, x2), max(x1, x2),
+                             min(y1, y2), max(y1, y2)))
+    if len(segments) < 2:
+        return []
+    if cell is None:
+        lengths = sorted(abs(s[2] - s[0]) + abs(s[3] - s[1]) for s in segments)
+        cell = max(ANALYSIS_MIN_CELL, lengths[len(lengths) // 2])
+    buckets = collections.defaultdict(list)
+    for seg in segments:
+        for key in _segment_cells(seg[0], seg[1], seg[2], seg[3], cell):
+            buckets[key].append(seg)
+
+    found = []
+    for (cx, cy), members in buckets.items():
+        # Sweep in x je Zelle: nach linkem Rand sortiert, Abbruch sobald
+        # ein Segment rechts vom aktuellen beginnt
+        members.sort(key=lambda seg: seg[5])
+        for pos, a in enumerate(members):
+            a_idx, a_right, a_top, a_bottom = a[4], a[6], a[7], a[8]
+            for b in members[pos + 1:]:
+                if b[5] > a_right:
+                    break
+                if b[4] == a_idx or b[8] < a_top or b[7] > a_bottom:
+                    continue
+                hit = _segment_hit(a, b)
+                if hit is None:
+                    continue
+                x, y = hit
+                if (math.floor(x / cell), math.floor(y / cell)) != (cx, cy):
+                    continue
+                ea, eb = edges[a[4]], edges[b[4]]
+                point = QPointF(x, y)
+                shared = {ea.source, ea.dest} & {eb.source, eb.dest}
+                if any(node.sceneBoundingRect().adjusted(-1, -1, 1, 1).contains(point)
+                       for node in shared):
+                    continue
+                found.append((ea, eb, point))
+    return found
+
+def find_node_overlaps(nodes, cell=None):
+    """Alle Paare sich überlappender Nodes: [(node_a, node_b, QRectF Überlappung)]."""
+    rects = [node.mapRectToScene(node.rect()) for node in nodes]
+    if len(rects) < 2:
+        return []
+    if cell is None:
+        sizes = sorted(max(r.width(), r.height()) for r in rects)
+        cell = max(ANALYSIS_MIN_CELL, 2 * sizes[len(sizes) // 2])
+    buckets = collections.defaultdict(list)
+    for idx, r in enumerate(rects):
+        for cx in range(math.floor(r.left() / cell), math.floor(r.right() / cell) + 1):
+            for cy in range(math.floor(r.top() / cell), math.floor(r.bottom() / cell) + 1):
+                buckets[(cx, cy)].append(idx)
+
+    found = []
+    for (cx, cy), members in buckets.items():
+        for pos, i in enumerate(members):
+            for j in members[pos + 1:]:
+                overlap = rects[i].intersected(rects[j])
+                if overlap.width() <= 0 or overlap.height() <= 0:
+                    continue
+                if (math.floor(overlap.left() / cell), math.floor(overlap.top() / cell)) != (cx, cy):
+                    continue
+                found.append((nodes[i], nodes[j], overlap))
+    return found
+
+# ── Topologie-Prüfung ──────────────────────────────────────────
+# Welche Node- und Verbindungsvorlagen zu welchem Bus gehören. Die
+# Geräte-Höchstzahlen sind Richtwerte je Linie/Segment ohne Repeater.
+class BusRule:
+    def __init__(self, name, node_templates, edge_templates, max_devices=None):
+        self.name           = name
+        self.node_templates = node_templates
+        self.edge_templates = edge_templates
+        self.max_devices    = max_devices
+
+BUS_RULES = [
+    BusRule("KNX", ("KNX",), ("KNX Hauptlinie", "KNX Linie", "KNX RF Linie"), 64),
+    BusRule("Loxone Tree", ("Loxone", "Loxone Tree"), ("Loxone Tree",), 50),
+    BusRule("Loxone Link", ("Loxone", "Loxone Link"), ("Loxone Link",), 30),
+    BusRule("Loxone Air", ("Loxone", "Loxone Air"), ("Loxone Air",)),
+    BusRule("Ethernet", ("Netzwerk Gerät", "IP Symcon", "Loxone"), ("Ethernet",)),
+    BusRule("EE-Bus", ("EE-Bus",), ("EE-Bus",)),
+    BusRule("Modbus 485", ("Modbus 485",), ("Modbus 485",), 32),
+    BusRule("Modbus 232", ("Modbus 232",), ("Modbus 232",), 2),
+    BusRule("M-Bus", ("M-Bus",), ("M-Bus",), 250),
+]
+VALIDATION_DELAY_MS = 150
+
+# Vorlagen werden am Aussehen erkannt – Nodes und Edges merken sich
+# ihre Vorlage nicht
+NODE_TEMPLATE_KEYS = {(QColor(t.color1).name(), QColor(t.color2).name()): t.name
+                      for t in DEFAULT_TEMPLATES}
+EDGE_TEMPLATE_KEYS = {(t.color1.name(), t.color2.name(), tuple(map(float, t.dash_pattern))): t.name
+                      for t in EDGE_TEMPLATES}
+NODE_BUSES = {}     # Node-Vorlage → Namen der Busse, an die sie darf
+EDGE_RULES = {}     # Verbindungsvorlage → BusRule
+for _rule in BUS_RULES:
+    for _name in _rule.node_templates:
+        NODE_BUSES.setdefault(_name, set()).add(_rule.name)
+    for _name in _rule.edge_templates:
+        EDGE_RULES[_name] = _rule
+
+def node_template_name(node):
+    return NODE_TEMPLATE_KEYS.get((node.color1.name(), node.color2.name()))
+
+def edge_template_name(edge):
+    key = (edge.color1.name(), edge.color2.name(), tuple(map(float, edge.dash_pattern)))
+    return EDGE_TEMPLATE_KEYS.get(key)
+
+class TopologyValidator(QObject):
+    """
+    Prüft die Bus-Regeln laufend mit: doppelte Adressen (text2) je Bus,
+    zu viele Geräte je Linie, Geräte an einer Verbindung des falschen
+    Busses. Ein Bus ist die Zusammenhangskomponente über alle Edges
+    seiner Vorlagen, eine Linie die über Edges genau einer Vorlage.
+    Änderungen markieren nur die betroffenen Komponenten; flush() baut
+    diese neu auf und prüft sie – die übrigen Ergebnisse bleiben stehen.
+    """
+    changed = pyqtSignal()
+
+    def __init__(self, scene, parent=None):
+        super().__init__(parent)
+        self.scene        = scene
+        self._node_tpl    = {}      # Node → Vorlagenname oder None
+        self._edge_groups = {}      # Edge → (("bus", Bus), ("line", Vorlage)) oder ()
+        self._components  = {}      # Id → (Gruppe, [Nodes])
+        self._node_comps  = {}      # Node → {Gruppe: Id}
+        self._comp_issues = {}      # Id → [(Text, Items)]
+        self._edge_issues = {}      # Edge → (Text, Items)
+        self._dirty       = {}      # (Gruppe, Node) für flush() (geordnet)
+        self._dirty_edges = {}      # Edges für die Vorlagen-Prüfung
+        self._next_id     = 0
+        self._timer       = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.flush)
+        for node in scene.nodes:
+            self._node_tpl[node] = node_template_name(node)
+        for edge in scene.edges:
+            self._add_edge(edge)
+        scene.add_change_listener(self._on_change)
+        self.flush()
+
+    @staticmethod
+    def _groups(edge):
+        name = edge_template_name(edge)
+        rule = EDGE_RULES.get(name)
+        if rule is None:
+            return ()
+        return (("bus", rule.name), ("line", name))
+
+    def _on_change(self, kind, item=None):
+        if kind == "node_added":
+            self._node_tpl[item] = node_template_name(item)
+        elif kind == "edge_added":
+            self._add_edge(item)
+        elif kind == "edge_removed":
+            self._mark(item, self._edge_groups.pop(item, ()))
+            self._dirty_edges[item] = None
+        elif kind == "node_removed":
+            self._node_tpl.pop(item, None)
+        elif kind == "item_changed":
+            if isinstance(item, NodeItem):
+                self._node_changed(item)
+            elif isinstance(item, EdgeItem) and item in self._edge_groups:
+                groups = self._groups(item)
+                if groups != self._edge_groups[item]:
+                    self._mark(item, self._edge_groups[item])
+                    self._edge_groups[item] = groups
+                    self._mark(item, groups)
+                    self._dirty_edges[item] = None
+        elif kind == "diagram_cleared":
+            self._reset()
+            return
+        else:
+            return      # item_moved betrifft keine Regel
+        if not self._timer.isActive():
+            self._timer.start(VALIDATION_DELAY_MS)
+
+    def _add_edge(self, edge):
+        groups = self._groups(edge)
+        self._edge_groups[edge] = groups
+        self._mark(edge, groups)
+        self._dirty_edges[edge] = None
+
+    def _node_changed(self, node):
+        tpl = node_template_name(node)
+        if tpl != self._node_tpl.get(node):
+            self._node_tpl[node] = tpl
+            for edge in self.scene.edges_of(node):
+                self._dirty_edges[edge] = None
+        # Adresse evtl. geändert → eigene Komponenten neu prüfen
+        for group in self._node_comps.get(node, ()):
+            self._dirty[(group, node)] = None
+
+    def _mark(self, edge, groups):
+        for group in groups:
+            self._dirty[(group, edge.source)] = None
+            self._dirty[(group, edge.dest)] = None
+
+    def _reset(self):
+        self._timer.stop()
+        self._node_tpl.clear()
+        self._edge_groups.clear()
+        self._components.clear()
+        self._node_comps.clear()
+        self._comp_issues.clear()
+        self._edge_issues.clear()
+        self._dirty.clear()
+        self._dirty_edges.clear()
+        self.changed.emit()
+
+    def flush(self):
+        """Markierte Komponenten neu aufbauen und prüfen."""
+        self._timer.stop()
+        if not self._dirty and not self._dirty_edges:
+            return
+        dirty, self._dirty = self._dirty, {}
+        # 1) Alte Komponenten der markierten Nodes auflösen – eine entfernte
+        #    Edge kann sie geteilt haben, also alle Mitglieder neu einsammeln
+        seeds = {}      # Gruppe → Start-Nodes (geordnet)
+        for group, node in dirty:
+            bucket = seeds.setdefault(group, {})
+            comp_id = self._node_comps.get(node, {}).get(group)
+            if comp_id is None:
+                bucket[node] = None
+                continue
+            _, members = self._components.pop(comp_id)
+            self._comp_issues.pop(comp_id, None)
+            for member in members:
+                comps = self._node_comps[member]
+                del comps[group]
+                if not comps:
+                    del self._node_comps[member]
+                bucket[member] = None
+        # 2) Neu aufbauen und prüfen
+        for group, nodes in seeds.items():
+            for node in nodes:
+                if group in self._node_comps.get(node, ()) or not self.scene.has_node(node):
+                    continue
+                members = self._collect(group, node)
+                if len(members) < 2:
+                    continue
+                comp_id = self._next_id
+                self._next_id += 1
+                self._components[comp_id] = (group, members)
+                for member in members:
+                    self._node_comps.setdefault(member, {})[group] = comp_id
+                issues = self._check_component(group, members)
+                if issues:
+                    self._comp_issues[comp_id] = issues
+        # 3) Vorlagen der betroffenen Edges
+        edges, self._dirty_edges = self._dirty_edges, {}
+        for edge in edges:
+            self._edge_issues.pop(edge, None)
+            if self.scene.has_edge(edge):
+                issue = self._check_edge(edge)
+                if issue is not None:
+                    self._edge_issues[edge] = issue
+        self.changed.emit()
+
+    def _collect(self, group, start):
+        """Breitensuche über die Edges der Gruppe."""
+        members = [start]
+        seen = {start}
+        for node in members:
+            for edge in self.scene.edges_of(node):
+                if group not in self._edge_groups.get(edge, ()):
+                    continue
+                other = edge.dest if edge.source is node else edge.source
+                if other not in seen:
+                    seen.add(other)
+                    members.append(other)
+        return members
+
+    @staticmethod
+    def _check_component(group, members):
+        kind, name = group
+        issues = []
+        if kind == "line":
+            limit = EDGE_RULES[name].max_devices
+            if limit is not None and len(members) > limit:
+                issues.append((f"{name}: {len(members)} Geräte an einer Linie (max. {limit})",
+                               members))
+            return issues
+        by_address = collections.defaultdict(list)
+        for node in members:
+            address = node.text2.strip()
+            if address:
+                by_address[address].append(node)
+        for address, nodes in by_address.items():
+            if len(nodes) > 1:
+                issues.append((f"{name}: Adresse {address} {len(nodes)}× vergeben", nodes))
+        return issues
+
+    def _check_edge(self, edge):
+        groups = self._edge_groups.get(edge)
+        if not groups:
+            return None     # benutzerdefinierte Verbindung: keine Regel
+        bus, tpl = groups[0][1], groups[1][1]
+        for node in (edge.source, edge.dest):
+            node_tpl = self._node_tpl.get(node)
+            allowed = NODE_BUSES.get(node_tpl)
+            if allowed and bus not in allowed:
+                return (f"{node.text1 or node_tpl} ({node_tpl}) an Verbindung {tpl}", [node, edge])
+        return None
+
+    def issues(self):
+        """Alle aktuellen Verstöße als [(Text, [Items])]."""
+        self.flush()
+        result = [issue for issues in self._comp_issues.values() for issue in issues]
+        result.extend(self._edge_issues.values())
+        return result
+
+# ── Diagramm-Datei (JSON) ──────────────────────────────────────
+# Kurze Schlüssel für das kompakte Format
+NODE_SHORT_KEYS = {
+    "id": "i", "shape": "s", "color1": "c1", "color2": "c2",
+    "x": "x", "y": "y", "width": "w", "height": "h",
+    "text1": "t1", "text2": "t2", "text3": "t3", "standort": "o"
+}
+EDGE_SHORT_KEYS = {
+    "source": "a", "dest": "b", "color1": "c1", "color2": "c2",
+    "dash": "d", "label": "l", "arrow": "r"
+}
+COMPACT_FORMAT = "compact"
+
+def node_to_record(node, node_id):
+    return {
+        "id": node_id,
+        "shape": node.node_shape,
+        "color1": node.color1.name(),
+        "color2": node.color2.name(),
+        "x": node.pos().x(),
+        "y": node.pos().y(),
+        "width": node.rect().width(),
+        "height": node.rect().height(),
+        "text1": node.text1,
+        "text2": node.text2,
+        "text3": node.text3,
+        "standort": getattr(node, 'standort', "")
+    }
+
+def edge_to_record(edge, node_ids):
+    """node_ids: dict NodeItem → id, einmal pro Speichern aufgebaut."""
+    return {
+        "source": node_ids[edge.source],
+        "dest": node_ids[edge.dest],
+        "color1": edge.color1.name(),
+        "color2": edge.color2.name(),
+        "dash": list(edge.dash_pattern),
+        "label": edge.label_text,
+        "arrow": getattr(edge, 'arrow', "-")
+    }
+
+def record_to_node(rec):
+    node = NodeItem(
+        shape=rec.get("shape", "rect"),
+        rect=QRectF(0, 0, rec.get("width", 100), rec.get("height", 60)),
+        text1=rec.get("text1", ""),
+        text2=rec.get("text2", ""),
+        text3=rec.get("text3", ""),
+        color1=QColor(rec.get("color1", "lightgray")),
+        color2=QColor(rec.get("color2", "white"))
+    )
+    node.standort = rec.get("standort", "")
+    node.setPos(rec.get("x", 0), rec.get("y", 0))
+    return node
+
+def record_to_edge(rec, nodes):
+    """nodes: Liste der geladenen Nodes, Index = id aus der Datei."""
+    edge = EdgeItem(
+        nodes[rec.get("source")],
+        nodes[rec.get("dest")],
+        color1=rec.get("color1", "#ff0000"),
+        color2=rec.get("color2", "#00ff00"),
+        dash_pattern=tuple(rec.get("dash", (8.0, 4.0))),
+        label_text=rec.get("label", "")
+    )
+    edge.arrow = rec.get("arrow", "-")
+    return edge
+
+def apply_node_record(node, rec):
+    """Überträgt einen Node-Datensatz auf einen vorhandenen Node (Journal, Undo)."""
+    node.node_shape = rec.get("shape", node.node_shape)
+    node.set_colors(QColor(rec.get("color1", node.color1.name())),
+                    QColor(rec.get("color2", node.color2.name())))
+    for attr, item in (("text1", node.text_item1), ("text2", node.text_item2),
+                       ("text3", node.text_item3)):
+        text = rec.get(attr, getattr(node, attr))
+        if text != getattr(node, attr):
+            setattr(node, attr, text)
+            item.setPlainText(text)
+    node.standort = rec.get("standort", getattr(node, 'standort', ""))
+    node.min_width  = rec.get("width", node.min_width)
+    node.min_height = rec.get("height", node.min_height)
+    node.prepareGeometryChange()
+    scene = node.scene()
+    if scene is not None and hasattr(scene, 'request_layout'):
+        scene.request_layout(node)
+    else:
+        node._update_layout()
+    node.setPos(rec.get("x", node.pos().x()), rec.get("y", node.pos().y()))
+    node.update()
+
+def apply_edge_record(edge, rec):
+    """Überträgt Farben, Muster, Text und Pfeil auf eine vorhandene Edge."""
+    edge.color1 = QColor(rec.get("color1", edge.color1.name()))
+    edge.color2 = QColor(rec.get("color2", edge.color2.name()))
+    edge.dash_pattern = tuple(rec.get("dash", edge.dash_pattern))
+    edge.arrow = rec.get("arrow", edge.arrow)
+    label = rec.get("label", edge.label_text)
+    if label != edge.label_text:
+        edge.label_text = label
+        edge.text_item.setPlainText(label)
+    edge.update_position()
+    edge.update()
+
+def _compact_record(rec, short_keys):
+    out = {}
+    for key, value in rec.items():
+        if value == "":
+            continue    # leere Texte sind beim Laden Standard
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        out[short_keys[key]] = value
+    return out
+
+def expand_record(rec, short_keys):
+    """Kurze Schlüssel (kompaktes Format) wieder in lange übersetzen."""
+    long_keys = {short: key for key, short in short_keys.items()}
+    return {long_keys.get(key, key): value for key, value in rec.items()}
+
+def write_diagram_json(f, metadata, node_records, edge_records, compact=False):
+    """
+    Schreibt das Diagramm Datensatz für Datensatz nach f – das Dokument
+    wird nie komplett im Speicher aufgebaut. node_records/edge_records
+    dürfen Generatoren sein.
+    """
+    if compact:
+        f.write('{"format":"%s","metadata":' % COMPACT_FORMAT)
+        f.write(json.dumps(metadata, ensure_ascii=False, separators=(",", ":")))
+        for key, records, short_keys in (("nodes", node_records, NODE_SHORT_KEYS),
+                                         ("edges", edge_records, EDGE_SHORT_KEYS)):
+            f.write(',"%s":[' % key)
+            sep = ""
+            for rec in records:
+                f.write(sep)
+                f.write(json.dumps(_compact_record(rec, short_keys),
+                                   ensure_ascii=False, separators=(",", ":")))
+                sep = ","
+            f.write("]")
+        f.write("}")
+        return
+
+    # Lesbares Format wie bisher (indent=4)
+    def indented(obj, level):
+        text = json.dumps(obj, indent=4, ensure_ascii=False)
+        return text.replace("\n", "\n" + " " * level)
+
+    f.write('{\n    "metadata": ' + indented(metadata, 4))
+    for key, records in (("nodes", node_records), ("edges", edge_records)):
+        f.write(',\n    "%s": [' % key)
+        sep = "\n"
+        empty = True
+        for rec in records:
+            f.write(sep + "        " + indented(rec, 8))
+            sep = ",\n"
+            empty = False
+        f.write("]" if empty else "\n    ]")
+    f.write("\n}")
+
+def atomic_write(path, write_func, mode="w"):
+    """
+    Schreibt über eine Temp-Datei im selben Ordner und ersetzt path erst
+    danach – ein abgebrochener Schreibvorgang lässt die alte Datei intakt.
+    """
+    folder = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".~", suffix=".tmp", dir=folder)
+    try:
+        if "b" in mode:
+            f = os.fdopen(fd, mode)
+        else:
+            f = os.fdopen(fd, mode, encoding="utf-8", newline="\n")
+        with f:
+            write_func(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def read_diagram_json(f):
+    """Liest eine Diagramm-Datei (lesbar oder kompakt) in das lange Format."""
+    data = json.load(f)
+    if data.get("format") == COMPACT_FORMAT:
+        data["nodes"] = [expand_record(r, NODE_SHORT_KEYS) for r in data.get("nodes", [])]
+        data["edges"] = [expand_record(r, EDGE_SHORT_KEYS) for r in data.get("edges", [])]
+    return data
+
+class _JsonStream:
+    """Lesepuffer für iter_diagram_json – dekodiert einzelne JSON-Werte."""
+    def __init__(self, f, chunk_size):
+        self.f          = f
+        self.chunk_size = chunk_size
+        self.decoder    = json.JSONDecoder()
+        self.buf        = ""
+        self.pos        = 0
+        self.eof        = False
+
+    def fill(self):
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+        # Bereits Gelesenes verwerfen – der Puffer bleibt klein
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+
+    def peek(self):
+        """Nächstes Zeichen ohne Leerraum ('' am Dateiende)."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf) or self.eof:
+                return self.buf[self.pos:self.pos + 1]
+            self.fill()
+
+    def take(self, expected):
+        ch = self.peek()
+        if ch not in expected:
+            raise ValueError(f"Ungültige Diagramm-Datei: '{ch}' statt '{expected}'")
+        self.pos += 1
+        return ch
+
+    def value(self):
+        """Genau einen JSON-Wert dekodieren, bei Bedarf nachlesen."""
+        self.peek()
+        while True:
+            try:
+                obj, end = self.decoder.raw_decode(self.buf, self.pos)
+                # Zahl am Pufferende könnte abgeschnitten sein
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return obj
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.fill()
+
+def iter_diagram_json(f, chunk_size=1 << 16):
+    """
+    Liest eine Diagramm-JSON-Datei (lesbar oder kompakt) inkrementell und
+    liefert ("metadata", dict), ("node", record) und ("edge", record) in
+    Dateireihenfolge. Im Speicher liegt nur ein Datensatz plus Lesepuffer.
+    """
+    stream = _JsonStream(f, chunk_size)
+    compact = False
+    stream.take("{")
+    if stream.peek() == "}":
+        return
+    while True:
+        key = stream.value()
+        stream.take(":")
+        if key in ("nodes", "edges"):
+            kind, short_keys = ("node", NODE_SHORT_KEYS) if key == "nodes" else ("edge", EDGE_SHORT_KEYS)
+            stream.take("[")
+            if stream.peek() == "]":
+                stream.pos += 1
+            else:
+                while True:
+                    rec = stream.value()
+                    yield kind, expand_record(rec, short_keys) if compact else rec
+                    if stream.take(",]") == "]":
+                        break
+        else:
+            val = stream.value()
+            if key == "format":
+                compact = val == COMPACT_FORMAT
+            elif key == "metadata":
+                yield "metadata", val
+        if stream.take(",}") == "}":
+            return
+
+# ── Binäres Projektformat (.diax) ──────────────────────────────
+# Aufbau: b"DIAX" | Version (u8) | Kompression (u8) | komprimierte Nutzdaten
+# Nutzdaten: Metadaten (JSON), String-Pool, Node- und Edge-Tabelle
+# spaltenweise (u32-Referenzen in den Pool bzw. f64-Zahlen).
+DIAX_MAGIC       = b"DIAX"
+DIAX_VERSION     = 1
+DIAX_ZLIB        = 1
+DIAX_EXTENSION   = ".diax"
+NODE_STR_COLUMNS = ("shape", "color1", "color2", "text1", "text2", "text3", "standort")
+NODE_NUM_COLUMNS = ("x", "y", "width", "height")
+EDGE_STR_COLUMNS = ("color1", "color2", "label", "arrow")
+NODE_STR_DEFAULTS = {"shape": "rect", "color1": "lightgray", "color2": "white"}
+EDGE_STR_DEFAULTS = {"color1": "#ff0000", "color2": "#00ff00", "arrow": "-"}
+
+def _le_bytes(arr):
+    # Dateiformat ist immer little-endian
+    if sys.byteorder != "little":
+        arr = array(arr.typecode, arr)
+        arr.byteswap()
+    return arr.tobytes()
+
+def _le_array(typecode, data):
+    arr = array(typecode)
+    arr.frombytes(data)
+    if sys.byteorder != "little":
+        arr.byteswap()
+    return arr
+
+class ColumnRecords:
+    """
+    Folge von Datensätzen über Spalten-Arrays: das Dict einer Zeile
+    entsteht erst beim Zugriff, das Einlesen selbst ist nur Array-Kopie.
+    """
+    def __init__(self, count, make_record):
+        self._count = count
+        self._make  = make_record
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, idx):
+        if idx < 0:
+            idx += self._count
+        if not 0 <= idx < self._count:
+            raise IndexError(idx)
+        return self._make(idx)
+
+    def __iter__(self):
+        return map(self._make, range(self._count))
+
+def write_diagram_diax(f, metadata, node_records, edge_records):
+    """Schreibt das Diagramm (Datensätze im langen Format) binär nach f."""
+    pool = {}
+    def ref(text):
+        idx = pool.get(text)
+        if idx is None:
+            idx = pool[text] = len(pool)
+        return idx
+
+    node_str = [array("I") for _ in NODE_STR_COLUMNS]
+    node_num = [array("d") for _ in NODE_NUM_COLUMNS]
+    for rec in node_records:
+        for col, key in zip(node_str, NODE_STR_COLUMNS):
+            col.append(ref(rec.get(key, NODE_STR_DEFAULTS.get(key, ""))))
+        node_num[0].append(rec.get("x", 0))
+        node_num[1].append(rec.get("y", 0))
+        node_num[2].append(rec.get("width", 100))
+        node_num[3].append(rec.get("height", 60))
+
+    edge_ids = [array("I"), array("I")]
+    edge_str = [array("I") for _ in EDGE_STR_COLUMNS]
+    edge_num = [array("d"), array("d")]
+    for rec in edge_records:
+        edge_ids[0].append(rec["source"])
+        edge_ids[1].append(rec["dest"])
+        for col, key in zip(edge_str, EDGE_STR_COLUMNS):
+            col.append(ref(rec.get(key, EDGE_STR_DEFAULTS.get(key, ""))))
+        dash, gap = rec.get("dash", (8.0, 4.0))
+        edge_num[0].append(dash)
+        edge_num[1].append(gap)
+
+    parts = []
+    meta = json.dumps(metadata, ensure_ascii=False).encode("utf-8")
+    parts += [struct.pack("<I", len(meta)), meta]
+    encoded = [text.encode("utf-8") for text in pool]
+    parts += [struct.pack("<I", len(encoded)),
+              _le_bytes(array("I", [len(b) for b in encoded])),
+              b"".join(encoded)]
+    parts.append(struct.pack("<I", len(node_num[0])))
+    parts += [_le_bytes(col) for col in node_str + node_num]
+    parts.append(struct.pack("<I", len(edge_num[0])))
+    parts += [_le_bytes(col) for col in edge_ids + edge_str + edge_num]
+
+    f.write(DIAX_MAGIC + struct.pack("<BB", DIAX_VERSION, DIAX_ZLIB))
+    f.write(zlib.compress(b"".join(parts), 6))
+
+def read_diagram_diax(f):
+    """Liest eine .diax-Datei in dieselbe Struktur wie read_diagram_json()."""
+    head = f.read(6)
+    if head[:4] != DIAX_MAGIC:
+        raise ValueError("Keine DIAX-Datei")
+    version, compression = struct.unpack("<BB", head[4:6])
+    if version != DIAX_VERSION or compression != DIAX_ZLIB:
+        raise ValueError(f"Nicht unterstützte DIAX-Version {version}/{compression}")
+    buf = memoryview(zlib.decompress(f.read()))
+    pos = 0
+
+    def take(nbytes):
+        nonlocal pos
+        chunk = buf[pos:pos + nbytes]
+        pos += nbytes
+        return chunk
+
+    def take_u32():
+        return struct.unpack("<I", take(4))[0]
+
+    def take_columns(typecode, count, n_cols):
+        size = array(typecode).itemsize * count
+        return [_le_array(typecode, take(size)) for _ in range(n_cols)]
+
+    meta = json.loads(bytes(take(take_u32())).decode("utf-8"))
+    n_strings = take_u32()
+    lengths = _le_array("I", take(4 * n_strings))
+    blob = bytes(take(sum(lengths)))
+    strings, offset = [], 0
+    for length in lengths:
+        strings.append(blob[offset:offset + length].decode("utf-8"))
+        offset += length
+
+    n_nodes = take_u32()
+    shape, c1, c2, t1, t2, t3, standort = take_columns("I", n_nodes, len(NODE_STR_COLUMNS))
+    xs, ys, ws, hs = take_columns("d", n_nodes, len(NODE_NUM_COLUMNS))
+
+    def node_record(i):
+        return {
+            "id": i, "shape": strings[shape[i]],
+            "color1": strings[c1[i]], "color2": strings[c2[i]],
+            "x": xs[i], "y": ys[i], "width": ws[i], "height": hs[i],
+            "text1": strings[t1[i]], "text2": strings[t2[i]], "text3": strings[t3[i]],
+            "standort": strings[standort[i]]
+        }
+
+    n_edges = take_u32()
+    src, dest = take_columns("I", n_edges, 2)
+    e_c1, e_c2, label, arrow = take_columns("I", n_edges, len(EDGE_STR_COLUMNS))
+    dash, gap = take_columns("d", n_edges, 2)
+
+    def edge_record(i):
+        return {
+            "source": src[i], "dest": dest[i],
+            "color1": strings[e_c1[i]], "color2": strings[e_c2[i]],
+            "dash": [dash[i], gap[i]],
+            "label": strings[label[i]], "arrow": strings[arrow[i]]
+        }
+
+    return {"metadata": meta,
+            "nodes": ColumnRecords(n_nodes, node_record),
+            "edges": ColumnRecords(n_edges, edge_record)}
+
+def read_diagram_file(path):
+    """Lädt .json (lesbar/kompakt) oder .diax anhand der Endung."""
+    if path.lower().endswith(DIAX_EXTENSION):
+        with open(path, "rb") as f:
+            return read_diagram_diax(f)
+    with open(path, "r", encoding="utf-8") as f:
+        return read_diagram_json(f)
+
+def write_diagram_file(path, metadata, node_records, edge_records, compact=False):
+    """Schreibt atomar als .diax oder JSON (lesbar/kompakt) anhand der Endung."""
+    if path.lower().endswith(DIAX_EXTENSION):
+        atomic_write(path, lambda f: write_diagram_diax(f, metadata, node_records, edge_records), "wb")
+    else:
+        atomic_write(path, lambda f: write_diagram_json(f, metadata, node_records, edge_records, compact))
+
+def convert_diagram_file(src, dest, compact=False):
+    """Konvertiert zwischen JSON und .diax (beide Richtungen), ohne Szene."""
+    data = read_diagram_file(src)
+    write_diagram_file(dest, data.get("metadata", {}),
+                       data.get("nodes", []), data.get("edges", []), compact)
+
+# ── Änderungs-Journal & Wiederherstellung ──────────────────────
+# Jede Bearbeitung wird als JSON-Zeile an ein Journal neben dem Projekt
+# gehängt (<projekt>.journal.<gen>). Ist das Journal groß genug, faltet
+# eine Kompaktierung im Hintergrund alles in <projekt>.autosave.diax.
+# Nach einem Absturz: Projekt bzw. Autosave laden, Journale abspielen.
+RECOVERY_DIR          = os.path.join(os.path.expanduser("~"), ".diagramm_editor", "recovery")
+JOURNAL_FLUSH_MS      = 500                 # Änderungen sammeln (z.B. Ziehen)
+JOURNAL_COMPACT_BYTES = 4 * 1024 * 1024     # ab dieser Journalgröße kompaktieren
+AUTOSAVE_SUFFIX       = ".autosave" + DIAX_EXTENSION
+
+def journal_files(stem):
+    """Vorhandene Journal-Segmente zu stem als [(gen, pfad)], aufsteigend."""
+    folder, base = os.path.split(os.path.abspath(stem))
+    prefix = base + ".journal."
+    result = []
+    if os.path.isdir(folder):
+        for name in os.listdir(folder):
+            if name.startswith(prefix) and name[len(prefix):].isdigit():
+                result.append((int(name[len(prefix):]), os.path.join(folder, name)))
+    return sorted(result)
+
+def remove_journal_files(stem, keep_from=None):
+    """Löscht Segmente (alle bzw. die vor Generation keep_from) und ggf. das Autosave."""
+    for gen, path in journal_files(stem):
+        if keep_from is None or gen < keep_from:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+    if keep_from is None:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(stem + AUTOSAVE_SUFFIX)
+
+def rebase_items(scene):
+    """IDs am Segmentanfang: Nodes 0..N-1, danach Edges – in Szenen-Reihenfolge."""
+    items = {}
+    for node in scene.nodes:
+        items[len(items)] = node
+    for edge in scene.edges:
+        items[len(items)] = edge
+    return items
+
+def replay_journal(scene, stem, apply_metadata, first_gen=0):
+    """
+    Spielt die Segmente ab Generation first_gen auf die (bereits aus Projekt
+    bzw. Autosave geladene) Szene ab. Eine abgeschnittene letzte Zeile
+    (Absturz beim Schreiben) beendet das Segment. Rückgabe: Anzahl Einträge.
+    """
+    count = 0
+    with scene.batch():
+        for gen, path in journal_files(stem):
+            if gen < first_gen:
+                continue
+            items = rebase_items(scene)
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        break
+                    op = rec.get("op")
+                    if op == "node":
+                        node = items.get(rec["id"])
+                        if node is None:
+                            node = record_to_node(rec)
+                            scene.add_node(node)
+                            items[rec["id"]] = node
+                        else:
+                            apply_node_record(node, rec)
+                            scene.notify_item_changed(node)
+                    elif op == "edge":
+                        edge = items.get(rec["uid"])
+                        if edge is not None:
+                            apply_edge_record(edge, rec)
+                            scene.notify_item_changed(edge)
+                        elif rec["source"] in items and rec["dest"] in items:
+                            edge = record_to_edge(rec, items)
+                            scene.add_edge(edge)
+                            items[rec["uid"]] = edge
+                    elif op == "del":
+                        item = items.pop(rec["uid"], None)
+                        if isinstance(item, NodeItem):
+                            scene.remove_node(item)
+                        elif item is not None:
+                            scene.remove_edge(item)
+                    elif op == "clear":
+                        scene.clear_diagram()
+                        items.clear()
+                    elif op == "meta":
+                        apply_metadata(rec["meta"])
+                    count += 1
+    return count
+
+class DiagramJournal(QObject):
+    """
+    Schreibt Änderungen der Szene als kleine Datensätze an das Journal.
+    Verschieben/Umfärben usw. markieren das Item nur; JOURNAL_FLUSH_MS
+    später wird sein aktueller Stand einmal geschrieben – ein Ziehen über
+    hundert Rasterpunkte ergibt einen Eintrag. IDs gelten je Segment
+    (siehe rebase_items), neue Items zählen weiter.
+    """
+    def __init__(self, scene, collect_metadata, parent=None):
+        super().__init__(parent)
+        self.scene    = scene
+        self.collect_metadata = collect_metadata
+        self.stem     = None      # Pfad ohne Endung der Journal-Dateien
+        self.gen      = 0
+        self._file    = None
+        self._uids    = {}        # Item → ID im aktuellen Segment
+        self._next    = 0
+        self._dirty   = {}        # Items mit ungeschriebenem Stand (geordnet)
+        self._ops     = []        # fertige Datensätze (Löschen, Leeren)
+        self._meta    = False
+        self._compactor = None
+        self._timer   = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.flush)
+
+    # ── Öffnen / Schließen ─────────────────────────────────
+    def open(self, stem, fresh=True):
+        """
+        Journal für stem beginnen. fresh: die Szene entspricht gerade der
+        Projektdatei (nach Laden/Speichern) – alte Journale sind überholt.
+        Sonst (nach einer Wiederherstellung) wird sofort kompaktiert.
+        """
+        self.close()
+        self.stem = stem
+        existing = journal_files(stem)
+        if fresh:
+            remove_journal_files(stem)
+            self.gen = 0
+        else:
+            self.gen = existing[-1][0] + 1 if existing else 0
+        self._start_segment()
+        self.scene.add_change_listener(self._on_change)
+        if not fresh:
+            self.compact()
+
+    def close(self, discard=False):
+        """Journal beenden; discard: Dateien löschen (sauber beendet/verworfen)."""
+        if self.stem is None:
+            return
+        self.scene.remove_change_listener(self._on_change)
+        self.wait()
+        if discard:
+            self._dirty.clear()
+            self._ops.clear()
+            self._meta = False
+        else:
+            self.flush()
+        self._timer.stop()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if discard:
+            remove_journal_files(self.stem)
+        self.stem = None
+
+    def _start_segment(self):
+        if self._file is not None:
+            self._file.close()
+        os.makedirs(os.path.dirname(os.path.abspath(self.stem)), exist_ok=True)
+        self._file = open(f"{self.stem}.journal.{self.gen}", "a", encoding="utf-8")
+        self._uids = {item: uid for uid, item in rebase_items(self.scene).items()}
+        self._next = len(self._uids)
+
+    # ── Aufzeichnen ────────────────────────────────────────
+    def mark_metadata(self, *args):
+        if self.stem is not None:
+            self._meta = True
+            self._schedule()
+
+    def _on_change(self, kind, item=None):
+        if kind in ("node_added", "edge_added"):
+            self._uids[item] = self._next
+            self._next += 1
+            self._dirty[item] = None
+        elif kind in ("item_changed", "item_moved"):
+            if item in self._uids:
+                self._dirty[item] = None
+        elif kind in ("node_removed", "edge_removed"):
+            uid = self._uids.pop(item, None)
+            if uid is None:
+                return
+            self._dirty.pop(item, None)
+            self._ops.append({"op": "del", "uid": uid})
+        elif kind == "diagram_cleared":
+            self._uids.clear()
+            self._dirty.clear()
+            self._ops = [{"op": "clear"}]
+        self._schedule()
+
+    def _schedule(self):
+        if not self._timer.isActive():
+            self._timer.start(JOURNAL_FLUSH_MS)
+
+    def flush(self):
+        """Schreibt alle gesammelten Änderungen ans Journal (ein fsync)."""
+        if self._file is None or not (self._dirty or self._ops or self._meta):
+            return
+        lines = [json.dumps(rec, ensure_ascii=False) for rec in self._ops]
+        if self._meta:
+            lines.append(json.dumps({"op": "meta", "meta": self.collect_metadata()},
+                                    ensure_ascii=False))
+        for item in self._dirty:
+            uid = self._uids.get(item)
+            if uid is None:
+                continue
+            if isinstance(item, NodeItem):
+                rec = node_to_record(item, uid)
+                rec["op"] = "node"
+            else:
+                rec = edge_to_record(item, self._uids)
+                rec.update(op="edge", uid=uid)
+            lines.append(json.dumps(rec, ensure_ascii=False))
+        self._dirty.clear()
+        self._ops.clear()
+        self._meta = False
+        self._file.write("\n".join(lines) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        if self._file.tell() > JOURNAL_COMPACT_BYTES:
+            self.compact()
+
+    # ── Kompaktieren ───────────────────────────────────────
+    def compact(self):
+        """
+        Neues Segment beginnen und den jetzigen Stand im Hintergrund als
+        Autosave schreiben; danach sind die älteren Segmente überflüssig.
+        Stürzt das Programm vorher ab, gelten altes Autosave + alle Segmente.
+        """
+        if self._compactor is not None:
+            return      # läuft schon – das nächste flush() versucht es wieder
+        self.flush()
+        nodes = self.scene.nodes
+        node_ids = {node: idx for idx, node in enumerate(nodes)}
+        meta = dict(self.collect_metadata(), journal_gen=self.gen + 1)
+        node_records = [node_to_record(node, idx) for idx, node in enumerate(nodes)]
+        edge_records = [edge_to_record(edge, node_ids) for edge in self.scene.edges]
+        self.gen += 1
+        self._start_segment()
+        stem, gen = self.stem, self.gen
+
+        def job():
+            write_diagram_file(stem + AUTOSAVE_SUFFIX, meta, node_records, edge_records)
+            remove_journal_files(stem, keep_from=gen)
+
+        self._compactor = JobThread(job, self)
+        self._compactor.finished.connect(self._on_compacted)
+        self._compactor.start()
+
+    def _on_compacted(self):
+        self._compactor = None
+
+    def wait(self):
+        """Wartet auf eine laufende Kompaktierung."""
+        if self._compactor is not None:
+            self._compactor.wait()
+            self._compactor = None
+
+def recover_sources(stem, project):
+    """(Basisdaten, erste Journal-Generation) für eine Wiederherstellung."""
+    autosave = stem + AUTOSAVE_SUFFIX
+    if os.path.exists(autosave):
+        data = read_diagram_file(autosave)
+        return data, data.get("metadata", {}).get("journal_gen", 0)
+    if project and os.path.exists(project):
+        return read_diagram_file(project), 0
+    return {}, 0
+
+# ── Rückgängig / Wiederholen ───────────────────────────────────
+# Obergrenze für Verlauf samt gemerktem Zustand; älteste Einträge fallen zuerst heraus
+UNDO_MAX_BYTES = int(os.environ.get("DIAGRAMM_UNDO_MAX_MB", "64")) * 1024 * 1024
+
+def _json_size(obj):
+    """Größe als kompaktes JSON – Maß für Verlauf und Zustand."""
+    return len(json.dumps(obj, separators=(",", ":"), ensure_ascii=False))
+
+class UndoStack(QObject):
+    """
+    Verlauf aus kleinen Deltas statt Kopien: jedes Item hat eine feste ID,
+    gespeichert werden nur die geänderten Felder (bzw. der ganze Datensatz
+    beim Anlegen/Löschen). Alles aus einem Durchlauf der Ereignisschleife
+    – ein Batch, das Löschen der Auswahl – wird ein Eintrag; ein Ziehen
+    erst beim Loslassen der Maus. Der letzte bekannte Stand je Item
+    (_state) zählt mit gegen max_bytes.
+    """
+    changed = pyqtSignal()
+
+    def __init__(self, scene, max_bytes=UNDO_MAX_BYTES, parent=None):
+        super().__init__(parent)
+        self.scene     = scene
+        self.max_bytes = max_bytes
+        self._undo     = collections.deque()   # (Deltas, Größe), ältester links
+        self._redo     = []
+        self._bytes    = 0
+        self._uids     = {}      # Item → ID
+        self._items    = {}      # ID → Item (nur lebende)
+        self._state    = {}      # ID → letzter bekannter Datensatz
+        self._state_bytes = 0    # Größe von _state
+        self._next     = 0
+        self._pending  = {}      # ID → Datensatz vor der Änderung (None = neu)
+        self._tracking = False
+        self._applying = False
+        self._timer    = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._try_commit)
+
+    # ── Steuerung ──────────────────────────────────────────
+    def reset(self):
+        """Verlauf leeren, der jetzige Stand der Szene ist der Ausgangspunkt."""
+        self.pause()
+        self._items = rebase_items(self.scene)
+        self._uids  = {item: uid for uid, item in self._items.items()}
+        self._state = {uid: self._record(item) for uid, item in self._items.items()}
+        # Einmal als Ganzes messen; Klammern und Kommas ziehen wir ab
+        records = list(self._state.values())
+        self._state_bytes = _json_size(records) - len(records) - 1 if records else 0
+        self._next  = len(self._items)
+        self.scene.add_change_listener(self._on_change)
+        self._tracking = True
+
+    def pause(self):
+        """Aufzeichnung beenden und Verlauf leeren (z. B. während des Ladens)."""
+        if self._tracking:
+            self.scene.remove_change_listener(self._on_change)
+            self._tracking = False
+        self._timer.stop()
+        self._undo.clear()
+        self._redo.clear()
+        self._bytes = 0
+        self._uids, self._items, self._state, self._pending = {}, {}, {}, {}
+        self._state_bytes = 0
+        self.changed.emit()
+
+    def set_limit(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._evict()
+
+    def can_undo(self):
+        return bool(self._undo or self._pending)
+
+    def can_redo(self):
+        return bool(self._redo) and not self._pending
+
+    def total_bytes(self):
+        """Verlauf plus gemerkter Zustand."""
+        return self._bytes + self._state_bytes
+
+    # ── Aufzeichnen ────────────────────────────────────────
+    def _set_state(self, uid, rec):
+        self._drop_state(uid)
+        self._state[uid] = rec
+        self._state_bytes += _json_size(rec)
+
+    def _drop_state(self, uid):
+        old = self._state.pop(uid, None)
+        if old is not None:
+            self._state_bytes -= _json_size(old)
+
+    def _record(self, item):
+        if isinstance(item, NodeItem):
+            return node_to_record(item, self._uids[item])
+        return edge_to_record(item, self._uids)
+
+    def _on_change(self, kind, item=None):
+        if self._applying:
+            return
+        if kind in ("node_added", "edge_added"):
+            uid = self._next
+            self._next += 1
+            self._uids[item]  = uid
+            self._items[uid] = item
+            self._pending.setdefault(uid, None)
+        elif kind == "diagram_cleared":
+            for uid in self._items:
+                self._pending.setdefault(uid, self._state.get(uid))
+        else:
+            uid = self._uids.get(item)
+            if uid is None:
+                return
+            self._pending.setdefault(uid, self._state.get(uid))
+        if not self._timer.isActive():
+            self._timer.start(0)
+
+    def _try_commit(self):
+        if QApplication.mouseButtons() != Qt.NoButton:
+            self._timer.start(50)       # Ziehen läuft noch
+            return
+        self.commit()
+
+    def commit(self):
+        """Gesammelte Änderungen als einen Eintrag ablegen."""
+        self._timer.stop()
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        deltas, dead = [], []
+        for uid, before in pending.items():
+            item = self._items.get(uid)
+            alive = item is not None and item.scene() is self.scene
+            after = self._record(item) if alive else None
+            if alive:
+                self._set_state(uid, after)
+            else:
+                self._drop_state(uid)
+                dead.append(uid)
+            if before == after:
+                continue
+            is_node = isinstance(item, NodeItem)
+            if before is not None and after is not None:
+                # Nur geänderte Felder – beim Ziehen also x und y
+                keys = [key for key in after if before.get(key) != after[key]]
+                before = {key: before[key] for key in keys}
+                after  = {key: after[key] for key in keys}
+            deltas.append((uid, is_node, before, after))
+        for uid in dead:
+            self._uids.pop(self._items.pop(uid, None), None)
+        if deltas:
+            for _, size in self._redo:
+                self._bytes -= size
+            self._redo.clear()
+            size = _json_size(deltas)
+            self._undo.append((deltas, size))
+            self._bytes += size
+            self._evict()
+        self.changed.emit()
+
+    def _evict(self):
+        # Den neuesten Eintrag immer behalten, auch wenn er allein zu groß ist
+        while len(self._undo) > 1 and self.total_bytes() > self.max_bytes:
+            _, size = self._undo.popleft()
+            self._bytes -= size
+
+    # ── Abspielen ──────────────────────────────────────────
+    def undo(self):
+        self.commit()
+        if self._undo:
+            entry = self._undo.pop()
+            self._apply(entry[0], forward=False)
+            self._redo.append(entry)
+            self.changed.emit()
+
+    def redo(self):
+        self.commit()
+        if self._redo:
+            entry = self._redo.pop()
+            self._apply(entry[0], forward=True)
+            self._undo.append(entry)
+            self.changed.emit()
+
+    def _apply(self, deltas, forward):
+        """
+        Stellt den Stand vor (forward=False) bzw. nach den Deltas her.
+        Reihenfolge: Nodes anlegen/ändern, Edges anlegen/ändern, dann
+        Edges und zuletzt Nodes löschen.
+        """
+        upserts, removals = ([], []), ([], [])
+        for uid, is_node, before, after in deltas:
+            target = after if forward else before
+            if target is None:
+                removals[is_node].append(uid)
+            else:
+                upserts[not is_node].append((uid, is_node, target))
+        self._applying = True
+        try:
+            with self.scene.batch():
+                for uid, is_node, target in upserts[0] + upserts[1]:
+                    item = self._items.get(uid)
+                    if item is None:
+                        rec  = target
+                        item = record_to_node(rec) if is_node else record_to_edge(rec, self._items)
+                        self._items[uid] = item
+                        self._uids[item] = uid
+                        (self.scene.add_node if is_node else self.scene.add_edge)(item)
+                    else:
+                        rec = dict(self._state[uid], **target)
+                        (apply_node_record if is_node else apply_edge_record)(item, rec)
+                        self.scene.notify_item_changed(item)
+                    self._set_state(uid, rec)
+                for uid in removals[False] + removals[True]:
+                    item = self._items.pop(uid, None)
+                    if item is None:
+                        continue
+                    self._uids.pop(item, None)
+                    self._drop_state(uid)
+                    if isinstance(item, NodeItem):
+                        self.scene.remove_node(item)
+                    else:
+                        self.scene.remove_edge(item)
+        finally:
+            self._applying = False
+
+# ── Auto-Layout ────────────────────────────────────────────────
+# Beide Verfahren rechnen auf Positions-Arrays (numpy) und liefern
+# linke obere Ecken, auf das Raster gerundet.
+LAYOUT_MODES = {
+    "layered": "Hierarchisch (Bus-Baum)",
+    "force":   "Kräftebasiert",
+}
+LAYOUT_SWEEPS     = 4       # Auf-/Ab-Durchläufe der Kreuzungsminimierung
+LAYOUT_BLOCK_SIZE = 4_000_000   # Paare je Block bei der Abstoßung (Speicher)
+LAYOUT_GRAVITY    = 0.5     # Zug zur Mitte, hält Komponenten beisammen
+
+def _layout_arrays(nodes, edges):
+    """(Quelle, Ziel, Größen) als Arrays; Schleifen fallen heraus."""
+    index = {node: i for i, node in enumerate(nodes)}
+    src = np.fromiter((index[e.source] for e in edges), dtype=np.int64, count=len(edges))
+    dst = np.fromiter((index[e.dest] for e in edges), dtype=np.int64, count=len(edges))
+    keep = src != dst
+    sizes = np.array([(n.rect().width(), n.rect().height()) for n in nodes],
+                     dtype=float).reshape(-1, 2)
+    return src[keep], dst[keep], sizes
+
+def _adjacency(n, src, dst):
+    """Ungerichtete Nachbarschaft als CSR (indptr, indices)."""
+    a = np.concatenate((src, dst))
+    b = np.concatenate((dst, src))
+    order = np.argsort(a, kind="stable")
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(a, minlength=n), out=indptr[1:])
+    return indptr, b[order]
+
+def _neighbours(indptr, indices, frontier):
+    """Alle Nachbarn der Nodes in frontier (mit Wiederholungen)."""
+    starts = indptr[frontier]
+    counts = indptr[frontier + 1] - starts
+    total = int(counts.sum())
+    if not total:
+        return indices[:0]
+    offsets = np.repeat(starts - (np.cumsum(counts) - counts), counts) + np.arange(total)
+    return indices[offsets]
+
+def _group_ranks(groups):
+    """Laufende Nummer innerhalb gleicher, aufeinanderfolgender Werte."""
+    if not len(groups):
+        return groups
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+    lengths = np.diff(np.r_[starts, len(groups)])
+    return np.arange(len(groups)) - np.repeat(starts, lengths)
+
+def _snap(values, grid):
+    return np.round(values / grid) * grid
+
+def layered_layout(nodes, edges, grid):
+    """
+    Sugiyama-artig: Ebenen per Breitensuche ab den Wurzeln (Nodes ohne
+    eingehende Kante, die mit den meisten Abgängen zuerst), Reihenfolge
+    je Ebene per Baryzentrum, Komponenten nebeneinander. Einzelne Nodes
+    ohne Verbindung kommen als Block rechts daneben.
+    """
+    n = len(nodes)
+    src, dst, sizes = _layout_arrays(nodes, edges)
+    indptr, indices = _adjacency(n, src, dst)
+    degree = np.diff(indptr)
+    indeg  = np.bincount(dst, minlength=n)
+    outdeg = np.bincount(src, minlength=n)
+
+    # 1) Ebenen und Komponenten
+    layer = np.full(n, -1, dtype=np.int64)
+    comp  = np.full(n, -1, dtype=np.int64)
+    n_comp = 0
+    roots = np.lexsort((-outdeg, indeg > 0))
+    for root in roots[degree[roots] > 0]:
+        if layer[root] >= 0:
+            continue
+        frontier = np.array([root])
+        layer[root], comp[root] = 0, n_comp
+        depth = 0
+        while frontier.size:
+            nb = _neighbours(indptr, indices, frontier)
+            nb = np.unique(nb[layer[nb] < 0])
+            depth += 1
+            layer[nb], comp[nb] = depth, n_comp
+            frontier = nb
+        n_comp += 1
+    single = np.flatnonzero(layer < 0)
+    layer[single] = 0
+
+    # 2) Kreuzungen reduzieren: Nodes nach Mittelwert ihrer Nachbarn
+    #    in der Nachbarebene sortieren (innerhalb der Komponente)
+    linked = np.flatnonzero(comp >= 0)
+    max_layer = int(layer[linked].max()) if linked.size else 0
+    members = [linked[layer[linked] == lvl] for lvl in range(max_layer + 1)]
+    slot = np.zeros(n, dtype=np.int64)
+    for group in members:
+        slot[group] = np.arange(len(group))
+    pos = slot.astype(float)            # Start: Reihenfolge der Szene
+    down = layer[dst] - layer[src]
+    upper = np.where(down > 0, src, dst)[down != 0]
+    lower = np.where(down > 0, dst, src)[down != 0]
+
+    def sweep(lvl, targets, sources):
+        group = members[lvl]
+        mask = layer[targets] == lvl
+        t, s = slot[targets[mask]], sources[mask]
+        total = np.bincount(t, weights=pos[s], minlength=len(group))
+        count = np.bincount(t, minlength=len(group))
+        bary = np.where(count > 0, total / np.maximum(count, 1), pos[group])
+        order = np.lexsort((pos[group], bary, comp[group]))
+        pos[group[order]] = _group_ranks(comp[group][order])
+
+    for _ in range(LAYOUT_SWEEPS):
+        for lvl in range(1, max_layer + 1):
+            sweep(lvl, lower, upper)
+        for lvl in range(max_layer - 1, -1, -1):
+            sweep(lvl, upper, lower)
+
+    # 3) Spalten: unterste Ebene dicht gepackt, darüber jede Node über der
+    #    Mitte ihrer Kinder, ohne dass Nachbarn zusammenrücken als 1 Spalte
+    col = pos.copy()
+    stride = 4 * (n + 1)                # trennt die Komponenten im cummax
+    for lvl in range(max_layer - 1, -1, -1):
+        group = members[lvl]
+        mask = layer[upper] == lvl
+        t, s = slot[upper[mask]], lower[mask]
+        total = np.bincount(t, weights=col[s], minlength=len(group))
+        count = np.bincount(t, minlength=len(group))
+        order = np.lexsort((pos[group], comp[group]))
+        group, total, count = group[order], total[order], count[order]
+        rank = pos[group]
+        wish = np.where(count > 0, total / np.maximum(count, 1), rank)
+        shifted = wish - rank + comp[group] * stride
+        col[group] = np.maximum.accumulate(shifted) - comp[group] * stride + rank
+
+    # 4) Komponenten nebeneinander, Raster aus der größten Node
+    col_w = math.ceil((sizes[:, 0].max() + grid) / grid) * grid
+    row_h = math.ceil((sizes[:, 1].max() + 2 * grid) / grid) * grid
+    centres = np.zeros((n, 2))
+    right = 0.0
+    if linked.size:
+        c = comp[linked]
+        left = np.full(n_comp, np.inf)
+        np.minimum.at(left, c, col[linked])
+        span = np.full(n_comp, -np.inf)
+        np.maximum.at(span, c, col[linked])
+        width = span - left + 1
+        offset = np.r_[0, np.cumsum(width + 1)[:-1]]
+        centres[linked, 0] = (col[linked] - left[c] + offset[c]) * col_w
+        centres[linked, 1] = layer[linked] * row_h
+        right = (offset[-1] + width[-1] + 1) * col_w
+    if single.size:
+        per_row = max(1, math.ceil(math.sqrt(single.size)))
+        idx = np.arange(single.size)
+        centres[single, 0] = right + (idx % per_row) * col_w
+        centres[single, 1] = (idx // per_row) * row_h
+    return _snap(centres - sizes / 2, grid)
+
+def _remove_overlaps(x, y, sizes, gap, rounds=100):
+    """
+    Schiebt überlappende Nodes (Mittelpunkte x/y) auseinander, je Paar
+    entlang der Achse mit der kleineren Überdeckung, bis gap frei ist.
+    Nach x sortiert werden nur Nachbarn in Reichweite verglichen.
+    """
+    n = len(x)
+    half_w = sizes[:, 0] / 2 + gap / 2
+    half_h = sizes[:, 1] / 2 + gap / 2
+    reach = 2 * half_w.max()
+    for _ in range(rounds):
+        order = np.argsort(x, kind="stable")
+        xs, ys, hw, hh = x[order], y[order], half_w[order], half_h[order]
+        shift_x, shift_y = np.zeros(n), np.zeros(n)
+        found = False
+        for d in range(1, n):
+            dx = xs[d:] - xs[:-d]
+            if dx.min() >= reach:
+                break       # weiter entfernte Paare liegen noch weiter auseinander
+            dy = ys[d:] - ys[:-d]
+            need_x = hw[d:] + hw[:-d] - dx
+            need_y = hh[d:] + hh[:-d] - np.abs(dy)
+            hit = np.flatnonzero((need_x > 0) & (need_y > 0))
+            if not hit.size:
+                continue
+            found = True
+            nx, ny, ddy = need_x[hit], need_y[hit], dy[hit]
+            along_x = nx <= ny
+            px = np.where(along_x, nx / 2, 0.0)
+            py = np.where(along_x, 0.0, ny * np.where(ddy >= 0, 0.5, -0.5))
+            for shift, push in ((shift_x, px), (shift_y, py)):
+                shift += np.bincount(hit + d, weights=push, minlength=n)
+                shift -= np.bincount(hit, weights=push, minlength=n)
+        if not found:
+            break
+        x[order] += shift_x
+        y[order] += shift_y
+
+def force_layout(nodes, edges, grid, iterations=None, start=None):
+    """
+    Kräftebasiert (Fruchterman-Reingold): Abstoßung aller Paare in Blöcken,
+    Anziehung entlang der Edges, leichter Zug zur Mitte, abkühlende
+    Schrittweite; zum Schluss werden Überlappungen aufgelöst.
+    start: Anfangs-Mittelpunkte (sonst die aktuellen).
+    """
+    n = len(nodes)
+    src, dst, sizes = _layout_arrays(nodes, edges)
+    k = float(sizes.max() + 2 * grid)        # Wunschabstand
+    if start is None:
+        start = np.array([(nd.pos().x(), nd.pos().y()) for nd in nodes]).reshape(-1, 2) + sizes / 2
+    pos = np.array(start, dtype=float)
+    rng = np.random.default_rng(0)
+    side = k * math.sqrt(n)
+    spread = np.ptp(pos, axis=0)
+    if n > 1 and spread.max() < k:
+        # Alles auf einem Haufen: zufällig auf passender Fläche verteilen
+        pos = rng.uniform(0, side, size=(n, 2))
+    else:
+        # Bisherige Anordnung auf die passende Fläche strecken/stauchen
+        pos = (pos - pos.min(axis=0)) * (side / np.maximum(spread, k))
+    pos += rng.normal(scale=k * 0.01, size=pos.shape)
+    if iterations is None:
+        iterations = int(min(100, max(30, 3e7 / max(n * n, 1))))
+    temp = k * math.sqrt(n) / 10
+    cool = temp / (iterations + 1)
+    block = max(1, LAYOUT_BLOCK_SIZE // max(n, 1))
+    x, y = pos[:, 0].copy(), pos[:, 1].copy()
+    kk, eps = k * k, 1e-2 * k * k
+    for _ in range(iterations):
+        disp_x = np.empty(n)
+        disp_y = np.empty(n)
+        for lo in range(0, n, block):
+            dx = x[lo:lo + block, None] - x[None, :]
+            dy = y[lo:lo + block, None] - y[None, :]
+            force = dx * dx
+            force += dy * dy
+            np.maximum(force, eps, out=force)
+            np.divide(kk, force, out=force)
+            disp_x[lo:lo + block] = (dx * force).sum(1)
+            disp_y[lo:lo + block] = (dy * force).sum(1)
+        ex, ey = x[src] - x[dst], y[src] - y[dst]
+        pull = np.hypot(ex, ey) / k
+        disp_x += np.bincount(dst, weights=ex * pull, minlength=n) - np.bincount(src, weights=ex * pull, minlength=n)
+        disp_y += np.bincount(dst, weights=ey * pull, minlength=n) - np.bincount(src, weights=ey * pull, minlength=n)
+        disp_x -= (x - x.mean()) * LAYOUT_GRAVITY
+        disp_y -= (y - y.mean()) * LAYOUT_GRAVITY
+        length = np.maximum(np.hypot(disp_x, disp_y), 1e-9)
+        step = np.minimum(length, temp) / length
+        x += disp_x * step
+        y += disp_y * step
+        temp = max(temp - cool, k * 0.01)
+    # Ein Raster Luft: das Runden auf das Raster erzeugt keine neuen Überlappungen
+    _remove_overlaps(x, y, sizes, grid)
+    pos = np.column_stack((x, y))
+    return _snap(pos - sizes / 2, grid)
+
+def auto_layout(nodes, edges, mode, grid):
+    """Neue linke obere Ecken (n×2) für nodes, Mode aus LAYOUT_MODES."""
+    if not nodes:
+        return np.zeros((0, 2))
+    if mode == "layered":
+        return layered_layout(nodes, edges, grid)
+    return force_layout(nodes, edges, grid)
+
+# ── Laden im Hintergrund ───────────────────────────────────────
+# Große JSON-Dateien werden gestreamt statt komplett geparst
+STREAM_THRESHOLD_BYTES = 32 * 1024 * 1024
+STREAM_CHUNK_RECORDS   = 2000
+
+class DiagramParseThread(QThread):
+    """
+    Liest/parst die Datei im Worker-Thread – keine Qt-Items hier!
+    Mit record_queue werden Datensätze gestreamt (iter_diagram_json) und
+    in Paketen übergeben; die begrenzte Queue bremst den Parser, wenn
+    der Aufbau der Items nicht hinterherkommt.
+    """
+    parsed = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, path, record_queue=None, parent=None):
+        super().__init__(parent)
+        self.path         = path
+        self.record_queue = record_queue
+        self.cancelled    = False
+
+    def run(self):
+        if self.record_queue is not None:
+            self._run_streaming()
+            return
+        try:
+            data = read_diagram_file(self.path)
+        except Exception as exc:
+            self.failed.emit(str(exc))
+            return
+        self.parsed.emit(data)
+
+    def _put(self, item):
+        while not self.cancelled:
+            try:
+                self.record_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run_streaming(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                chunk = []
+                for kind, rec in iter_diagram_json(f):
+                    if kind == "metadata":
+                        if not self._put(("metadata", rec)):
+                            return
+                        continue
+                    chunk.append((kind, rec))
+                    if len(chunk) >= STREAM_CHUNK_RECORDS:
+                        if not self._put(("records", chunk, f.buffer.tell())):
+                            return
+                        chunk = []
+                if not self._put(("records", chunk, f.buffer.tell())):
+                    return
+        except Exception as exc:
+            self._put(("error", str(exc)))
+            return
+        self._put(("done",))
+
+class ChunkedDiagramBuilder(QObject):
+    """
+    Erzeugt Nodes/Edges auf dem GUI-Thread in Zeitscheiben, gesteuert
+    über die Event-Loop. Reihenfolge: sichtbare Nodes, Edges zwischen
+    ihnen (→ visible_ready), danach der Rest.
+    """
+    progress      = pyqtSignal(int, int)
+    visible_ready = pyqtSignal()
+    finished      = pyqtSignal()
+
+    SLICE_MS = 25   # Rechenzeit pro Event-Loop-Durchlauf
+
+    def __init__(self, scene, data, visible_rect, parent=None):
+        super().__init__(parent)
+        self.scene   = scene
+        self._nodes  = list(data.get("nodes", []))
+        self._edges  = list(data.get("edges", []))
+        self._items  = [None] * len(self._nodes)
+        self._visible_rect = visible_rect
+        self._done   = 0
+        self._total  = len(self._nodes) + len(self._edges)
+        self._tasks  = None
+        self._cancelled = False
+        self._timer  = QTimer(self)
+        self._timer.timeout.connect(self._step)
+
+    def start(self):
+        self._tasks = self._run()
+        self._timer.start(0)
+
+    def cancel(self):
+        self._cancelled = True
+        self._timer.stop()
+
+    WAIT = object()   # _run(): gerade nichts zu tun, Zeitscheibe beenden
+
+    def _step(self):
+        deadline = time.perf_counter() + self.SLICE_MS / 1000.0
+        try:
+            # Ein Batch je Zeitscheibe – nie über die Event-Loop hinweg, damit
+            # Bearbeitungen während des Ladens sofort wirken. Höchstens
+            # BATCH_REPLAY_MAX Items: die Tabelle folgt dann zeilenweise,
+            # statt bei jeder Scheibe komplett neu aufgebaut zu werden
+            with self.scene.batch():
+                for _ in range(BATCH_REPLAY_MAX):
+                    if next(self._tasks) is self.WAIT or time.perf_counter() > deadline:
+                        break
+        except StopIteration:
+            self._timer.stop()
+            if self._cancelled:
+                return
+            self.progress.emit(self._total, self._total)
+            self.finished.emit()
+            return
+        self.progress.emit(self._done, self._total)
+
+    def _run(self):
+        visible = self._visible_rect
+        vis_nodes, rest_nodes = [], []
+        for idx, rec in enumerate(self._nodes):
+            r = QRectF(rec.get("x", 0), rec.get("y", 0),
+                       rec.get("width", 100), rec.get("height", 60))
+            (vis_nodes if r.intersects(visible) else rest_nodes).append(idx)
+        vis_set = set(vis_nodes)
+        vis_edges, rest_edges = [], []
+        for idx, rec in enumerate(self._edges):
+            both = rec.get("source") in vis_set and rec.get("dest") in vis_set
+            (vis_edges if both else rest_edges).append(idx)
+
+        for phase_nodes, phase_edges in ((vis_nodes, vis_edges), (rest_nodes, rest_edges)):
+            for idx in phase_nodes:
+                node = record_to_node(self._nodes[idx])
+                self.scene.add_node(node)
+                self._items[idx] = node
+                self._done += 1
+                yield
+            for idx in phase_edges:
+                self._add_edge(self._edges[idx])
+                self._done += 1
+                yield
+            if phase_nodes is vis_nodes:
+                self.visible_ready.emit()
+
+    def _add_edge(self, rec):
+        """Edge anlegen – außer, ein Endpunkt wurde inzwischen gelöscht."""
+        source, dest = self._items[rec.get("source")], self._items[rec.get("dest")]
+        if self.scene.has_node(source) and self.scene.has_node(dest):
+            self.scene.add_edge(record_to_edge(rec, self._items))
+
+# Papierformate (Toolbar & Batch-Export): Name → Breite, Höhe in mm (Hochformat)
+PAGE_FORMATS = {
+    "A4 Hoch": (210, 297),
+    "A4 Quer": (210, 297),
+    "A3 Hoch": (297, 420),
+    "A3 Quer": (297, 420),
+    "A2 Hoch": (420, 594),
+    "A2 Quer": (420, 594),
+    "A1 Hoch": (594, 841),
+    "A1 Quer": (594, 841),
+    "A0 Hoch": (841, 1189),
+    "A0 Quer": (841, 1189),
+}
+
+def page_size_mm(choice):
+    """(Breite, Höhe) in mm für einen Eintrag aus PAGE_FORMATS."""
+    if choice not in PAGE_FORMATS:
+        raise ValueError(f"Unbekanntes Papierformat: {choice}")
+    w_mm, h_mm = PAGE_FORMATS[choice]
+    if "Quer" in choice:
+        w_mm, h_mm = h_mm, w_mm
+    return w_mm, h_mm
+
+# Bild-Export in Streifen: Speicher aller offenen Streifen (ARGB32)
+EXPORT_TILE_BYTES = 64 * 1024 * 1024
+# Worker-Threads zum Rastern
+EXPORT_THREADS    = os.cpu_count() or 1
+
+def adler32_combine(adler1, adler2, len2):
+    """Adler-32 von A+B aus adler32(A), adler32(B) und len(B) (wie zlib)."""
+    base = 65521
+    rem  = len2 % base
+    sum1 = adler1 & 0xFFFF
+    sum2 = (rem * sum1) % base
+    sum1 += (adler2 & 0xFFFF) + base - 1
+    sum2 += (adler1 >> 16) + (adler2 >> 16) + base - rem
+    return (sum1 % base) | ((sum2 % base) << 16)
+
+class PngStreamWriter:
+    """
+    Schreibt ein PNG zeilenweise: IDAT-Daten werden beim Eintreffen der
+    Streifen geschrieben, das ganze Bild liegt nie im Speicher.
+    Jeder Streifen wird als eigener Deflate-Abschnitt (Sync-Flush)
+    komprimiert; encode_rows() ist daher unabhängig und darf parallel
+    in Worker-Threads laufen, write_encoded() hängt in Reihenfolge an.
+    """
+    def __init__(self, f, width, height, dpi=None):
+        self.f      = f
+        self.width  = width
+        self.height = height
+        self._rows  = 0
+        self._adler = 1
+        f.write(b"\x89PNG\r\n\x1a\n")
+        # 8 Bit RGB, kein Interlacing
+        self._chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        if dpi:
+            ppm = round(dpi / 0.0254)
+            self._chunk(b"pHYs", struct.pack(">IIB", ppm, ppm, 1))
+        # zlib-Kopf, die Deflate-Abschnitte folgen in weiteren IDAT-Chunks
+        self._chunk(b"IDAT", b"\x78\x9c")
+
+    def _chunk(self, tag, data):
+        self.f.write(struct.pack(">I", len(data)))
+        self.f.write(tag)
+        self.f.write(data)
+        self.f.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(tag)) & 0xFFFFFFFF))
+
+    @staticmethod
+    def encode_rows(image, width, rows):
+        """Komprimiert die ersten rows Zeilen → (Daten, Adler-32, Rohlänge)."""
+        rgb = image.convertToFormat(QImage.Format_RGB888)
+        bpl = rgb.bytesPerLine()
+        ptr = rgb.constBits()
+        ptr.setsize(bpl * rgb.height())
+        buf = ptr.asstring()
+        line = width * 3
+        # Filtertyp 0 vor jeder Zeile
+        raw = b"".join(b"\x00" + buf[y * bpl:y * bpl + line] for y in range(rows))
+        packer = zlib.compressobj(6, zlib.DEFLATED, -15)
+        data = packer.compress(raw) + packer.flush(zlib.Z_SYNC_FLUSH)
+        return data, zlib.adler32(raw), len(raw)
+
+    def write_encoded(self, encoded, rows):
+        data, adler, size = encoded
+        self._chunk(b"IDAT", data)
+        self._adler = adler32_combine(self._adler, adler, size)
+        self._rows += rows
+
+    def write_rows(self, image, rows=None):
+        """Hängt die ersten rows Zeilen von image an (Breite = self.width)."""
+        rows = image.height() if rows is None else rows
+        self.write_encoded(self.encode_rows(image, self.width, rows), rows)
+
+    def close(self):
+        if self._rows != self.height:
+            raise ValueError(f"PNG unvollständig: {self._rows} von {self.height} Zeilen")
+        # Leerer Schlussblock + Prüfsumme
+        final = zlib.compressobj(6, zlib.DEFLATED, -15).flush(zlib.Z_FINISH)
+        self._chunk(b"IDAT", final + struct.pack(">I", self._adler))
+        self._chunk(b"IEND", b"")
+
+class SceneSnapshot:
+    """
+    Unveränderliche Aufzeichnung der Szene als QPicture-Bänder. capture()
+    läuft auf dem GUI-Thread; danach wird kein Item mehr angefasst, und
+    beliebig viele Threads können die Bänder gleichzeitig in eigene
+    QImages abspielen – auch während in der Szene weitergearbeitet wird.
+    """
+    def __init__(self, bands):
+        self._bands = bands   # [(Szenen-Rechteck, QPicture) oder None]
+
+    @classmethod
+    def capture(cls, scene, rects):
+        """Nimmt je Szenen-Rechteck ein Band auf (None → leeres Band)."""
+        bands = []
+        with scene.full_detail():
+            for rect in rects:
+                if rect is None or rect.isEmpty():
+                    bands.append(None)
+                    continue
+                picture = QPicture()
+                painter = QPainter(picture)
+                # Nur Items im Band werden aufgezeichnet (Szenen-Index)
+                scene.render(painter, QRectF(0, 0, rect.width(), rect.height()),
+                             rect, Qt.IgnoreAspectRatio)
+                painter.end()
+                bands.append((QRectF(rect), picture))
+        return cls(bands)
+
+    def __len__(self):
+        return len(self._bands)
+
+    def draw(self, painter, index, origin):
+        """Spielt Band index ab; painter in Szenen-Einheiten, origin = Szenen-Nullpunkt."""
+        band = self._bands[index]
+        if band is None:
+            return
+        rect, picture = band
+        # QPicture skaliert beim Abspielen mit Geräte-DPI / Aufnahme-DPI – aufheben
+        device = painter.device()
+        painter.save()
+        painter.translate(rect.left() - origin.x(), rect.top() - origin.y())
+        painter.scale(picture.logicalDpiX() / device.logicalDpiX(),
+                      picture.logicalDpiY() / device.logicalDpiY())
+        painter.drawPicture(QPointF(0, 0), picture)
+        painter.restore()
+
+def image_page_layout(rows, rect, img_w, img_h, dpi):
+    """
+    Geometrie einer Bild-Exportseite: Kopftabelle aus rows und
+    Platzierung des Szenen-Rechtecks rect darunter (alles in Pixeln).
+    """
+    mm2px  = lambda mm: int(mm * dpi / 25.4)
+    probe  = QImage(1, 1, QImage.Format_ARGB32_Premultiplied)
+    probe.setDotsPerMeterX(round(dpi / 0.0254))
+    probe.setDotsPerMeterY(round(dpi / 0.0254))
+    painter = QPainter(probe)
+    font = painter.font()
+    font.setPointSize(10)
+    painter.setFont(font)
+    fm = painter.fontMetrics()
+    painter.end()
+
+    margin     = mm2px(10)
+    # Puffer in mm ins Pixel umrechnen (z.B. 5 mm extra)
+    padding_px = mm2px(5)
+    row_h_px   = fm.height() + 8
+    # Erste Spalte: Label-Breite + Puffer, zweite: Value-Breite + Puffer
+    col1_px    = fm.horizontalAdvance(max(label for label, _ in rows)) + padding_px
+    col2_px    = fm.horizontalAdvance(max(val for _, val in rows)) + padding_px
+    table_h_px = row_h_px * len(rows)
+    # Diagramm direkt unter der Tabelle, 5mm Abstand
+    top     = margin + table_h_px + mm2px(5)
+    avail_w = img_w - 2*margin
+    avail_h = img_h - top
+    return {
+        "rows": rows, "font": font, "width": img_w, "height": img_h,
+        "margin": margin, "row_h": row_h_px, "col1": col1_px, "col2": col2_px,
+        "table_h": table_h_px, "top": top, "rect": QRectF(rect),
+        "scale": min(avail_w/rect.width(), avail_h/rect.height()),
+    }
+
+def image_strip_source(layout, y0, rows):
+    """Szenen-Ausschnitt, der in den Bildzeilen [y0, y0+rows) liegt (oder None)."""
+    rect, scale, top = layout["rect"], layout["scale"], layout["top"]
+    vis_top    = max(y0, top)
+    vis_bottom = min(y0 + rows, top + rect.height() * scale)
+    if vis_bottom <= vis_top:
+        return None
+    src_top = (vis_top - top) / scale
+    src_h   = (vis_bottom - vis_top) / scale + 1.0 / scale
+    return QRectF(rect.left(), rect.top() + src_top, rect.width(), src_h)
+
+def paint_image_strip(image, layout, snapshot, band, y0):
+    """
+    Zeichnet die Bildzeilen ab y0 (Kopftabelle + Band band aus snapshot)
+    in image. Greift nur auf layout und snapshot zu – threadsicher.
+    """
+    rows   = layout["rows"]
+    margin = layout["margin"]
+    row_h  = layout["row_h"]
+    col1   = layout["col1"]
+    col2   = layout["col2"]
+    table_w, table_h = col1 + col2, layout["table_h"]
+    # Position der Tabelle
+    table_x = table_y = margin
+
+    image.fill(Qt.white)
+    painter = QPainter(image)
+    painter.setRenderHint(QPainter.Antialiasing)
+    painter.translate(0, -y0)
+    painter.setPen(Qt.black)
+    painter.setFont(layout["font"])
+
+    # Tabelle nur zeichnen, wenn sie im Streifen liegt
+    if table_y - y0 < image.height() and table_y + table_h >= y0:
+        # Rahmen & Gitterlinien
+        painter.drawRect(table_x, table_y, table_w, table_h)
+        for i in range(1, len(rows)):
+            y = table_y + row_h * i
+            painter.drawLine(table_x, y, table_x + table_w, y)
+        painter.drawLine(table_x + col1, table_y, table_x + col1, table_y + table_h)
+
+        # Zellen-Texte mit Umbruch
+        for i, (lbl, val) in enumerate(rows):
+            cell_y = table_y + row_h * i
+            painter.drawText(QRect(table_x + 2, cell_y + 2, col1 - 4, row_h - 4),
+                             Qt.AlignLeft | Qt.AlignVCenter, lbl)
+            painter.drawText(QRect(table_x + col1 + 2, cell_y + 2, col2 - 4, row_h - 4),
+                             Qt.AlignLeft | Qt.AlignVCenter | Qt.TextWordWrap, val)
+
+    # Diagramm-Band unter der Tabelle
+    painter.translate(margin, layout["top"])
+    painter.scale(layout["scale"], layout["scale"])
+    snapshot.draw(painter, band, layout["rect"].topLeft())
+    painter.end()
+
+def draw_overlap_marks(painter, area, overlap, neighbours):
+    """
+    Klebemarken für den Poster-Export: gestrichelte Linie, wo der
+    überlappende Streifen zur Nachbarseite beginnt, Passkreuze an den
+    Enden und die Nummer der Nachbarseite. neighbours: Seite → Nummer/None.
+    """
+    if overlap <= 0:
+        return
+    painter.save()
+    pen = QPen(QColor("#808080"))
+    pen.setWidthF(overlap / 40.0)
+    pen.setStyle(Qt.DashLine)
+    painter.setPen(pen)
+    cross = overlap / 4.0
+    left, right = area.left() + overlap, area.right() - overlap
+    top, bottom = area.top() + overlap, area.bottom() - overlap
+    lines = {
+        "left":   QLineF(left, area.top(), left, area.bottom()),
+        "right":  QLineF(right, area.top(), right, area.bottom()),
+        "top":    QLineF(area.left(), top, area.right(), top),
+        "bottom": QLineF(area.left(), bottom, area.right(), bottom),
+    }
+    for side, number in neighbours.items():
+        if number is None:
+            continue
+        line = lines[side]
+        painter.setPen(pen)
+        painter.drawLine(line)
+        solid = QPen(pen)
+        solid.setStyle(Qt.SolidLine)
+        painter.setPen(solid)
+        for p in (line.p1(), line.p2()):
+            painter.drawLine(QLineF(p.x() - cross, p.y(), p.x() + cross, p.y()))
+            painter.drawLine(QLineF(p.x(), p.y() - cross, p.x(), p.y() + cross))
+        # Beschriftung im Überlappungsstreifen
+        band = {
+            "left":   QRectF(area.left(), area.top(), overlap, area.height()),
+            "right":  QRectF(right, area.top(), overlap, area.height()),
+            "top":    QRectF(area.left(), area.top(), area.width(), overlap),
+            "bottom": QRectF(area.left(), bottom, area.width(), overlap),
+        }[side]
+        painter.drawText(band, Qt.AlignCenter | Qt.TextWordWrap, f"▸ {number}")
+    painter.restore()
+
+# ── Export-Cache ───────────────────────────────────────────────
+# Fertige Exporte, abgelegt unter einem Fingerabdruck des Inhalts.
+# Version erhöhen, wenn sich die Ausgabe des Renderers ändert.
+EXPORT_CACHE_VERSION   = 2
+EXPORT_CACHE_DIR       = os.environ.get(
+    "DIAGRAMM_EXPORT_CACHE",
+    os.path.join(os.path.expanduser("~"), ".diagramm_editor", "export_cache"))
+EXPORT_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+def diagram_fingerprint(metadata, node_records, edge_records, options):
+    """
+    SHA-256 über Metadaten, Nodes, Edges und Export-Optionen. Die
+    Datensätze werden einzeln in den Hash geschrieben, nie gesammelt.
+    """
+    digest = hashlib.sha256()
+    dump = lambda obj: json.dumps(obj, sort_keys=True, ensure_ascii=False,
+                                  separators=(",", ":")).encode("utf-8")
+    digest.update(dump({"version": EXPORT_CACHE_VERSION, "options": options,
+                        "metadata": metadata}))
+    for tag, records in ((b"N", node_records), (b"E", edge_records)):
+        for rec in records:
+            digest.update(tag)
+            digest.update(dump(rec))
+    return digest.hexdigest()
+
+class ExportCache:
+    """
+    Export-Artefakte auf der Platte, Schlüssel = diagram_fingerprint.
+    Größenbegrenzt, verdrängt wird nach letzter Nutzung (mtime). Alle
+    Dateioperationen sind atomar, mehrere Prozesse (GUI, Batch-Worker)
+    können denselben Ordner teilen.
+    """
+    def __init__(self, folder=EXPORT_CACHE_DIR, max_bytes=EXPORT_CACHE_MAX_BYTES):
+        self.folder    = folder
+        self.max_bytes = max_bytes
+
+    def _entry(self, key, suffix):
+        return os.path.join(self.folder, key + suffix.lower())
+
+    def fetch(self, key, dest) -> bool:
+        """Kopiert einen Treffer nach dest; False, wenn nichts im Cache ist."""
+        entry = self._entry(key, os.path.splitext(dest)[1])
+        try:
+            with open(entry, "rb") as src:
+                atomic_write(dest, lambda f: shutil.copyfileobj(src, f), mode="wb")
+            os.utime(entry)   # zuletzt benutzt → hinten in der LRU-Reihenfolge
+        except FileNotFoundError:
+            return False
+        return True
+
+    def store(self, key, path):
+        """Legt die fertige Datei path unter key ab und räumt ggf. auf."""
+        os.makedirs(self.folder, exist_ok=True)
+        with open(path, "rb") as src:
+            atomic_write(self._entry(key, os.path.splitext(path)[1]),
+                         lambda f: shutil.copyfileobj(src, f), mode="wb")
+        self.evict()
+
+    def evict(self):
+        """Löscht die am längsten unbenutzten Einträge bis unter max_bytes."""
+        entries, total = [], 0
+        with os.scandir(self.folder) as it:
+            for entry in it:
+                if not entry.is_file() or entry.name.startswith(".~"):
+                    continue
+                st = entry.stat()
+                entries.append((st.st_mtime, st.st_size, entry.path))
+                total += st.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass   # von einem anderen Prozess schon verdrängt
+            total -= size
+
+    def clear(self):
+        if os.path.isdir(self.folder):
+            shutil.rmtree(self.folder, ignore_errors=True)
+
+class JobThread(QThread):
+    """Führt eine vorbereitete Funktion im Hintergrund aus (Export, Journal)."""
+    failed = pyqtSignal(str)
+
+    def __init__(self, job, parent=None):
+        super().__init__(parent)
+        self.job = job
+
+    def run(self):
+        try:
+            self.job()
+        except Exception as exc:
+            self.failed.emit(str(exc))
+
+class StreamingDiagramBuilder(ChunkedDiagramBuilder):
+    """
+    Baut Items, während DiagramParseThread die Datei noch streamt. Die
+    Szene wird erst mit dem ersten Paket geleert; Edges, deren Nodes
+    noch fehlen, warten bis zum Ende.
+    """
+    metadata = pyqtSignal(dict)
+    failed   = pyqtSignal(str)
+
+    def __init__(self, scene, record_queue, total_bytes, parent=None):
+        super().__init__(scene, {}, QRectF(), parent)
+        self._queue = record_queue
+        self._total = max(total_bytes, 1)
+        self._visible_emitted = False
+
+    def _run(self):
+        cleared = False
+        pending_edges = []
+        while True:
+            try:
+                msg = self._queue.get_nowait()
+            except queue.Empty:
+                yield self.WAIT
+                continue
+            if not cleared:
+                self.scene.clear_diagram()
+                cleared = True
+            if msg[0] == "metadata":
+                self.metadata.emit(msg[1])
+            elif msg[0] == "records":
+                _, records, bytes_read = msg
+                for kind, rec in records:
+                    if kind == "node":
+                        node = record_to_node(rec)
+                        self.scene.add_node(node)
+                        self._items.append(node)
+                    elif max(rec["source"], rec["dest"]) < len(self._items):
+                        self._add_edge(rec)
+                    else:
+                        pending_edges.append(rec)
+                    yield
+                self._done = bytes_read
+                if self._items and not self._visible_emitted:
+                    self._visible_emitted = True
+                    self.visible_ready.emit()
+            elif msg[0] == "error":
+                self.failed.emit(msg[1])
+                return
+            else:   # "done"
+                for rec in pending_edges:
+                    self._add_edge(rec)
+                    yield
+                if not self._visible_emitted:
+                    self.visible_ready.emit()
+                return
+
 class MainWindow(QMainWindow):
+    interactive = True      # Batch-Modus: kein Journal, kein Undo, kein Suchindex
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Diagramm-Editor")
@@ -1028,6 +4248,26 @@ class MainWindow(QMainWindow):
         self.connect_template = None
         self.custom_connect   = False
         self.custom_params    = None
+        self._load_thread     = None
+        self._load_builder    = None
+        self._export_thread   = None
+        self.export_cache     = ExportCache()
+        self.project_path     = None
+        self._loading_path    = None
+        self.journal          = None
+        self.undo_stack       = UndoStack(self.scene, parent=self)
+        self.undo_stack.changed.connect(self._update_undo_actions)
+        self.search_index     = None
+        self._search_hits     = []
+        self._search_pos      = 0
+        self.validator        = None
+        self.scene.diagram_cleared.connect(self.clear_analysis)
+        if self.interactive:
+            self.search_index = SearchIndex(self.scene)
+            self.validator = TopologyValidator(self.scene, parent=self)
+            self.validator.changed.connect(self.update_rule_list)
+            self.undo_stack.reset()
+            self._start_session()
         self.update_table()
         
 
@@ -1039,6 +4279,26 @@ class MainWindow(QMainWindow):
         add_node_action.triggered.connect(self.add_node)
         toolbar.addAction(add_node_action)
 
+        layout_action = QAction("Auto-Layout", self)
+        layout_action.setToolTip("Knoten automatisch anordnen (hierarchisch oder kräftebasiert)")
+        layout_action.triggered.connect(self.auto_layout)
+        toolbar.addAction(layout_action)
+
+        check_action = QAction("Plan prüfen", self)
+        check_action.setToolTip("Kreuzende Verbindungen und überlappende Knoten suchen")
+        check_action.triggered.connect(self.run_analysis)
+        toolbar.addAction(check_action)
+
+        self.action_undo = QAction("Rückgängig", self)
+        self.action_undo.setToolTip("Letzte Änderung rückgängig machen (Strg+Z)")
+        self.action_undo.triggered.connect(self.undo)
+        toolbar.addAction(self.action_undo)
+
+        self.action_redo = QAction("Wiederholen", self)
+        self.action_redo.setToolTip("Rückgängig gemachte Änderung wiederholen (Strg+Y)")
+        self.action_redo.triggered.connect(self.redo)
+        toolbar.addAction(self.action_redo)
+
         new_page_action = QAction("Neue Seite", self)
         new_page_action.triggered.connect(self.new_page)
         toolbar.addAction(new_page_action)
@@ -1051,6 +4311,11 @@ class MainWindow(QMainWindow):
         load_action.triggered.connect(self.load_diagram)
         toolbar.addAction(load_action)
 
+        convert_action = QAction("Konvertieren", self)
+        convert_action.setToolTip("Diagramm zwischen JSON und binärem .diax-Format umwandeln")
+        convert_action.triggered.connect(self.convert_diagram)
+        toolbar.addAction(convert_action)
+
         export_img_action = QAction("Als Bild exportieren", self)
         export_img_action.triggered.connect(self.export_image)
         toolbar.addAction(export_img_action)
@@ -1059,6 +4324,16 @@ class MainWindow(QMainWindow):
         export_pdf_action.triggered.connect(self.export_pdf)
         toolbar.addAction(export_pdf_action)
 
+        export_poster_action = QAction("Als PDF-Poster exportieren", self)
+        export_poster_action.setToolTip("Fester Maßstab, über mehrere Seiten mit Klebekanten")
+        export_poster_action.triggered.connect(self.export_pdf_poster)
+        toolbar.addAction(export_poster_action)
+
+        clear_cache_action = QAction("Export-Cache leeren", self)
+        clear_cache_action.setToolTip("Zwischengespeicherte Exporte löschen")
+        clear_cache_action.triggered.connect(self.clear_export_cache)
+        toolbar.addAction(clear_cache_action)
+
         export_table_action = QAction("Tabelle exportieren", self)
         export_table_action.triggered.connect(self.export_table)
         toolbar.addAction(export_table_action)
@@ -1087,20 +4362,65 @@ class MainWindow(QMainWindow):
         self.action_grid_down.triggered.connect(self.on_grid_down)
         toolbar.addAction(self.action_grid_down)
         
+        self.action_toggle_lod = QAction("Detailstufen", self, checkable=True)
+        self.action_toggle_lod.setChecked(True)
+        self.action_toggle_lod.setToolTip("Beim Herauszoomen Texte ausblenden und Formen vereinfachen")
+        self.action_toggle_lod.triggered.connect(self.toggle_lod)
+        toolbar.addAction(self.action_toggle_lod)
+
+        self.action_lod_levels = QAction("Detail-Schwellen…", self)
+        self.action_lod_levels.setToolTip("Zoomstufen für Texte und vereinfachte Darstellung einstellen")
+        self.action_lod_levels.triggered.connect(self.configure_lod_levels)
+        toolbar.addAction(self.action_lod_levels)
+
         self.action_connect_mode = QAction("Verbindungsmodus", self, checkable=True)
         self.action_connect_mode.setToolTip("Klicke zum Starten: Wähle zuerst einen Verbindungstyp, dann zwei Nodes")
         self.action_connect_mode.triggered.connect(self.toggle_connect_mode)
         toolbar.addAction(self.action_connect_mode)
 
         self.cb_page = QComboBox()
-        self.cb_page.addItems([
-            "A4 Hoch",
-            "A4 Quer",
-            "A3 Hoch",
-            "A3 Quer"
-        ])
+        self.cb_page.addItems(PAGE_FORMATS)
         toolbar.addSeparator()
         toolbar.addWidget(self.cb_page)
+
+        # Auflösung für den Bild-Export
+        self.sb_dpi = QSpinBox()
+        self.sb_dpi.setRange(72, 1200)
+        self.sb_dpi.setSingleStep(50)
+        self.sb_dpi.setValue(300)
+        self.sb_dpi.setSuffix(" dpi")
+        self.sb_dpi.setToolTip("Auflösung für 'Als Bild exportieren'")
+        toolbar.addWidget(self.sb_dpi)
+
+        # Node-Cache (pro Dokument, wird mit gespeichert)
+        self.cb_node_cache = QComboBox()
+        self.cb_node_cache.setToolTip("Zwischenspeicher für Knoten – beschleunigt Verschieben großer Pläne")
+        for label, mode in (("Cache: Aus", "none"), ("Cache: Gerät", "device"), ("Cache: Item", "item")):
+            self.cb_node_cache.addItem(label, mode)
+        self.cb_node_cache.currentIndexChanged.connect(self.on_node_cache_changed)
+        toolbar.addWidget(self.cb_node_cache)
+
+        # Linienführung (pro Dokument, wird mit gespeichert)
+        self.cb_edge_routing = QComboBox()
+        self.cb_edge_routing.setToolTip("Verbindungen gerade oder rechtwinklig um die Knoten herum führen")
+        for mode, label in EDGE_ROUTING_MODES.items():
+            self.cb_edge_routing.addItem(label, mode)
+        self.cb_edge_routing.currentIndexChanged.connect(self.on_edge_routing_changed)
+        toolbar.addWidget(self.cb_edge_routing)
+
+        # Suche über Texte, Adressen, Standort und Verbindungstexte
+        self.le_search = QLineEdit()
+        self.le_search.setPlaceholderText("Suchen… (z. B. 1.1.*)")
+        self.le_search.setClearButtonEnabled(True)
+        self.le_search.setMaximumWidth(220)
+        self.le_search.setToolTip("Präfix-Suche, * und ? als Platzhalter; Enter springt zum nächsten Treffer")
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(150)
+        self._search_timer.timeout.connect(self.find_matches)
+        self.le_search.textChanged.connect(self._search_timer.start)
+        self.le_search.returnPressed.connect(self.next_match)
+        toolbar.addWidget(self.le_search)
         
         zoom_in_sc = QShortcut(QKeySequence.ZoomIn, self)
         zoom_out_sc = QShortcut(QKeySequence.ZoomOut, self)
@@ -1112,6 +4432,9 @@ class MainWindow(QMainWindow):
         QShortcut(QKeySequence("Ctrl+O"),      self, activated=self.load_diagram)
         QShortcut(QKeySequence("Ctrl+S"),      self, activated=self.save_diagram)
         QShortcut(QKeySequence("Ctrl+Q"),      self, activated=self.close)       # schließt das Fenster
+        QShortcut(QKeySequence.Undo,           self, activated=self.undo)
+        QShortcut(QKeySequence.Redo,           self, activated=self.redo)
+        QShortcut(QKeySequence.Find,           self, activated=self.focus_search)
 
         # Diagramm-Elemente
         QShortcut(QKeySequence("Ctrl+Shift+N"), self, activated=self.add_node)
@@ -1139,11 +4462,28 @@ class MainWindow(QMainWindow):
         self.addDockWidget(Qt.RightDockWidgetArea, self.template_dock)
 
         # Tabelle rechts unten
-        self.table = QTableWidget(0, 4)
-        self.table.cellDoubleClicked.connect(self.on_table_double_click)
-        self.table.setHorizontalHeaderLabels(["Protokoll", "Adresse", "Form/Verbindung", "Standort/Position"])
+        self.table_model = DiagramTableModel(self.scene, self)
+        self.table_proxy = QSortFilterProxyModel(self)
+        self.table_proxy.setSourceModel(self.table_model)
+        self.table_proxy.setFilterKeyColumn(-1)          # in allen Spalten filtern
+        self.table_proxy.setFilterCaseSensitivity(Qt.CaseInsensitive)
+        self.table = QTableView()
+        self.table.setModel(self.table_proxy)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSortingEnabled(True)
+        self.table.sortByColumn(-1, Qt.AscendingOrder)    # Reihenfolge wie in der Szene
+        self.table.doubleClicked.connect(self.on_table_double_click)
+        self.le_table_filter = QLineEdit()
+        self.le_table_filter.setPlaceholderText("Filter…")
+        self.le_table_filter.setClearButtonEnabled(True)
+        self.le_table_filter.textChanged.connect(self.table_proxy.setFilterFixedString)
+        table_widget = QWidget()
+        table_layout = QVBoxLayout(table_widget)
+        table_layout.setContentsMargins(0, 0, 0, 0)
+        table_layout.addWidget(self.le_table_filter)
+        table_layout.addWidget(self.table)
         self.table_dock = QDockWidget("Tabelle", self)
-        self.table_dock.setWidget(self.table)
+        self.table_dock.setWidget(table_widget)
         self.addDockWidget(Qt.RightDockWidgetArea, self.table_dock)
         
         # ── Kundendaten-Dock ────────────────────────────
@@ -1170,6 +4510,27 @@ class MainWindow(QMainWindow):
         self.cust_dock.setWidget(cust_widget)
         self.addDockWidget(Qt.LeftDockWidgetArea, self.cust_dock)
         
+        # ── Prüfungs-Dock ───────────────────────────────
+        self.issue_list = QListWidget()
+        self.issue_list.itemDoubleClicked.connect(self.on_issue_double_click)
+        self.cb_check_on_save = QCheckBox("Beim Speichern prüfen")
+        self.cb_check_on_save.setChecked(True)
+        issue_widget = QWidget()
+        issue_layout = QVBoxLayout(issue_widget)
+        issue_layout.setContentsMargins(0, 0, 0, 0)
+        issue_layout.addWidget(self.cb_check_on_save)
+        issue_layout.addWidget(self.issue_list)
+        # Bus-Regeln: laufend aktualisiert (TopologyValidator)
+        self.rule_label = QLabel("Bus-Regeln")
+        self.rule_list = QListWidget()
+        self.rule_list.itemDoubleClicked.connect(self.on_issue_double_click)
+        issue_layout.addWidget(self.rule_label)
+        issue_layout.addWidget(self.rule_list)
+        self.issue_dock = QDockWidget("Prüfung", self)
+        self.issue_dock.setWidget(issue_widget)
+        self.addDockWidget(Qt.RightDockWidgetArea, self.issue_dock)
+        self.issue_dock.hide()
+
         # Toggle-Actions für die drei Docks
         self.action_toggle_customer = QAction("Kundendaten", self, checkable=True)
         self.action_toggle_customer.setChecked(self.cust_dock.isVisible())
@@ -1188,63 +4549,32 @@ class MainWindow(QMainWindow):
         self.action_toggle_table.toggled.connect(self.table_dock.setVisible)
         self.table_dock.visibilityChanged.connect(self.action_toggle_table.setChecked)
         toolbar.addAction(self.action_toggle_table)
+
+        self.action_toggle_issues = QAction("Prüfung", self, checkable=True)
+        self.action_toggle_issues.setChecked(self.issue_dock.isVisible())
+        self.action_toggle_issues.toggled.connect(self.issue_dock.setVisible)
+        self.issue_dock.visibilityChanged.connect(self.action_toggle_issues.setChecked)
+        toolbar.addAction(self.action_toggle_issues)
+
+        # Fortschritt beim Laden (Statusleiste)
+        self.load_progress = QProgressBar()
+        self.load_progress.setMaximumWidth(200)
+        self.load_cancel = QPushButton("Abbrechen")
+        self.load_cancel.clicked.connect(self.cancel_loading)
+        self.statusBar().addPermanentWidget(self.load_progress)
+        self.statusBar().addPermanentWidget(self.load_cancel)
+        self.load_progress.hide()
+        self.load_cancel.hide()
         self.refresh_template_list()
         
-    def delete_selected(self):
-        # lösche alle selektierten Knoten und Kanten
-        for item in list(self.scene.selectedItems()):
-            if isinstance(item, NodeItem):
-                # entferne zuerst alle angrenzenden Kanten
-                for edge in list(self.scene.edges):
-                    if edge.source is item or edge.dest is item:
-                        self.scene.removeItem(edge)
-                        self.scene.edges.remove(edge)
-                # dann den Node
-                self.scene.removeItem(item)
-                self.scene.nodes.remove(item)
-            elif isinstance(item, EdgeItem):
-                self.scene.removeItem(item)
-                self.scene.edges.remove(item)
-        self.update_table()    
-
     def create_template_item(self, tpl):
         item = QListWidgetItem(tpl.name)
         pixmap = QPixmap(32, 32)
         pixmap.fill(Qt.transparent)
         painter = QPainter(pixmap)
-        # Zweifarbiges Icon
-        r = QRectF(0, 0, 32, 32)
-        path = QPainterPath()
-        if tpl.shape == "rect":
-            path.addRect(r)
-        elif tpl.shape == "ellipse":
-            path.addEllipse(r)
-        elif tpl.shape == "diamond":
-            points = [QPointF(16, 0), QPointF(32, 16), QPointF(16, 32), QPointF(0, 16)]
-            path.addPolygon(QPolygonF(points))
-        elif tpl.shape == "triangle":
-            points = [QPointF(16, 0), QPointF(32, 32), QPointF(0, 32)]
-            path.addPolygon(QPolygonF(points))
-        elif tpl.shape == "hexagon":
-            pts = [
-                QPointF(8, 0), QPointF(24, 0), QPointF(32, 16),
-                QPointF(24, 32), QPointF(8, 32), QPointF(0, 16)
-            ]
-            path.addPolygon(QPolygonF(pts))
-        painter.save()
-        painter.setBrush(QBrush(QColor(tpl.color1)))
-        painter.setPen(QPen(Qt.black))
-        painter.setClipRect(QRectF(0, 0, 32, 16))
-        painter.drawPath(path)
-        painter.restore()
-        painter.save()
-        painter.setBrush(QBrush(QColor(tpl.color2)))
-        painter.setPen(QPen(Qt.black))
-        painter.setClipRect(QRectF(0, 16, 32, 16))
-        painter.drawPath(path)
-        painter.restore()
-        painter.setPen(QPen(Qt.black))
-        painter.drawPath(path)
+        # Zweifarbiges Icon – gleiche Pfade wie im Diagramm
+        paint_two_color_shape(painter, tpl.shape, QRectF(0, 0, 32, 32),
+                              QColor(tpl.color1), QColor(tpl.color2), QPen(Qt.black))
         painter.end()
         item.setIcon(QIcon(pixmap))
         return item
@@ -1271,12 +4601,11 @@ class MainWindow(QMainWindow):
         node = NodeItem()
         node.standort = standort
         node.setPos(self.view.mapToScene(self.view.viewport().rect().center()))
-        self.scene.addItem(node)
-        self.scene.nodes.append(node)
+        self.scene.add_node(node)
         node.prepareGeometryChange()
         node.adjustSize()
         node.center_texts()
-        self.update_table()
+        self.scene.notify_item_changed(node)
 
     def add_node_from_template(self, item: QListWidgetItem):
         name = item.text()
@@ -1297,12 +4626,11 @@ class MainWindow(QMainWindow):
             node.standort = standort
             
             node.setPos(self.view.mapToScene(self.view.viewport().rect().center()))
-            self.scene.addItem(node)
-            self.scene.nodes.append(node)
+            self.scene.add_node(node)
             node.prepareGeometryChange()
             node.adjustSize()
             node.center_texts()
-            self.update_table()
+            self.scene.notify_item_changed(node)
 
     def new_page(self):
         msg = QMessageBox(self)
@@ -1322,59 +4650,27 @@ class MainWindow(QMainWindow):
             return     # Abbruch → nichts tun
 
         # Save bestätigt oder Verwerfen:
-        for itm in list(self.scene.items()):
-            self.scene.removeItem(itm)
-        self.scene.nodes.clear()
-        self.scene.edges.clear()
-        self.table.setRowCount(0)
-
-    def save_diagram(self) -> bool:
-        path, _ = QFileDialog.getSaveFileName(self, "Diagramm speichern", "", "JSON-Datei (*.json)")
-        if not path:
-            return False
-        data = {
-            "metadata": {
-                "customer":   self.le_customer.text(),
-                "address":    self.le_address.text(),
-                "project_no": self.le_project_no.text(),
-                "order_no":   self.le_order_no.text(),
-                "company":      self.le_company.text(),
-                "operator":     self.le_operator.text(),
-                "created_date": self.de_created_date.date().toString("yyyy-MM-dd")
-            },
-            "nodes": [], 
-            "edges": []}
-        for idx, node in enumerate(self.scene.nodes):
-            data["nodes"].append({
-                "id": idx,
-                "shape": node.shape,
-                "color1": node.color1.name(),
-                "color2": node.color2.name(),
-                "x": node.pos().x(),
-                "y": node.pos().y(),
-                "width": node.rect().width(),
-                "height": node.rect().height(),
-                "text1": node.text1,
-                "text2": node.text2
-            })
-        for edge in self.scene.edges:
-            src_id = self.scene.nodes.index(edge.source)
-            dest_id = self.scene.nodes.index(edge.dest)
-            style = edge.pen.style()
-            label = edge.label_text
-            data["edges"].append({"source": src_id, "dest": dest_id, "style": style, "label": label})
-        with open(path, "w") as f:
-            json.dump(data, f, indent=4)
-        QMessageBox.information(self, "Gespeichert", "Diagramm wurde gespeichert.")
-        return True
+        with self.scene.batch():
+            self.scene.clear_diagram()
+            self.set_node_cache_mode("none")
+            self.set_edge_routing_mode("straight")
+        self._open_journal(None)
+        self.undo_stack.reset()
+
+    def collect_metadata(self) -> dict:
+        return {
+            "customer":   self.le_customer.text(),
+            "address":    self.le_address.text(),
+            "project_no": self.le_project_no.text(),
+            "order_no":   self.le_order_no.text(),
+            "company":      self.le_company.text(),
+            "operator":     self.le_operator.text(),
+            "created_date": self.de_created_date.date().toString("yyyy-MM-dd"),
+            "node_cache":   self.scene.node_cache,
+            "edge_routing": "orthogonal" if self.scene.router.enabled else "straight"
+        }
 
-    def load_diagram(self):
-        path, _ = QFileDialog.getOpenFileName(self, "Diagramm laden", "", "JSON-Datei (*.json)")
-        if not path:
-            return
-        with open(path, "r") as f:
-            data = json.load(f)
-        meta = data.get("metadata", {})
+    def apply_metadata(self, meta: dict):
         self.le_customer.  setText(meta.get("customer", ""))
         self.le_address.   setText(meta.get("address", ""))
         self.le_project_no.setText(meta.get("project_no", ""))
@@ -1383,78 +4679,302 @@ class MainWindow(QMainWindow):
         self.le_operator.    setText(meta.get("operator", ""))
         date_str = meta.get("created_date", QDate.currentDate().toString("yyyy-MM-dd"))
         self.de_created_date.setDate(QDate.fromString(date_str, "yyyy-MM-dd"))
-        for itm in list(self.scene.items()):
-            self.scene.removeItem(itm)
-        self.scene.nodes.clear()
-        self.scene.edges.clear()
-        for node_data in data.get("nodes", []):
-            node = NodeItem(
-                shape=node_data.get("shape", "rect"),
-                rect=QRectF(0, 0, node_data.get("width", 100), node_data.get("height", 60)),
-                text1=node_data.get("text1", ""),
-                text2=node_data.get("text2", ""),
-                color1=QColor(node_data.get("color1", "lightgray")),
-                color2=QColor(node_data.get("color2", "white"))
-            )
-            node.setPos(node_data.get("x", 0), node_data.get("y", 0))
-            self.scene.addItem(node)
-            self.scene.nodes.append(node)
-        for edge_data in data.get("edges", []):
-            src = self.scene.nodes[edge_data.get("source")]
-            dest = self.scene.nodes[edge_data.get("dest")]
-            style = edge_data.get("style", Qt.SolidLine)
-            label = edge_data.get("label", "")
-            edge = EdgeItem(src, dest, style, label)
-            self.scene.addItem(edge)
-            self.scene.edges.append(edge)
-        self.update_table()
-        QMessageBox.information(self, "Geladen", "Diagramm wurde geladen.")
 
-    def export_image(self):
-        # 1) Dateiauswahl
-        path, _ = QFileDialog.getSaveFileName(
-            self, "Als Bild exportieren", "", "PNG (*.png);;JPEG (*.jpg)"
+    def save_diagram(self) -> bool:
+        path, selected = QFileDialog.getSaveFileName(
+            self, "Diagramm speichern", "",
+            "JSON-Datei (*.json);;JSON kompakt (*.json);;Diagramm binär (*.diax)"
+        )
+        if not path:
+            return False
+        if self.is_loading():
+            QMessageBox.warning(self, "Speichern", "Das Diagramm wird noch geladen.")
+            return False
+        self.write_diagram(path, compact="kompakt" in selected)
+        if self.cb_check_on_save.isChecked():
+            self.run_analysis()
+        QMessageBox.information(self, "Gespeichert", "Diagramm wurde gespeichert.")
+        return True
+
+    def write_diagram(self, path: str, compact: bool = False):
+        """Speichert in O(N+E): IDs einmal als dict, Datensätze gestreamt, atomar."""
+        nodes = self.scene.nodes
+        node_ids = {node: idx for idx, node in enumerate(nodes)}
+        write_diagram_file(
+            path, self.collect_metadata(),
+            (node_to_record(node, idx) for idx, node in enumerate(nodes)),
+            (edge_to_record(edge, node_ids) for edge in self.scene.edges),
+            compact=compact
+        )
+        # Datei = aktueller Stand → Journal beginnt neu
+        self._open_journal(path)
+
+    # ── Journal & Wiederherstellung ────────────────────────
+    def _start_session(self):
+        """
+        Sitzung anmelden: Lock-Datei (von Qt als verwaist erkannt, wenn der
+        Prozess nicht mehr läuft) + Verweis auf die Journal-Dateien.
+        """
+        os.makedirs(RECOVERY_DIR, exist_ok=True)
+        self._session_id = f"{os.getpid()}-{int(time.time() * 1000)}"
+        self._session_lock = QLockFile(os.path.join(RECOVERY_DIR, self._session_id + ".lock"))
+        self._session_lock.tryLock(0)
+        self.journal = DiagramJournal(self.scene, self.collect_metadata, self)
+        for field in (self.le_customer, self.le_address, self.le_project_no,
+                      self.le_order_no, self.le_company, self.le_operator):
+            field.textChanged.connect(self.journal.mark_metadata)
+        self.de_created_date.dateChanged.connect(self.journal.mark_metadata)
+        self._open_journal(None)
+        QTimer.singleShot(0, self.check_recovery)
+
+    def _open_journal(self, project, fresh=True):
+        """Journal für project (None = unbenannt, im RECOVERY_DIR) beginnen."""
+        if self.journal is None:
+            return
+        self.project_path = project
+        stem = project or os.path.join(RECOVERY_DIR, self._session_id)
+        if self.journal.stem not in (None, stem):
+            self.journal.close(discard=True)
+        self.journal.open(stem, fresh)
+        info = {"stem": stem, "project": project}
+        atomic_write(os.path.join(RECOVERY_DIR, self._session_id + ".session.json"),
+                     lambda f: json.dump(info, f))
+
+    def _end_session(self):
+        """Sauber beendet: Journal verwerfen, Sitzung abmelden."""
+        if self.journal is None:
+            return
+        self.journal.close(discard=True)
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(os.path.join(RECOVERY_DIR, self._session_id + ".session.json"))
+        self._session_lock.unlock()
+        self.journal = None
+
+    def check_recovery(self):
+        """Bietet an, eine nicht sauber beendete Sitzung wiederherzustellen."""
+        suffix = ".session.json"
+        for name in sorted(os.listdir(RECOVERY_DIR)):
+            session_id = name[:-len(suffix)]
+            if not name.endswith(suffix) or session_id == self._session_id:
+                continue
+            lock = QLockFile(os.path.join(RECOVERY_DIR, session_id + ".lock"))
+            if not lock.tryLock(0):
+                continue        # Sitzung läuft noch
+            try:
+                with open(os.path.join(RECOVERY_DIR, name), "r", encoding="utf-8") as f:
+                    info = json.load(f)
+            except (OSError, ValueError):
+                info = None
+            recovered = False
+            if info and (journal_files(info["stem"]) or
+                         os.path.exists(info["stem"] + AUTOSAVE_SUFFIX)):
+                title = info.get("project") or "Unbenanntes Diagramm"
+                answer = QMessageBox.question(
+                    self, "Wiederherstellen",
+                    f"Der Editor wurde nicht sauber beendet.\n"
+                    f"Nicht gespeicherte Änderungen an „{title}“ wiederherstellen?",
+                    QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes)
+                if answer == QMessageBox.Yes:
+                    self.recover_session(info)
+                    recovered = True
+                else:
+                    remove_journal_files(info["stem"])
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(os.path.join(RECOVERY_DIR, name))
+            lock.unlock()
+            if recovered:
+                break
+
+    def recover_session(self, info: dict):
+        """Projekt bzw. Autosave laden und die Journale darauf abspielen."""
+        stem, project = info["stem"], info.get("project")
+        data, first_gen = recover_sources(stem, project)
+        self.journal.close(discard=True)
+        self.apply_metadata(data.get("metadata", {}))
+        self.build_diagram(data)
+        count = replay_journal(self.scene, stem, self.apply_metadata, first_gen)
+        self.undo_stack.reset()
+        if project:
+            # Journal neben dem Projekt fortsetzen, sofort kompaktieren
+            self._open_journal(project, fresh=False)
+        else:
+            self._open_journal(None)
+            self.journal.compact()
+            self.journal.wait()
+            remove_journal_files(stem)
+        self.statusBar().showMessage(f"Wiederhergestellt: {count} Änderungen.", 5000)
+
+    def convert_diagram(self):
+        src, _ = QFileDialog.getOpenFileName(
+            self, "Diagramm konvertieren – Quelle", "",
+            "Diagramme (*.json *.diax)"
+        )
+        if not src:
+            return
+        dest, selected = QFileDialog.getSaveFileName(
+            self, "Diagramm konvertieren – Ziel", "",
+            "Diagramm binär (*.diax);;JSON-Datei (*.json);;JSON kompakt (*.json)"
+        )
+        if not dest:
+            return
+        try:
+            convert_diagram_file(src, dest, compact="kompakt" in selected)
+        except (OSError, ValueError) as exc:
+            QMessageBox.critical(self, "Konvertieren", f"Konvertierung fehlgeschlagen:\n{exc}")
+            return
+        QMessageBox.information(self, "Konvertiert", "Diagramm wurde konvertiert.")
+
+    def load_diagram(self):
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Diagramm laden", "",
+            "Diagramme (*.json *.diax);;JSON-Datei (*.json);;Diagramm binär (*.diax)"
         )
         if not path:
             return
+        self.start_loading(path)
 
-        # 2) Szene prüfen
-        rect = self.scene.itemsBoundingRect()
-        if rect.isEmpty():
-            QMessageBox.warning(self, "Exportieren", "Keine Elemente in der Szene zum Exportieren.")
+    def is_loading(self) -> bool:
+        return self._load_thread is not None or self._load_builder is not None
+
+    def start_loading(self, path: str):
+        """Parst im Hintergrund und baut die Items in Zeitscheiben auf."""
+        if self.is_loading():
+            return
+        # Das bisherige Diagramm wird ersetzt – sein Journal ist hinfällig
+        if self.journal is not None:
+            self.journal.close(discard=True)
+        self.undo_stack.pause()
+        self._loading_path = path
+        self.view.setInteractive(False)
+        # Tabellen-Ansicht erst am Ende anbinden: einmal sortieren und
+        # filtern statt bei jeder Zeile
+        self.table_proxy.setSourceModel(None)
+        self.load_progress.setRange(0, 0)           # Parsen: unbestimmt
+        self.load_progress.show()
+        self.load_cancel.show()
+        self.statusBar().showMessage("Lade Diagramm …")
+
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        if not path.lower().endswith(DIAX_EXTENSION) and size > STREAM_THRESHOLD_BYTES:
+            # Sehr große JSON-Datei: streamen, Items entstehen beim Lesen
+            records = queue.Queue(maxsize=4)
+            self._load_thread = DiagramParseThread(path, records, self)
+            self._load_builder = StreamingDiagramBuilder(self.scene, records, size, self)
+            self._load_builder.metadata.connect(self._on_stream_metadata)
+            self._load_builder.failed.connect(self._on_diagram_load_failed)
+            self._load_builder.progress.connect(self._on_load_progress)
+            self._load_builder.visible_ready.connect(self._on_visible_ready)
+            self._load_builder.finished.connect(self._on_diagram_loaded)
+            self._load_thread.finished.connect(self._on_stream_thread_finished)
+            self._load_thread.start()
+            self._load_builder.start()
             return
 
-        # 3) DPI und mm→px-Funktion
-        dpi    = 300
-        mm2px  = lambda mm: int(mm * 300 / 25.4)
+        self._load_thread = DiagramParseThread(path, parent=self)
+        self._load_thread.parsed.connect(self._on_diagram_parsed)
+        self._load_thread.failed.connect(self._on_diagram_load_failed)
+        self._load_thread.start()
 
-        # 4) Papierformat aus ComboBox
-        choice = self.cb_page.currentText()
-        if "A4" in choice:
-            w_mm, h_mm = 210, 297
-        else:
-            w_mm, h_mm = 297, 420
-        if "Quer" in choice:
-            w_mm, h_mm = h_mm, w_mm
-
-        img_w   = mm2px(w_mm)
-        img_h   = mm2px(h_mm)
-        margin  = mm2px(10)
-
-        # 5) QImage und QPainter anlegen
-        image = QImage(img_w, img_h, QImage.Format_ARGB32)
-        image.fill(Qt.white)
-        painter = QPainter(image)
-        painter.setRenderHint(QPainter.Antialiasing)
-        painter.setPen(Qt.black)
+    def _on_stream_metadata(self, meta: dict):
+        self.apply_metadata(meta)
+        self.set_node_cache_mode(meta.get("node_cache", "none"))
+        self.set_edge_routing_mode(meta.get("edge_routing", "straight"))
 
-        font = painter.font()
-        font.setPointSize(10)
-        painter.setFont(font)
-        fm = painter.fontMetrics()
+    def _on_stream_thread_finished(self):
+        # Parser fertig, Items werden evtl. noch aufgebaut
+        if self._load_thread is self.sender():
+            self._load_thread = None
 
-        # Die Daten-Paare
-        data = [
+    def _on_diagram_parsed(self, data):
+        self._load_thread = None
+        meta = data.get("metadata", {})
+        self.apply_metadata(meta)
+        with self.scene.batch():
+            self.scene.clear_diagram()
+            self.set_node_cache_mode(meta.get("node_cache", "none"))
+            self.set_edge_routing_mode(meta.get("edge_routing", "straight"))
+
+        visible = self.view.mapToScene(self.view.viewport().rect()).boundingRect()
+        self._load_builder = ChunkedDiagramBuilder(self.scene, data, visible, self)
+        self._load_builder.progress.connect(self._on_load_progress)
+        self._load_builder.visible_ready.connect(self._on_visible_ready)
+        self._load_builder.finished.connect(self._on_diagram_loaded)
+        self._load_builder.start()
+
+    def _on_load_progress(self, done: int, total: int):
+        self.load_progress.setRange(0, max(total, 1))
+        self.load_progress.setValue(done)
+
+    def _on_visible_ready(self):
+        # Sichtbarer Bereich steht → Bedienung freigeben; die Tabelle
+        # folgt mit dem Ende des Ladens
+        self.view.setInteractive(True)
+
+    def _on_diagram_loaded(self):
+        self._load_builder = None
+        self._open_journal(self._loading_path)
+        self.undo_stack.reset()
+        self._finish_loading()
+        self.statusBar().showMessage("Diagramm wurde geladen.", 5000)
+
+    def _on_diagram_load_failed(self, message: str):
+        if self._load_builder is not None:
+            # Gestreamt: Teil-Diagramm verwerfen
+            self.cancel_loading()
+        else:
+            # Altes Diagramm bleibt – Journal ab dem jetzigen Stand fortsetzen
+            self._open_journal(self.project_path, fresh=False)
+            self.undo_stack.reset()
+        self._load_thread = None
+        self._finish_loading()
+        QMessageBox.critical(self, "Laden", f"Diagramm konnte nicht geladen werden:\n{message}")
+
+    def cancel_loading(self):
+        """Bricht den Ladevorgang ab und hinterlässt ein leeres Diagramm."""
+        if self._load_thread is not None:
+            # Parser lässt sich nicht unterbrechen – Ergebnis verwerfen
+            self._load_thread.cancelled = True
+            if self._load_thread.record_queue is None:
+                self._load_thread.parsed.disconnect(self._on_diagram_parsed)
+            self._load_thread = None
+        if self._load_builder is not None:
+            self._load_builder.cancel()
+            self._load_builder = None
+        with self.scene.batch():
+            self.scene.clear_diagram()
+        self.apply_metadata({})
+        self._open_journal(None)
+        self.undo_stack.reset()
+        self._finish_loading()
+        self.statusBar().showMessage("Laden abgebrochen.", 5000)
+
+    def _finish_loading(self):
+        self.view.setInteractive(True)
+        if self.table_proxy.sourceModel() is None:
+            self.table_proxy.setSourceModel(self.table_model)
+        self.load_progress.hide()
+        self.load_cancel.hide()
+        self.statusBar().clearMessage()
+
+    def build_diagram(self, data: dict):
+        """Ersetzt die Szene durch die Nodes/Edges aus data (langes Format)."""
+        meta = data.get("metadata", {})
+        # Alles in einem Batch: kein BSP-Index, eine Tabellen-Aktualisierung
+        with self.scene.batch():
+            self.scene.clear_diagram()
+            self.set_node_cache_mode(meta.get("node_cache", "none"))
+            self.set_edge_routing_mode(meta.get("edge_routing", "straight"))
+            loaded = []
+            for node_data in data.get("nodes", []):
+                node = record_to_node(node_data)
+                self.scene.add_node(node)
+                loaded.append(node)
+            for edge_data in data.get("edges", []):
+                self.scene.add_edge(record_to_edge(edge_data, loaded))
+
+    def metadata_rows(self) -> list:
+        """Kopfzeilen der Exporte: (Bezeichnung, Wert)."""
+        return [
             ("Kundennummer", self.le_customer.text()),
             ("Anschrift",    self.le_address.text()),
             ("Projekt-Nr.",  self.le_project_no.text()),
@@ -1464,86 +4984,159 @@ class MainWindow(QMainWindow):
             ("Erstellungsdatum", self.de_created_date.date().toString("dd.MM.yyyy"))
         ]
 
-        # Zeilenhöhe (Höhe + Padding)
-        row_h_px = fm.height() + 8
-
-        # Breite des breitesten Labels
-        max_label = max(label for label, _ in data)
-        label_w   = fm.horizontalAdvance(max_label)
+    def export_image(self):
+        # 1) Dateiauswahl
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Als Bild exportieren", "", "PNG (*.png);;JPEG (*.jpg)"
+        )
+        if not path:
+            return
+        if self._export_thread is not None:
+            QMessageBox.warning(self, "Exportieren", "Es läuft bereits ein Export.")
+            return
+        try:
+            job = self.prepare_image_export(path)
+        except ValueError as exc:
+            QMessageBox.warning(self, "Exportieren", str(exc))
+            return
 
-        # Puffer in mm ins Pixel umrechnen (z.B. 5 mm extra)
-        mm2px = lambda mm: int(mm * 300 / 25.4)
-        padding_px = mm2px(5)
-
-        # Erste Spalte: exakte Label-Breite + Puffer
-        col1_px = label_w + padding_px
-
-        # Werte-Spalte: breitestes Value + Puffer
-        max_value = max(val for _, val in data)
-        val_w     = fm.horizontalAdvance(max_value)
-        col2_px   = val_w + padding_px
-
-        # Gesamt-Tabelle
-        table_w_px = col1_px + col2_px
-        table_h_px = row_h_px * len(data)
-
-        # Position der Tabelle
-        table_x = margin
-        table_y = margin
-
-
-        # 8) Zeichne Rahmen & Gitterlinien
-        painter.drawRect(table_x, table_y, table_w_px, table_h_px)
-        for i in range(1, len(data)):
-            y = table_y + row_h_px * i
-            painter.drawLine(table_x, y, table_x + table_w_px, y)
-        painter.drawLine(table_x + col1_px, table_y,
-                         table_x + col1_px, table_y + table_h_px)
-
-        # 9) Zellen-Texte mit Umbruch
-        for i, (lbl, val) in enumerate(data):
-            cell_y = table_y + row_h_px * i
-            # Label-Zelle
-            rect_lbl = QRect(
-                table_x + 2,
-                cell_y + 2,
-                col1_px - 4,
-                row_h_px - 4
-            )
-            painter.drawText(
-                rect_lbl,
-                Qt.AlignLeft | Qt.AlignVCenter,
-                lbl
-            )
-            # Value-Zelle
-            rect_val = QRect(
-                table_x + col1_px + 2,
-                cell_y + 2,
-                col2_px - 4,
-                row_h_px - 4
-            )
-            painter.drawText(
-                rect_val,
-                Qt.AlignLeft | Qt.AlignVCenter | Qt.TextWordWrap,
-                val
-            )
+        # 2) Rastern im Hintergrund – die Oberfläche bleibt bedienbar
+        errors = []
+        self._export_thread = JobThread(job, self)
+        self._export_thread.failed.connect(errors.append)
+        self._export_thread.finished.connect(lambda: self._on_image_exported(errors))
+        self.statusBar().showMessage("Bild wird exportiert…")
+        self._export_thread.start()
+
+    def _on_image_exported(self, errors):
+        self._export_thread = None
+        self.statusBar().clearMessage()
+        if errors:
+            QMessageBox.critical(self, "Exportieren", f"Bild konnte nicht exportiert werden:\n{errors[0]}")
+        else:
+            QMessageBox.information(self, "Exportiert", "Bild wurde exportiert.")
 
-        # 10) Diagramm direkt unter der Tabelle rendern
-        painter.save()
-        painter.translate(margin, margin + table_h_px + mm2px(5))  # 5mm Abstand
-        avail_w = img_w  - 2*margin
-        avail_h = img_h  - margin - table_h_px - mm2px(5)
-        scale   = min(avail_w/rect.width(), avail_h/rect.height())
-        painter.scale(scale, scale)
-        self.scene.render(painter,
-                          QRectF(0, 0, rect.width(), rect.height()),
-                          rect)
-        painter.restore()
+    def render_image(self, path: str, page: str = None, dpi: int = None, threads: int = None):
+        """Bild-Export ohne Dialoge (auch für den Batch-Modus), blockierend.
+        Rückgabe: True, wenn das Bild aus dem Export-Cache kam."""
+        return self.prepare_image_export(path, page, dpi, threads)()
 
-        # 11) Ende und speichern
-        painter.end()
-        image.save(path)
-        QMessageBox.information(self, "Exportiert", "Bild wurde exportiert.")
+    def prepare_image_export(self, path: str, page: str = None, dpi: int = None,
+                             threads: int = None):
+        """
+        GUI-Teil des Bild-Exports: prüft die Szene und nimmt einen
+        SceneSnapshot auf – bei einem Treffer im Export-Cache nicht, dann
+        wird nur kopiert. Die zurückgegebene Funktion rastert mit
+        threads Worker-Threads, ohne Items oder Widgets anzufassen, und
+        darf selbst in einem anderen Thread laufen. PNG wird in Streifen
+        gerendert und gestreamt; im Speicher sind nur die Streifen, die
+        gerade in Arbeit sind (zusammen höchstens EXPORT_TILE_BYTES).
+        """
+        # Szene prüfen
+        rect = self.scene.itemsBoundingRect()
+        if rect.isEmpty():
+            raise ValueError("Keine Elemente in der Szene zum Exportieren.")
+
+        # DPI und Papierformat
+        dpi    = dpi or self.sb_dpi.value()
+        mm2px  = lambda mm: int(mm * dpi / 25.4)
+        w_mm, h_mm = page_size_mm(page or self.cb_page.currentText())
+        img_w  = mm2px(w_mm)
+        img_h  = mm2px(h_mm)
+        dpm    = round(dpi / 0.0254)
+        threads = max(1, threads or EXPORT_THREADS)
+        layout = image_page_layout(self.metadata_rows(), rect, img_w, img_h, dpi)
+        key = self.export_key({"kind": os.path.splitext(path)[1].lower(),
+                               "page": page or self.cb_page.currentText(), "dpi": dpi})
+        # Treffer: gleich kopieren, ohne die ganze Szene aufzunehmen
+        if key is not None and self.export_cache.fetch(key, path):
+            return lambda: True
+
+        if not path.lower().endswith(".png"):
+            # JPEG u.a.: Qt braucht das ganze Bild am Stück
+            snapshot = SceneSnapshot.capture(self.scene, [image_strip_source(layout, 0, img_h)])
+
+            def job():
+                image = QImage(img_w, img_h, QImage.Format_ARGB32)
+                image.setDotsPerMeterX(dpm)
+                image.setDotsPerMeterY(dpm)
+                paint_image_strip(image, layout, snapshot, 0, 0)
+                if not image.save(path):
+                    raise OSError(f"Bild konnte nicht gespeichert werden: {path}")
+            return self._cached_job(key, path, job)
+
+        # Streifen so, dass alle gleichzeitig bearbeiteten ins Budget passen
+        in_flight = threads + 1
+        tile_h  = max(1, min(img_h, EXPORT_TILE_BYTES // (img_w * 4 * in_flight)))
+        strips  = [(y0, min(tile_h, img_h - y0)) for y0 in range(0, img_h, tile_h)]
+        snapshot = SceneSnapshot.capture(
+            self.scene, [image_strip_source(layout, y0, rows) for y0, rows in strips])
+
+        def rasterise(band):
+            y0, rows = strips[band]
+            tile = QImage(img_w, rows, QImage.Format_ARGB32_Premultiplied)
+            tile.setDotsPerMeterX(dpm)
+            tile.setDotsPerMeterY(dpm)
+            paint_image_strip(tile, layout, snapshot, band, y0)
+            return PngStreamWriter.encode_rows(tile, img_w, rows)
+
+        def write(f):
+            from concurrent.futures import ThreadPoolExecutor
+            png = PngStreamWriter(f, img_w, img_h, dpi)
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                pending = collections.deque()
+                for band in range(len(strips)):
+                    pending.append((band, pool.submit(rasterise, band)))
+                    # In Reihenfolge schreiben, höchstens in_flight Streifen offen
+                    if len(pending) >= in_flight:
+                        done, future = pending.popleft()
+                        png.write_encoded(future.result(), strips[done][1])
+                while pending:
+                    done, future = pending.popleft()
+                    png.write_encoded(future.result(), strips[done][1])
+            png.close()
+
+        return self._cached_job(key, path, lambda: atomic_write(path, write, mode="wb"))
+
+    def export_key(self, options: dict):
+        """
+        Cache-Schlüssel für einen Export (None ohne Cache): Fingerabdruck
+        über Nodes, Edges, Metadaten-Felder, Auswahl und options.
+        """
+        # Noch ausstehende Routen gehen in die Ausgabe ein → jetzt fertig führen
+        self.scene.router.flush()
+        if self.export_cache is None:
+            return None
+        nodes, edges = self.scene.nodes, self.scene.edges
+        node_ids = {node: idx for idx, node in enumerate(nodes)}
+        edge_ids = {edge: idx for idx, edge in enumerate(edges)}
+        meta = self.collect_metadata()
+        meta.pop("node_cache", None)   # ändert die Ausgabe nicht
+        if self.scene.router.enabled:
+            # Rechtwinklige Routen hängen am Raster
+            options = dict(options, grid_size=self.view.grid_size)
+        # Markierte Items werden hervorgehoben gezeichnet
+        options = dict(options, selected=sorted(
+            ("n", node_ids[item]) if item in node_ids else ("e", edge_ids[item])
+            for item in self.scene.selectedItems() if item in node_ids or item in edge_ids))
+        return diagram_fingerprint(
+            meta,
+            (node_to_record(node, idx) for idx, node in enumerate(nodes)),
+            (edge_to_record(edge, node_ids) for edge in edges),
+            options)
+
+    def _cached_job(self, key, path, job):
+        """Umhüllt job: Treffer aus dem Cache kopieren, sonst rendern und ablegen."""
+        cache = self.export_cache
+
+        def run():
+            if key is not None and cache.fetch(key, path):
+                return True
+            job()
+            if key is not None:
+                cache.store(key, path)
+            return False
+        return run
 
     def export_pdf(self):
         # 1) Dateiauswahl
@@ -1552,55 +5145,65 @@ class MainWindow(QMainWindow):
         )
         if not path:
             return
+        try:
+            self.render_pdf(path)
+        except ValueError as exc:
+            QMessageBox.warning(self, "Exportieren", str(exc))
+            return
+        except OSError as exc:
+            QMessageBox.critical(self, "Exportieren", str(exc))
+            return
+        QMessageBox.information(self, "Exportiert", "PDF wurde exportiert.")
 
-        # 2) Printer konfigurieren
+    def export_pdf_poster(self):
+        # 1) Maßstab & Überlappung
+        scale_pct, ok = QInputDialog.getInt(
+            self, "PDF-Poster", "Maßstab in % (100 % = Bildschirmgröße):", 100, 5, 1000, 5)
+        if not ok:
+            return
+        overlap_mm, ok = QInputDialog.getInt(
+            self, "PDF-Poster", "Überlappung zum Kleben (mm):", 10, 0, 50, 1)
+        if not ok:
+            return
+        # 2) Dateiauswahl
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Als PDF-Poster exportieren", "", "PDF-Datei (*.pdf)"
+        )
+        if not path:
+            return
+        try:
+            pages = self.render_pdf_poster(path, scale_pct=scale_pct, overlap_mm=overlap_mm)
+        except ValueError as exc:
+            QMessageBox.warning(self, "Exportieren", str(exc))
+            return
+        except OSError as exc:
+            QMessageBox.critical(self, "Exportieren", str(exc))
+            return
+        if pages is None:
+            QMessageBox.information(self, "Exportiert", "PDF-Poster wurde exportiert (unverändert, aus dem Cache).")
+        else:
+            QMessageBox.information(self, "Exportiert", f"PDF-Poster mit {pages} Seiten wurde exportiert.")
+
+    def _pdf_printer(self, path: str, page: str = None):
+        """QPrinter für PDF-Ausgabe im gewählten Papierformat."""
         from PyQt5.QtPrintSupport import QPrinter
         printer = QPrinter(QPrinter.HighResolution)
         printer.setOutputFormat(QPrinter.PdfFormat)
         printer.setOutputFileName(path)
 
-        choice = self.cb_page.currentText()
-        # Papierformat
-        if "A4" in choice:
-            printer.setPaperSize(QPrinter.A4)
-        else:
-            printer.setPaperSize(QPrinter.A3)
-        # Orientierung
-        printer.setOrientation(
-            QPrinter.Landscape if "Quer" in choice else QPrinter.Portrait
-        )
-
-        # 3) Szene prüfen
-        scene_rect = self.scene.itemsBoundingRect()
-        if scene_rect.isEmpty():
-            QMessageBox.warning(self, "Exportieren", "Keine Elemente in der Szene vorhanden.")
-            return
-
-        page_rect = printer.pageRect()
-
-        # 4) Painter EINMAL beginnen
-        painter = QPainter()
-        if not painter.begin(printer):
-            QMessageBox.critical(self, "Exportieren", "Kann PDF-Renderer nicht starten.")
-            return
-        painter.setRenderHint(QPainter.Antialiasing)
+        # Papierformat (bereits gedreht, daher immer Hochformat)
+        w_mm, h_mm = page_size_mm(page or self.cb_page.currentText())
+        printer.setPaperSize(QSizeF(w_mm, h_mm), QPrinter.Millimeter)
+        printer.setOrientation(QPrinter.Portrait)
+        return printer
 
-        # 5) Schrift & Metadaten-Tabelle
+    def _draw_pdf_header(self, painter, page_rect, data) -> float:
+        """Metadaten-Tabelle oben auf der Seite; liefert die Kopfhöhe."""
         painter.setPen(Qt.black)
         font = painter.font()
         font.setPointSize(10)
         painter.setFont(font)
 
-        # Dynamische Tabelle
-        data = [
-            ("Kundennummer", self.le_customer.text()),
-            ("Anschrift",    self.le_address.text()),
-            ("Projekt-Nr.",  self.le_project_no.text()),
-            ("Auftrags-Nr.", self.le_order_no.text()),
-            ("Firma",           self.le_company.text()),
-            ("Bearbeiter",      self.le_operator.text()),
-            ("Erstellungsdatum", self.de_created_date.date().toString("dd.MM.yyyy"))
-        ]
         fm = painter.fontMetrics()
         row_h   = fm.height() + 8
         labels = [label for label, _ in data]
@@ -1609,8 +5212,7 @@ class MainWindow(QMainWindow):
         avg_char = fm.horizontalAdvance("M")  # Breite eines Großbuchstabens M
         padding  = avg_char * 6
         col1_w  = max(label_w + padding, 120)
-        max_value = max(value for _, value in data)
-        value_w   = fm.horizontalAdvance(max_value)
+        value_w   = max(fm.horizontalAdvance(value) for _, value in data)
         col2_w  = value_w + 20
         table_w = col1_w + col2_w
         table_x = page_rect.x() + 10
@@ -1645,10 +5247,46 @@ class MainWindow(QMainWindow):
             painter.drawText(r_val,
                             Qt.AlignLeft | Qt.AlignVCenter | Qt.TextWordWrap,
                             value)
+        return table_h + 20
+
+    def _draw_pdf_footer(self, painter, page_rect, note: str = ""):
+        painter.setPen(Qt.black)
+        text = (f"{self.le_customer.text()} | {self.le_address.text()} | "
+                f"{self.le_project_no.text()} | {self.le_order_no.text()}")
+        painter.drawText(
+            page_rect.x() + 10,
+            page_rect.y() + page_rect.height() - 5,
+            f"{text} | {note}" if note else text
+        )
+
+    def render_pdf(self, path: str, page: str = None):
+        """PDF-Export ohne Dialoge (auch für den Batch-Modus).
+        Rückgabe: True, wenn die Datei aus dem Export-Cache kam."""
+        key = self.export_key({"kind": "pdf", "page": page or self.cb_page.currentText()})
+        return self._cached_job(key, path, lambda: self._render_pdf(path, page))()
+
+    def _render_pdf(self, path: str, page: str = None):
+        # 2) Printer konfigurieren
+        printer = self._pdf_printer(path, page)
+
+        # 3) Szene prüfen
+        scene_rect = self.scene.itemsBoundingRect()
+        if scene_rect.isEmpty():
+            raise ValueError("Keine Elemente in der Szene vorhanden.")
+
+        page_rect = printer.pageRect()
+
+        # 4) Painter EINMAL beginnen
+        painter = QPainter()
+        if not painter.begin(printer):
+            raise OSError("Kann PDF-Renderer nicht starten.")
+        painter.setRenderHint(QPainter.Antialiasing)
+
+        # 5) Schrift & Metadaten-Tabelle
+        header_h = self._draw_pdf_header(painter, page_rect, self.metadata_rows())
 
-        # 6) Diagramm rendern
-        header_h = table_h + 20
-        footer_h = 36
+        # 6) Diagramm rendern (Fußzeile: eine Textzeile)
+        footer_h = painter.fontMetrics().height() + 10
         avail_w = page_rect.width()
         avail_h = page_rect.height() - header_h - footer_h
         scale   = min(avail_w / scene_rect.width(), avail_h / scene_rect.height())
@@ -1656,27 +5294,119 @@ class MainWindow(QMainWindow):
         painter.save()
         painter.translate(page_rect.x(), page_rect.y() + header_h)
         painter.scale(scale, scale)
-        self.scene.render(painter,
-                          QRectF(0, 0, scene_rect.width(), scene_rect.height()),
-                          scene_rect)
+        with self.scene.full_detail():
+            self.scene.render(painter,
+                              QRectF(0, 0, scene_rect.width(), scene_rect.height()),
+                              scene_rect)
         painter.restore()
 
         # 7) Footer-Text
-        painter.drawText(
-            page_rect.x() + 10,
-            page_rect.y() + page_rect.height() - 5,
-            f"{self.le_customer.text()} | {self.le_address.text()} | "
-            f"{self.le_project_no.text()} | {self.le_order_no.text()}"
-        )
+        self._draw_pdf_footer(painter, page_rect)
 
         # 8) Painter beenden
         painter.end()
-        QMessageBox.information(self, "Exportiert", "PDF wurde exportiert.")
+
+    def render_pdf_poster(self, path: str, page: str = None, scale_pct: int = 100,
+                          overlap_mm: float = 10):
+        """
+        Poster-Export: die Szene in festem Maßstab (100 % = 96 dpi) über
+        mehrere Seiten, benachbarte Seiten überlappen um overlap_mm.
+        Kopf- und Fußzeile stehen auf jeder Seite. Jede Seite rendert nur
+        die Items ihrer Kachel (Szenen-Index), jedes Item landet also nur
+        auf den Seiten, die es berührt. Rückgabe: Anzahl Seiten, None bei
+        einem Treffer im Export-Cache.
+        """
+        key = self.export_key({"kind": "poster", "page": page or self.cb_page.currentText(),
+                               "scale": scale_pct, "overlap": overlap_mm})
+        pages = []
+        job = lambda: pages.append(self._render_pdf_poster(path, page, scale_pct, overlap_mm))
+        self._cached_job(key, path, job)()
+        return pages[0] if pages else None
+
+    def _render_pdf_poster(self, path, page, scale_pct, overlap_mm) -> int:
+        printer = self._pdf_printer(path, page)
+        scene_rect = self.scene.itemsBoundingRect()
+        if scene_rect.isEmpty():
+            raise ValueError("Keine Elemente in der Szene vorhanden.")
+
+        page_rect = printer.pageRect()
+        data = self.metadata_rows()
+        painter = QPainter()
+        if not painter.begin(printer):
+            raise OSError("Kann PDF-Renderer nicht starten.")
+        painter.setRenderHint(QPainter.Antialiasing)
+
+        # Kopf auf Seite 1 bestimmt die Fläche – auf allen Seiten gleich
+        header_h = self._draw_pdf_header(painter, page_rect, data)
+        footer_h = painter.fontMetrics().height() + 10
+        area = QRectF(page_rect.x(), page_rect.y() + header_h,
+                      page_rect.width(), page_rect.height() - header_h - footer_h)
+        unit    = printer.resolution() / 96.0 * scale_pct / 100.0   # Gerätepixel je Szenen-Einheit
+        overlap = overlap_mm / 25.4 * printer.resolution()
+        if area.width() <= overlap or area.height() <= overlap:
+            painter.end()
+            raise ValueError("Die Überlappung ist größer als die Seitenfläche.")
+
+        # Kachelraster in Szenen-Einheiten
+        tile_w, tile_h = area.width() / unit, area.height() / unit
+        step_w, step_h = (area.width() - overlap) / unit, (area.height() - overlap) / unit
+        cols = 1 + max(0, math.ceil((scene_rect.width() - tile_w) / step_w))
+        rows = 1 + max(0, math.ceil((scene_rect.height() - tile_h) / step_h))
+        total = rows * cols
+
+        with self.scene.full_detail():
+            for r in range(rows):
+                for c in range(cols):
+                    number = r * cols + c + 1
+                    if number > 1:
+                        printer.newPage()
+                        self._draw_pdf_header(painter, page_rect, data)
+                    source = QRectF(scene_rect.left() + c * step_w,
+                                    scene_rect.top() + r * step_h, tile_w, tile_h)
+                    painter.save()
+                    painter.setClipRect(area)
+                    painter.translate(area.topLeft())
+                    painter.scale(unit, unit)
+                    self.scene.render(painter, QRectF(0, 0, tile_w, tile_h),
+                                      source, Qt.IgnoreAspectRatio)
+                    painter.restore()
+
+                    neighbours = {
+                        "left":   number - 1 if c > 0 else None,
+                        "right":  number + 1 if c < cols - 1 else None,
+                        "top":    number - cols if r > 0 else None,
+                        "bottom": number + cols if r < rows - 1 else None,
+                    }
+                    draw_overlap_marks(painter, area, overlap, neighbours)
+                    self._draw_pdf_footer(
+                        painter, page_rect,
+                        f"Seite {number}/{total} (Zeile {r + 1}, Spalte {c + 1})")
+        painter.end()
+        return total
+
+    def clear_export_cache(self):
+        if self.export_cache is not None:
+            self.export_cache.clear()
+        self.statusBar().showMessage("Export-Cache geleert.", 5000)
 
     def export_table(self):
         path, _ = QFileDialog.getSaveFileName(self, "Tabelle exportieren", "", "CSV-Datei (*.csv)")
         if not path:
             return
+        self.write_table_csv(path)
+        QMessageBox.information(self, "Exportiert", "Tabelle wurde exportiert.")
+
+    def write_table_csv(self, path: str):
+        """Tabellen-Export ohne Dialoge (auch für den Batch-Modus).
+        Rückgabe: True, wenn die Datei aus dem Export-Cache kam."""
+        # Die CSV folgt der Ansicht: Filter und Sortierung gehören zum Schlüssel
+        key = self.export_key({"kind": "csv",
+                               "filter": self.le_table_filter.text(),
+                               "sort": [self.table_proxy.sortColumn(),
+                                        int(self.table_proxy.sortOrder())]})
+        return self._cached_job(key, path, lambda: self._write_table_csv(path))()
+
+    def _write_table_csv(self, path: str):
         with open(path, 'w', encoding='utf-8') as f:
             # Kopfzeile
             f.write("Kundennummer,Anschrift,Projekt-Nr.,Auftrags-Nr.\n")
@@ -1684,30 +5414,23 @@ class MainWindow(QMainWindow):
                     f"{self.le_address.text()},"
                     f"{self.le_project_no.text()},"
                     f"{self.le_order_no.text()}\n\n")
-            # dann Tabelle
-            rows = self.table.rowCount()
-            cols = self.table.columnCount()
+            # dann Tabelle (wie angezeigt: sortiert/gefiltert)
+            model = self.table_proxy
+            rows = model.rowCount()
+            cols = model.columnCount()
             for r in range(rows):
-                vals = [self.table.item(r,c).text() if self.table.item(r,c) else ""
-                        for c in range(cols)]
+                vals = [model.index(r, c).data() or "" for c in range(cols)]
                 f.write(','.join(vals) + '\n')
-        QMessageBox.information(self, "Exportiert", "Tabelle wurde exportiert.")
 
     def create_template(self):
         name, ok = QInputDialog.getText(self, "Template-Name", "Name des Templates:")
         if not ok or not name:
             return
-        shapes = ["Rechteck", "Ellipse", "Raute", "Dreieck", "Hexagon"]
+        shapes = [shp.label for shp in NODE_SHAPES.values()]
         shape_str, ok = QInputDialog.getItem(self, "Form wählen", "Form:", shapes, 0, False)
         if not ok:
             return
-        mapping = {
-            "Rechteck": "rect",
-            "Ellipse": "ellipse",
-            "Raute": "diamond",
-            "Dreieck": "triangle",
-            "Hexagon": "hexagon"
-        }
+        mapping = {shp.label: shp.name for shp in NODE_SHAPES.values()}
         shape = mapping[shape_str]
 
         col1 = QColorDialog.getColor(
@@ -1822,54 +5545,9 @@ class MainWindow(QMainWindow):
             json.dump(data, f, indent=4)
 
     def update_table(self):
-        total_rows = len(self.scene.nodes) + len(self.scene.edges)
-        self.table.setRowCount(total_rows)
-        row = 0
-        # Knoten
-        for node in self.scene.nodes:
-            self.table.setItem(row, 0, QTableWidgetItem(node.text1))
-            self.table.setItem(row, 1, QTableWidgetItem(node.text2))
-            self.table.setItem(row, 2, QTableWidgetItem(node.node_shape))
-            # Standort und Position
-            standort = getattr(node, 'standort', "")
-            self.table.setItem(row, 3, QTableWidgetItem(standort))
-            
-            for col in (0, 1):
-                item = self.table.item(row, col)
-                if not item:
-                    continue
-                bg = node.color1 if col == 0 else node.color2
-                item.setBackground(QBrush(bg))
-                # Schriftfarbe je nach Helligkeit
-                fg = Qt.white if is_color_dark(bg) else Qt.black
-                item.setForeground(QBrush(fg))
+        """Tabelle komplett neu aufbauen – Einzeländerungen laufen über die Szene-Signale."""
+        self.table_model.refresh()
 
-            
-            row += 1
-            
-        # Verbindungen
-        for edge in self.scene.edges:
-            src = edge.source.text1
-            dst = edge.dest.text1
-            arrow = getattr(edge, 'arrow', '-') #aus EgdeItem.arrow
-            # Spalte 0
-            self.table.setItem(row, 0, QTableWidgetItem("Verbindung"))
-            #Spalte 1: Protokoll/Adresse mit wählbarem Arrow
-            item = QTableWidgetItem(f"{src}{arrow}{dst}")
-            #optional: zentrieren
-            item.setTextAlignment(Qt.AlignCenter)
-            self.table.setItem(row, 1, item)
-            style_name = {
-                Qt.SolidLine: "Twisted Pair",
-                Qt.DashLine: "Funk",
-                Qt.DotLine: "Ethernet",
-                Qt.DashDotLine: "Bus",
-                Qt.DashDotDotLine: "Strich-Punkt-Punkt"
-            }.get(edge.pen().style(), "Twisted Pair")
-            self.table.setItem(row, 2, QTableWidgetItem(style_name))
-            # Für Verbindungen bleibt die Standort-Spalte leer
-            self.table.setItem(row, 3, QTableWidgetItem(""))
-            row += 1
     def closeEvent(self, event):
         msg = QMessageBox(self)
         msg.setWindowTitle("Beenden")
@@ -1883,24 +5561,26 @@ class MainWindow(QMainWindow):
         clicked = msg.clickedButton()
         if   clicked == save_btn:
             if self.save_diagram():
+                self._end_session()
                 event.accept()
             else:
                 event.ignore()
         elif clicked == discard_btn:
+            self._end_session()
             event.accept()
         else:  # Abbrechen
             event.ignore()
             
-    def on_table_double_click(self, row: int, col: int):
+    def on_table_double_click(self, index: QModelIndex):
+        # Index der (sortierten/gefilterten) Ansicht → Modell-Zeile
+        src_index = self.table_proxy.mapToSource(index)
         # nur Spalte 1 und nur, wenn es eine Verbindungs-Zeile ist
-        num_nodes = len(self.scene.nodes)
-        if col != 1 or row < num_nodes:
+        edge = self.table_model.item_at(src_index.row())
+        if src_index.column() != 1 or not isinstance(edge, EdgeItem):
             return
 
-        # Finde das zugehörige EdgeItem
-        edge = self.scene.edges[row - num_nodes]
         # aktuelle Arrow-Variante
-        current = edge.arrow
+        current = getattr(edge, 'arrow', '-')
         # Liste der möglichen Pfeile
         options = ["-", "→", "←", "↔"]
         # Startindex ermitteln
@@ -1920,29 +5600,167 @@ class MainWindow(QMainWindow):
         if not ok:
             return
 
-        # übernehmen
+        # übernehmen, Tabelle aktualisiert nur diese Zeile
         edge.arrow = arrow
-        # Tabelle updaten (nur diese Zelle)
-        src = edge.source.text1
-        dst = edge.dest.text1
-        self.table.item(row, col).setText(f"{src} {arrow} {dst}")
+        self.scene.notify_item_changed(edge)
         
+    def undo(self):
+        self.undo_stack.undo()
+
+    def redo(self):
+        self.undo_stack.redo()
+
+    def _update_undo_actions(self):
+        self.action_undo.setEnabled(self.undo_stack.can_undo())
+        self.action_redo.setEnabled(self.undo_stack.can_redo())
+
+    # ── Auto-Layout ────────────────────────────────────────
+    def auto_layout(self):
+        if np is None:
+            QMessageBox.warning(self, "Auto-Layout",
+                                "Für das Auto-Layout wird numpy benötigt (pip install numpy).")
+            return
+        if not self.scene.nodes:
+            return
+        labels = list(LAYOUT_MODES.values())
+        choice, ok = QInputDialog.getItem(self, "Auto-Layout", "Verfahren:", labels, 0, False)
+        if not ok:
+            return
+        mode = next(key for key, label in LAYOUT_MODES.items() if label == choice)
+        self.apply_auto_layout(mode)
+
+    def apply_auto_layout(self, mode):
+        """Alle Nodes neu anordnen – ein Batch, ein Undo-Schritt."""
+        t0 = time.perf_counter()
+        nodes, edges = self.scene.nodes, self.scene.edges
+        g = self.view.grid_size
+        positions = auto_layout(nodes, edges, mode, g)
+        # Das Diagramm beginnt oben links dort, wo es bisher begann
+        old = np.array([(n.pos().x(), n.pos().y()) for n in nodes]).min(axis=0)
+        positions += np.round((old - positions.min(axis=0)) / g) * g
+        with self.scene.batch():
+            for node, (x, y) in zip(nodes, positions.tolist()):
+                node.setPos(x, y)
+        self.view.centerOn(self.scene.itemsBoundingRect().center())
+        self.statusBar().showMessage(
+            f"Auto-Layout: {len(nodes)} Knoten in {time.perf_counter() - t0:.1f} s", 5000)
+
+    # ── Suche ──────────────────────────────────────────────
+    def focus_search(self):
+        self.le_search.setFocus()
+        self.le_search.selectAll()
+
+    def find_matches(self):
+        """Treffer zur Eingabe markieren und die Ansicht darauf zentrieren."""
+        self._search_timer.stop()
+        t0 = time.perf_counter()
+        query = self.le_search.text()
+        hits = self.search_index.search(query) if self.search_index else []
+        ms = (time.perf_counter() - t0) * 1000
+        self._search_hits, self._search_pos = hits, -1
+        self.scene.clearSelection()
+        for item in hits:
+            item.setSelected(True)
+        if not query.strip():
+            self.statusBar().clearMessage()
+            return
+        if hits:
+            rect = QRectF()
+            for item in hits:
+                rect = rect.united(item.sceneBoundingRect())
+            self.view.centerOn(rect.center())
+        self.statusBar().showMessage(f"{len(hits)} Treffer ({ms:.1f} ms)", 5000)
+
+    def next_match(self):
+        """Enter im Suchfeld: nacheinander zu den einzelnen Treffern springen."""
+        if self._search_timer.isActive():
+            self.find_matches()
+            return
+        # Gelöschte Items fallen heraus
+        self._search_hits = [item for item in self._search_hits if item.scene() is self.scene]
+        if not self._search_hits:
+            return
+        self._search_pos = (self._search_pos + 1) % len(self._search_hits)
+        item = self._search_hits[self._search_pos]
+        self.view.centerOn(item)
+        self.statusBar().showMessage(
+            f"Treffer {self._search_pos + 1} von {len(self._search_hits)}", 5000)
+
+    # ── Plan-Prüfung ───────────────────────────────────────
+    def run_analysis(self):
+        """Kreuzungen und Überlappungen suchen, markieren und auflisten."""
+        t0 = time.perf_counter()
+        crossings = find_edge_crossings(self.scene.edges)
+        overlaps  = find_node_overlaps(self.scene.nodes)
+        ms = (time.perf_counter() - t0) * 1000
+        self.view.set_issue_marks([p for _, _, p in crossings],
+                                  [r for _, _, r in overlaps])
+
+        self.issue_list.clear()
+        entries = [(f"Überlappung: {a.text1 or '?'} / {b.text1 or '?'}", (a, b), r.center())
+                   for a, b, r in overlaps]
+        entries += [(f"Kreuzung: {self._edge_label(a)} × {self._edge_label(b)}", (a, b), p)
+                    for a, b, p in crossings]
+        for text, items, point in entries[:ANALYSIS_LIST_MAX]:
+            entry = QListWidgetItem(text)
+            entry.setData(Qt.UserRole, (items, point))
+            self.issue_list.addItem(entry)
+        if len(entries) > ANALYSIS_LIST_MAX:
+            self.issue_list.addItem(
+                f"… {len(entries) - ANALYSIS_LIST_MAX} weitere (nur auf der Zeichenfläche markiert)")
+        if entries:
+            self.issue_dock.show()
+        self.statusBar().showMessage(
+            f"Prüfung: {len(crossings)} Kreuzungen, {len(overlaps)} Überlappungen ({ms:.0f} ms)",
+            5000)
+
+    @staticmethod
+    def _edge_label(edge):
+        return f"{edge.source.text1 or '?'}–{edge.dest.text1 or '?'}"
+
+    def clear_analysis(self):
+        self.view.set_issue_marks([], [])
+        self.issue_list.clear()
+
+    def update_rule_list(self):
+        issues = self.validator.issues()
+        self.rule_list.clear()
+        for text, items in issues[:ANALYSIS_LIST_MAX]:
+            entry = QListWidgetItem(text)
+            entry.setData(Qt.UserRole, (items, None))
+            self.rule_list.addItem(entry)
+        if len(issues) > ANALYSIS_LIST_MAX:
+            self.rule_list.addItem(f"… {len(issues) - ANALYSIS_LIST_MAX} weitere")
+        self.rule_label.setText(f"Bus-Regeln ({len(issues)})" if issues else "Bus-Regeln")
+
+    def on_issue_double_click(self, entry: QListWidgetItem):
+        data = entry.data(Qt.UserRole)
+        if not data:
+            return
+        items, point = data
+        # Seit der Prüfung gelöschte Items nicht mehr auswählen
+        items = [item for item in items if item.scene() is self.scene]
+        self.scene.clearSelection()
+        rect = QRectF()
+        for item in items:
+            item.setSelected(True)
+            rect = rect.united(item.sceneBoundingRect())
+        if point is None:
+            if not items:
+                return
+            point = rect.center()   # Regel-Verstöße: aktuelle Lage der Items
+        self.view.centerOn(point)
+
     def delete_selected(self):
-        # lösche alle selektierten Nodes und Edges
-        for item in list(self.scene.selectedItems()):
-            if isinstance(item, NodeItem):
-                # verbundene Kanten entfernen
-                for edge in list(self.scene.edges):
-                    if edge.source is item or edge.dest is item:
-                        self.scene.removeItem(edge)
-                        self.scene.edges.remove(edge)
-                # dann den Node
-                self.scene.removeItem(item)
-                self.scene.nodes.remove(item)
-            elif isinstance(item, EdgeItem):
-                self.scene.removeItem(item)
-                self.scene.edges.remove(item)
-        self.update_table()  
+        # lösche alle selektierten Nodes und Edges – als ein Batch
+        with self.scene.batch():
+            for item in list(self.scene.selectedItems()):
+                if isinstance(item, NodeItem):
+                    # verbundene Kanten kommen aus dem Adjazenz-Index mit
+                    self.scene.remove_node(item)
+                elif isinstance(item, EdgeItem):
+                    # evtl. schon mit einem Node entfernt – dann No-op
+                    self.scene.remove_edge(item)
         
     def refresh_template_list(self):
         # 1) Templates nach Name deduplizieren
@@ -1960,6 +5778,47 @@ class MainWindow(QMainWindow):
             item = self.create_template_item(tpl)
             self.template_list.addItem(item)
             
+    def on_node_cache_changed(self, index: int):
+        self.scene.set_node_cache(self.cb_node_cache.itemData(index))
+
+    def on_edge_routing_changed(self, index: int):
+        self.scene.router.set_enabled(self.cb_edge_routing.itemData(index) == "orthogonal")
+        if self.journal is not None:
+            self.journal.mark_metadata()
+
+    def set_edge_routing_mode(self, mode: str):
+        """Setzt die Linienführung und hält die ComboBox synchron."""
+        idx = self.cb_edge_routing.findData(mode)
+        self.cb_edge_routing.setCurrentIndex(idx if idx >= 0 else 0)
+        self.scene.router.set_enabled(self.cb_edge_routing.currentData() == "orthogonal")
+
+    def set_node_cache_mode(self, mode: str):
+        """Setzt den Cache-Modus und hält die ComboBox synchron."""
+        idx = self.cb_node_cache.findData(mode)
+        self.cb_node_cache.setCurrentIndex(idx if idx >= 0 else 0)
+        self.scene.set_node_cache(self.cb_node_cache.currentData())
+        if self.journal is not None:
+            self.journal.mark_metadata()
+
+    def toggle_lod(self, checked: bool):
+        self.scene.set_lod(enabled=checked)
+
+    def configure_lod_levels(self):
+        levels = self.scene.lod_levels
+        text_min, ok = QInputDialog.getDouble(
+            self, "Detail-Schwellen", "Texte ausblenden unter Zoom:",
+            levels["text"], 0.0, 1.0, 2
+        )
+        if not ok:
+            return
+        simple_min, ok = QInputDialog.getDouble(
+            self, "Detail-Schwellen", "Vereinfachte Formen unter Zoom:",
+            min(levels["simple"], text_min), 0.0, text_min, 2
+        )
+        if not ok:
+            return
+        self.scene.set_lod(levels={"text": text_min, "simple": simple_min})
+
     def toggle_grid(self, checked: bool):
         # schalte das Gitter in der View ein/aus
         self.view.show_grid = checked
@@ -1970,12 +5829,14 @@ class MainWindow(QMainWindow):
         """Raster um 10px vergrößern, maximal 200px."""
         v = self.view
         v.grid_size = min(200, v.grid_size + 10)
+        self.scene.router.reroute_all()
         v.viewport().update()
 
     def on_grid_down(self):
         """Raster um 10px verkleinern, minimal 10px."""
         v = self.view
         v.grid_size = max(10, v.grid_size - 10)
+        self.scene.router.reroute_all()
         v.viewport().update()
      
     def toggle_connect_mode(self, checked: bool):
@@ -2054,10 +5915,120 @@ import sys
 from PyQt5.QtWidgets import QApplication
 from qt_material import apply_stylesheet
 
+# ── Batch-Export ohne Fenster ──────────────────────────────────
+# python Diagramm_editor_v5.2.18.py --batch projekte/*.json -f png -f pdf
+BATCH_FORMATS = ("png", "pdf", "csv")
+_batch_app    = None
+_batch_window = None
+
+def _batch_init():
+    """Initializer pro Worker-Prozess: eigene QApplication, offscreen."""
+    global _batch_app, _batch_window
+    os.environ["QT_QPA_PLATFORM"] = "offscreen"
+    _batch_app = QApplication.instance() or QApplication([])
+    MainWindow.interactive = False
+    # Ein (unsichtbares) Fenster pro Worker, für alle Dateien wiederverwendet
+    _batch_window = MainWindow()
+
+def _batch_render(job):
+    """Exportiert eine Datei; liefert (Pfad, Ausgaben, Sekunden, Fehler)."""
+    path, formats, page, dpi, threads, poster, out_dir, cache_dir = job
+    t0 = time.perf_counter()
+    window = _batch_window
+    window.export_cache = ExportCache(cache_dir) if cache_dir else None
+    outputs = []
+    try:
+        data = read_diagram_file(path)
+        window.apply_metadata(data.get("metadata", {}))
+        window.build_diagram(data)
+        stem   = os.path.splitext(os.path.basename(path))[0]
+        target = out_dir or os.path.dirname(os.path.abspath(path))
+        for fmt in formats:
+            out = os.path.join(target, f"{stem}.{fmt}")
+            if fmt == "png":
+                cached = window.render_image(out, page, dpi, threads)
+            elif fmt == "pdf" and poster:
+                cached = window.render_pdf_poster(out, page, poster) is None
+            elif fmt == "pdf":
+                cached = window.render_pdf(out, page)
+            else:
+                cached = window.write_table_csv(out)
+            outputs.append(f"{out} (Cache)" if cached else out)
+    except Exception as exc:
+        return path, outputs, time.perf_counter() - t0, f"{type(exc).__name__}: {exc}"
+    return path, outputs, time.perf_counter() - t0, None
+
+def run_batch(argv) -> int:
+    """
+    Exportiert viele Diagramme ohne Fenster. Die Dateien werden auf einen
+    Prozess-Pool verteilt (je Worker eine QApplication auf der
+    offscreen-Plattform). Rückgabe: Exit-Code, 1 bei mindestens einem Fehler.
+    """
+    import argparse
+    import glob
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    parser = argparse.ArgumentParser(
+        prog="Diagramm_editor --batch",
+        description="Diagramme ohne Fenster als PNG/PDF/CSV exportieren."
+    )
+    parser.add_argument("files", nargs="+", help="Dateien oder Muster (z.B. projekte/**/*.json)")
+    parser.add_argument("-f", "--format", dest="formats", action="append", choices=BATCH_FORMATS,
+                        help="Ausgabeformat, mehrfach möglich (Standard: png)")
+    parser.add_argument("-p", "--page", default="A4 Hoch", choices=list(PAGE_FORMATS),
+                        help="Papierformat wie in der Toolbar")
+    parser.add_argument("-d", "--dpi", type=int, default=300, help="Auflösung für PNG")
+    parser.add_argument("--poster", type=int, metavar="PROZENT",
+                        help="PDF als mehrseitiges Poster in festem Maßstab")
+    parser.add_argument("-o", "--out", help="Zielordner (Standard: neben der Eingabedatei)")
+    parser.add_argument("--cache", default=EXPORT_CACHE_DIR,
+                        help="Ordner des Export-Caches (geteilt mit der Oberfläche)")
+    parser.add_argument("--no-cache", action="store_true", help="Export-Cache nicht benutzen")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Anzahl Worker-Prozesse")
+    args = parser.parse_args(argv)
+
+    paths = []
+    for pattern in args.files:
+        # Nicht auflösbare Muster bleiben stehen → erscheinen als Fehler im Bericht
+        paths.extend(sorted(glob.glob(pattern, recursive=True)) or [pattern])
+    paths = list(dict.fromkeys(paths))
+    formats = args.formats or ["png"]
+    if args.out:
+        os.makedirs(args.out, exist_ok=True)
+
+    workers = max(1, min(args.jobs, len(paths), 61))   # 61: Obergrenze unter Windows
+    # Kerne auf Prozesse × Raster-Threads aufteilen
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    cache_dir = None if args.no_cache else args.cache
+    jobs = [(path, formats, args.page, args.dpi, threads, args.poster, args.out, cache_dir)
+            for path in paths]
+    failures = 0
+    t0 = time.perf_counter()
+    # spawn überall: kein fork eines Prozesses mit geladenem Qt
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_batch_init) as pool:
+        futures = [pool.submit(_batch_render, job) for job in jobs]
+        for future in as_completed(futures):
+            path, outputs, seconds, error = future.result()
+            if error:
+                failures += 1
+                print(f"FEHLER {seconds:7.2f} s  {path}: {error}", flush=True)
+            else:
+                print(f"OK     {seconds:7.2f} s  {path} → {', '.join(outputs)}", flush=True)
+    print(f"{len(jobs)} Datei(en), {failures} Fehler, {time.perf_counter() - t0:.2f} s "
+          f"mit {workers} Prozess(en)")
+    return 1 if failures else 0
+
 if __name__ == "__main__":
     import os, sys
     from PyQt5.QtWidgets import QApplication, QStyleFactory
 
+    # 0) Batch-Modus: keine Fenster, kein Theme
+    if len(sys.argv) > 1 and sys.argv[1] == "--batch":
+        sys.exit(run_batch(sys.argv[2:]))
+
     # 1) Unter Windows 11 das native Mica-Fensterdekor + Darkmode erzwingen
     os.environ["QT_QPA_PLATFORM"] = "windows:darkmode=2"
 
@@ -2103,7 +6074,7 @@ if __name__ == "__main__":
     }
 
     /* ------------------------------ Tabellenview ------------------------------ */
-    QTableWidget {
+    QTableView {
       background: #FFFFFF;
       alternate-background-color: #F9F9F9;
       gridline-color: #E1E1E1;
@@ -2114,7 +6085,7 @@ if __name__ == "__main__":
       padding: 4px;
       border: none;
     }
-    QTableWidget::item:selected {
+    QTableView::item:selected {
       background: #0078D4;     /* Windows-11-Blau */
       color: #FFFFFF;
     }